@@ -3,34 +3,132 @@ API Client for Anamnesis.fm
 Communicates with the Cloudflare Worker backend
 """
 
+import threading
 import time
 from typing import Optional, List
 import requests
 
-from config import API_BASE_URL, Timing
+from config import API_BASE_URL, Timing, Catalog as CatalogConfig, Proxy, Scheduler as SchedulerConfig
+from connectivity import CircuitOpenError, ConnectivityMonitor
+from log import get_logger
+from metrics import REGISTRY
+from models import Track, parse_tracks
+from tracing import tracer
+from transport import Transport
+
+log = get_logger("api")
 
 
 class AnamnesisAPI:
     """Client for anamnesis.fm API"""
 
-    def __init__(self, base_url: str = API_BASE_URL):
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        record_path: Optional[str] = None,
+        replay_path: Optional[str] = None,
+        replay_speed: float = 1.0,
+        catalog=None,
+        history=None,
+        proxy_url: Optional[str] = Proxy.URL,
+    ):
+        """
+        Args:
+            base_url: Worker API base URL
+            record_path: Capture search/metadata/penguin-radio exchanges to this cassette
+            replay_path: Answer requests from this cassette instead of the network
+            replay_speed: Multiplier on recorded timings when replaying (0 = instant)
+            catalog: Optional local Catalog to answer searches from
+            history: Optional PlayHistory whose recent plays are left out of searches
+            proxy_url: Optional LAN caching proxy (cache_proxy.py) for streams and metadata
+        """
         self.base_url = base_url.rstrip('/')
+        self.proxy_url = proxy_url.rstrip('/') if proxy_url else None
+        self._proxy_retry_at = 0.0
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'anamnesis-radio-pi/1.0',
             'Accept': 'application/json',
         })
 
-        # Track recently played to exclude from searches
-        self._recently_played: List[str] = []
-        self._max_recent = 20
+        # Cassettes hook in as transport adapters, so every code path
+        # below runs unchanged in record and replay mode
+        if record_path or replay_path:
+            from cassette import RecordingAdapter, ReplayAdapter
+            if replay_path:
+                adapter = ReplayAdapter(replay_path, speed=replay_speed)
+            else:
+                adapter = RecordingAdapter(record_path)
+            self.session.mount(self.base_url, adapter)
+
+        # Sized keep-alive pool plus per-endpoint retry/hedge policy
+        # (the cassette adapter's longer prefix still wins for base_url)
+        self.transport = Transport(self.session)
+
+        # Recent plays are dropped from results client-side
+        self.history = history
+
+        # Circuit breaker - fail fast while the Worker is unreachable
+        self.connectivity = ConnectivityMonitor(probe=self.warm_up)
+
+        # Offline catalog - network searches fill it, local searches use it
+        self.catalog = catalog
+        self._last_top_up = {}
+        self._top_up_lock = threading.Lock()
+
+    def warm_up(self) -> bool:
+        """
+        Open a keep-alive connection to the API ahead of the first request
+
+        Resolves DNS and completes the TLS handshake so the first
+        search after power-on doesn't pay for them.
+
+        Returns:
+            True if the API was reachable
+        """
+        try:
+            response = self.session.head(self.base_url, timeout=Timing.API_TIMEOUT_S)
+            return response.status_code < 500
+        except requests.RequestException as e:
+            log.warning("API warm-up failed: %s", e)
+            return False
+
+    def _request(self, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """
+        GET behind the circuit breaker, with the endpoint's retry/hedge policy
+
+        anamnesis_api_request_seconds times the whole call, retries and
+        hedges included; transport.py times each attempt separately.
+        """
+        if not self.connectivity.allow():
+            raise CircuitOpenError(f"API unreachable, not requesting {endpoint}")
 
-    def _add_to_recent(self, identifier: str):
-        """Add identifier to recently played list"""
-        if identifier not in self._recently_played:
-            self._recently_played.append(identifier)
-            if len(self._recently_played) > self._max_recent:
-                self._recently_played.pop(0)
+        labels = {'endpoint': endpoint}
+        errors = REGISTRY.counter('anamnesis_api_errors_total', 'Failed API requests', labels)
+        start = time.perf_counter()
+        try:
+            with tracer.span(f'api.{endpoint}'):
+                response = self.transport.get(endpoint, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            errors.inc()
+            self.connectivity.record_failure()
+            raise
+        except requests.RequestException:
+            errors.inc()
+            raise
+        finally:
+            REGISTRY.histogram(
+                'anamnesis_api_request_seconds', 'API request latency', labels
+            ).observe(time.perf_counter() - start)
+
+        if response.status_code >= 400:
+            errors.inc()
+        if response.status_code >= 500:
+            # The Worker answering but failing is as good as down
+            self.connectivity.record_failure()
+        else:
+            self.connectivity.record_success()
+        return response
 
     def search(
         self,
@@ -38,10 +136,14 @@ class AnamnesisAPI:
         location: Optional[str] = None,
         genre: Optional[str] = None,
         page: int = 1,
-    ) -> List[dict]:
+    ) -> List[Track]:
         """
         Search for tracks with given filters
 
+        Answered from the local catalog when it holds enough matching
+        items (topping it up in the background now and then); otherwise
+        goes to the Worker and adds the results to the catalog.
+
         Args:
             era: Era/decade query (e.g., "1940-1949")
             location: Location query (e.g., "North America")
@@ -49,7 +151,79 @@ class AnamnesisAPI:
             page: Page number
 
         Returns:
-            List of track items
+            List of Tracks
+        """
+        if self.catalog is not None and page == 1:
+            start = time.perf_counter()
+            exclude = self.history.recent if self.history is not None else ()
+            items = self.catalog.search(era, location, genre, exclude=exclude)
+            if len(items) >= CatalogConfig.MIN_LOCAL_RESULTS:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                log.debug("Search returned %s items from catalog (%.0fms)", len(items), elapsed_ms)
+                self._top_up(era, location, genre)
+                return items
+
+        try:
+            return self.search_remote(era, location, genre, page)
+        except requests.Timeout:
+            log.warning("Search timeout")
+            return []
+        except requests.RequestException as e:
+            log.warning("Search error: %s", e)
+            return []
+
+    @staticmethod
+    def _parse_tracks(response: requests.Response, on_item=None) -> List[Track]:
+        """Project a response body to Tracks, failing like response.json() would"""
+        try:
+            return parse_tracks(response.content, on_item)
+        except ValueError as e:
+            raise requests.exceptions.InvalidJSONError(f"Bad JSON: {e}", response=response)
+
+    def _top_up(self, era: Optional[str], location: Optional[str], genre: Optional[str]):
+        """Refresh the catalog for a filter combination in the background (rate limited)"""
+        key = (era, location, genre)
+        now = time.monotonic()
+        with self._top_up_lock:
+            last = self._last_top_up.get(key)
+            if last is not None and now - last < CatalogConfig.TOPUP_INTERVAL_S:
+                return
+            self._last_top_up[key] = now
+
+        def top_up():
+            try:
+                self.search_remote(era, location, genre)
+            except requests.RequestException as e:
+                log.warning("Catalog top-up failed: %s", e)
+
+        threading.Thread(target=top_up, name="catalog-top-up", daemon=True).start()
+
+    def search_remote(
+        self,
+        era: Optional[str] = None,
+        location: Optional[str] = None,
+        genre: Optional[str] = None,
+        page: int = 1,
+        exclude_recent: bool = True,
+        endpoint: str = 'search',
+    ) -> List[Track]:
+        """
+        Search via the Worker, adding the results to the catalog
+
+        Args:
+            era: Era/decade query (e.g., "1940-1949")
+            location: Location query (e.g., "North America")
+            genre: Genre query (e.g., "jazz")
+            page: Page number
+            exclude_recent: Leave out items in the play history's repeat window
+                (unless that leaves too few to play - then least recent first)
+            endpoint: Transport policy to request under ('harvest' never retries)
+
+        Returns:
+            List of Tracks
+
+        Raises:
+            requests.RequestException: On network or HTTP errors
         """
         params = {
             '_t': str(int(time.time() * 1000)),  # Cache buster
@@ -63,30 +237,36 @@ class AnamnesisAPI:
         if genre:
             params['genre'] = genre
 
-        # Exclude recently played
-        if self._recently_played:
-            params['exclude'] = ','.join(self._recently_played)
-
-        try:
-            url = f"{self.base_url}/api/search"
-            response = self.session.get(
-                url,
-                params=params,
-                timeout=Timing.API_TIMEOUT_S,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            items = data.get('items', [])
-            print(f"Search returned {len(items)} items")
-            return items
-
-        except requests.Timeout:
-            print("Search timeout")
-            return []
-        except requests.RequestException as e:
-            print(f"Search error: {e}")
-            return []
+        url = f"{self.base_url}/api/search"
+        response = self._request(
+            endpoint,
+            url,
+            params=params,
+        )
+        response.raise_for_status()
+
+        # The catalog indexes the full items; the queue only keeps Tracks
+        raw_items = []
+        items = self._parse_tracks(response, raw_items.append if self.catalog is not None else None)
+
+        if raw_items:
+            self.catalog.add_items(raw_items)
+
+        if exclude_recent and self.history is not None:
+            fresh = self.history.filter_recent(items)
+            if len(fresh) < SchedulerConfig.MIN_QUEUE:
+                # Sparse station - repeats beat "No tracks found"
+                log.debug("Only %s of %s items not played recently, allowing repeats", len(fresh), len(items))
+                fresh = self.history.least_recent_first(items)
+            items = fresh
+        log.debug("Search returned %s items", len(items))
+        return items
+
+    def _media_base(self) -> str:
+        """Base URL for streams and metadata - the LAN proxy unless it's down"""
+        if self.proxy_url and time.monotonic() >= self._proxy_retry_at:
+            return self.proxy_url
+        return self.base_url
 
     def get_metadata(self, identifier: str) -> Optional[dict]:
         """
@@ -99,19 +279,23 @@ class AnamnesisAPI:
             Metadata dict with audioFiles, or None on error
         """
         try:
-            url = f"{self.base_url}/api/metadata/{identifier}"
-            response = self.session.get(url, timeout=Timing.API_TIMEOUT_S)
+            response = None
+            base = self._media_base()
+            if base != self.base_url:
+                # One try, outside the breaker - a dead proxy says nothing about the Worker
+                try:
+                    response = self.transport.get('proxy', f"{base}/api/metadata/{identifier}")
+                except (requests.ConnectionError, requests.Timeout):
+                    log.warning("Proxy %s unreachable, bypassing for %ss", self.proxy_url, Proxy.RETRY_AFTER_S)
+                    self._proxy_retry_at = time.monotonic() + Proxy.RETRY_AFTER_S
+            if response is None:
+                response = self._request('metadata', f"{self.base_url}/api/metadata/{identifier}")
             response.raise_for_status()
 
-            data = response.json()
-
-            # Track as played
-            self._add_to_recent(identifier)
-
-            return data
+            return response.json()
 
         except requests.RequestException as e:
-            print(f"Metadata error for {identifier}: {e}")
+            log.warning("Metadata error for %s: %s", identifier, e)
             return None
 
     def get_stream_url(self, identifier: str, filename: str) -> str:
@@ -127,27 +311,26 @@ class AnamnesisAPI:
         """
         # URL encode the filename
         encoded_filename = requests.utils.quote(filename, safe='')
-        return f"{self.base_url}/api/stream/{identifier}/{encoded_filename}"
+        return f"{self._media_base()}/api/stream/{identifier}/{encoded_filename}"
 
-    def get_penguin_radio(self) -> List[dict]:
+    def get_penguin_radio(self) -> List[Track]:
         """
         Get Penguin Radio (Antarctica easter egg) tracks
 
         Returns:
-            List of SoundCloud track items
+            List of SoundCloud Tracks
         """
         try:
             url = f"{self.base_url}/api/penguin-radio"
-            response = self.session.get(url, timeout=Timing.API_TIMEOUT_S)
+            response = self._request('penguin-radio', url)
             response.raise_for_status()
-            data = response.json()
 
-            items = data.get('items', [])
-            print(f"Penguin Radio returned {len(items)} items")
+            items = self._parse_tracks(response)
+            log.info("Penguin Radio returned %s items", len(items))
             return items
 
         except requests.RequestException as e:
-            print(f"Penguin Radio error: {e}")
+            log.warning("Penguin Radio error: %s", e)
             return []
 
     def get_soundcloud_stream_url(self, track_id: int) -> str:
@@ -160,7 +343,7 @@ class AnamnesisAPI:
         Returns:
             Full stream URL
         """
-        return f"{self.base_url}/api/soundcloud-stream/{track_id}"
+        return f"{self._media_base()}/api/soundcloud-stream/{track_id}"
 
     def heartbeat(self) -> bool:
         """
@@ -171,9 +354,9 @@ class AnamnesisAPI:
         """
         try:
             url = f"{self.base_url}/api/heartbeat"
-            response = self.session.get(url, timeout=5)
+            response = self._request('heartbeat', url)
             return response.ok
-        except:
+        except requests.RequestException:
             return False
 
     def get_listener_count(self) -> Optional[int]:
@@ -185,11 +368,12 @@ class AnamnesisAPI:
         """
         try:
             url = f"{self.base_url}/api/listeners"
-            response = self.session.get(url, timeout=5)
+            response = self._request('listeners', url)
             response.raise_for_status()
             data = response.json()
             return data.get('count')
-        except:
+        except (requests.RequestException, ValueError) as e:
+            log.warning("Listener count error: %s", e)
             return None
 
 
@@ -202,17 +386,17 @@ if __name__ == "__main__":
     if items:
         print(f"Found {len(items)} items")
         item = items[0]
-        print(f"First item: {item.get('title', item.get('identifier'))}")
+        print(f"First item: {item.title or item.identifier}")
 
         print("\nTesting metadata...")
-        meta = api.get_metadata(item['identifier'])
+        meta = api.get_metadata(item.identifier)
         if meta:
             print(f"Title: {meta.get('title')}")
             print(f"Audio files: {len(meta.get('audioFiles', []))}")
 
             if meta.get('audioFiles'):
                 stream_url = api.get_stream_url(
-                    item['identifier'],
+                    item.identifier,
                     meta['audioFiles'][0]['name']
                 )
                 print(f"Stream URL: {stream_url[:80]}...")
@@ -221,4 +405,4 @@ if __name__ == "__main__":
     penguins = api.get_penguin_radio()
     if penguins:
         print(f"Found {len(penguins)} penguin tracks")
-        print(f"First: {penguins[0].get('title')}")
+        print(f"First: {penguins[0].title}")
@@ -4,14 +4,84 @@ Uses mpv for robust HTTP streaming
 """
 
 import threading
-from typing import Callable, Optional
+import time
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from config import Audio as AudioConfig
+from log import get_logger
+from metrics import REGISTRY
+from startup import profiler
+from tracing import tracer
+
+log = get_logger("audio")
+
+# python-mpv is imported on first use - loading libmpv is one of the
+# slowest parts of a cold start on a Pi 2B
+mpv = None
+MPV_AVAILABLE: Optional[bool] = None
+
+
+PLAYS = REGISTRY.counter('anamnesis_audio_plays_total', 'Streams started')
+PLAY_ERRORS = REGISTRY.counter('anamnesis_audio_errors_total', 'Playback errors')
+OPEN_TIME = REGISTRY.histogram(
+    'anamnesis_audio_open_seconds', 'Time from play() until mpv is playing'
+)
+REBUFFERS = REGISTRY.counter(
+    'anamnesis_audio_rebuffers_total', 'Playback stalls waiting for the network cache'
+)
+STALL_TIME = REGISTRY.histogram(
+    'anamnesis_audio_stall_seconds', 'How long playback stalled before the cache refilled'
+)
+CACHE_AHEAD = REGISTRY.gauge(
+    'anamnesis_audio_cache_seconds', 'Seconds of audio buffered ahead of playback'
+)
+
+
+class PlaybackState(NamedTuple):
+    """mpv's view of playback, as last reported by its property observers"""
+    position: Optional[float] = None   # time-pos
+    duration: Optional[float] = None   # duration
+    paused: bool = False               # pause
+    idle: bool = True                  # idle-active (nothing loaded)
+    buffering: bool = False            # paused-for-cache (stalled on the network)
+    cache_s: Optional[float] = None    # demuxer-cache-duration
+
+
+# mpv property -> PlaybackState field
+OBSERVED = {
+    'time-pos': 'position',
+    'duration': 'duration',
+    'pause': 'paused',
+    'idle-active': 'idle',
+    'paused-for-cache': 'buffering',
+    'demuxer-cache-duration': 'cache_s',
+}
+
+
+def _file_options(start: Optional[float], byte_range: Optional[Tuple[int, int]]) -> dict:
+    """Per-file mpv options for opening a stream partway in"""
+    options = {}
+    if start:
+        options['start'] = f"{start:.1f}"
+    if byte_range:
+        # One ranged request straight at the excerpt - MP3 resyncs on the next frame
+        options['stream_lavf_o'] = f"[offset={byte_range[0]},end_offset={byte_range[1]}]"
+    return options
+
+
+def _load_mpv() -> bool:
+    """Import python-mpv, returns True if available"""
+    global mpv, MPV_AVAILABLE
+
+    if MPV_AVAILABLE is None:
+        try:
+            import mpv
+            MPV_AVAILABLE = True
+        except ImportError:
+            MPV_AVAILABLE = False
+            log.warning("python-mpv not available, audio disabled")
 
-try:
-    import mpv
-    MPV_AVAILABLE = True
-except ImportError:
-    MPV_AVAILABLE = False
-    print("Warning: python-mpv not available, audio disabled")
+    return MPV_AVAILABLE
 
 
 class AudioPlayer:
@@ -21,19 +91,53 @@ class AudioPlayer:
         self,
         on_track_end: Callable,
         on_error: Callable[[str], None],
+        on_stall: Optional[Callable[[], None]] = None,
+        on_rebuffer: Optional[Callable[[float], None]] = None,
+        on_first_audio: Optional[Callable[[], None]] = None,
     ):
+        """
+        Args:
+            on_track_end: Called when a stream plays to the end
+            on_error: Called with a message when a stream fails
+            on_stall: Called when playback stops to wait for the network
+            on_rebuffer: Called with the stall length once playback carries on
+            on_first_audio: Called once a newly opened stream is first heard
+        """
         self.on_track_end = on_track_end
         self.on_error = on_error
+        self.on_stall = on_stall
+        self.on_rebuffer = on_rebuffer
+        self.on_first_audio = on_first_audio
 
-        self.player: Optional[mpv.MPV] = None
+        self.player: Optional["mpv.MPV"] = None
         self._volume = 50
         self._is_playing = False
+        self._file_loaded = threading.Event()
+
+        # Replaced whole (never mutated) by mpv's event thread, so any
+        # thread can read it without a lock or a call into mpv
+        self.state = PlaybackState()
+        self._stall_started: Optional[float] = None
+
+        # Stream appended behind the current one, and whether mpv has moved on to it
+        self._next_url: Optional[str] = None
+        self._next_range: Optional[Tuple[int, int]] = None
+        self._advanced = False
+
+        # (trace ID, start ns) of a load waiting for its first audio frame
+        self._first_frame_pending: Optional[tuple] = None
+        # Whether that load has decoded a frame, and is still waiting to be heard
+        self._frame_ready = False
+        self._audible_pending = False
 
         self._setup_player()
 
     def _setup_player(self):
         """Initialize mpv player"""
-        if not MPV_AVAILABLE:
+        with profiler.phase("audio import"):
+            available = _load_mpv()
+
+        if not available:
             return
 
         try:
@@ -46,13 +150,16 @@ class AudioPlayer:
                 video=False,
                 vo='null',
 
-                # Performance settings
+                # Buffering (sized for the board by the hardware profile)
                 cache=True,
-                cache_secs=10,
-                demuxer_max_bytes='50MiB',
+                cache_secs=AudioConfig.CACHE_SECS,
+                demuxer_max_bytes=AudioConfig.DEMUXER_MAX_BYTES,
 
                 # Network settings for streaming
-                stream_buffer_size='1MiB',
+                stream_buffer_size=AudioConfig.STREAM_BUFFER_SIZE,
+
+                # Open the next playlist entry while the current one finishes
+                prefetch_playlist=True,
 
                 # Logging
                 log_handler=self._log_handler,
@@ -64,16 +171,84 @@ class AudioPlayer:
             def on_end(event):
                 self._handle_end_file(event)
 
-            print("mpv player initialized")
+            @self.player.event_callback('file-loaded')
+            def on_loaded(event):
+                self._file_loaded.set()
+
+            @self.player.event_callback('playback-restart')
+            def on_playback_restart(event):
+                self._on_playback_restart()
+
+            for name in OBSERVED:
+                self.player.observe_property(name, self._on_property)
+
+            log.info("mpv player initialized")
 
         except Exception as e:
-            print(f"Failed to initialize mpv: {e}")
+            log.error("Failed to initialize mpv: %s", e)
             self.player = None
 
+    def _on_property(self, name: str, value):
+        """Fold an observed property change into the snapshot (mpv event thread)"""
+        field = OBSERVED[name]
+        if field in ('paused', 'idle', 'buffering'):
+            value = bool(value)
+        previous = self.state
+        self.state = previous._replace(**{field: value})
+
+        if field == 'cache_s':
+            CACHE_AHEAD.set(value or 0.0)
+        elif field == 'buffering' and value != previous.buffering:
+            self._on_buffering(value)
+        if field in ('paused', 'buffering'):
+            self._check_audible()
+
+    def _on_buffering(self, stalled: bool):
+        """Turn paused-for-cache transitions into stall/rebuffer events"""
+        if stalled:
+            if not self._is_playing:
+                return  # Opening or preloading - not a stall
+            self._stall_started = time.monotonic()
+            REBUFFERS.inc()
+            log.warning("Playback stalled, waiting for the network")
+            if self.on_stall:
+                self.on_stall()
+        elif self._stall_started is not None:
+            stalled_s = time.monotonic() - self._stall_started
+            self._stall_started = None
+            STALL_TIME.observe(stalled_s)
+            log.info("Playback resumed after %.1fs stall", stalled_s)
+            if self.on_rebuffer:
+                self.on_rebuffer(stalled_s)
+
+    def _on_playback_restart(self):
+        """First decoded audio after a load - close the first-frame span"""
+        pending = self._first_frame_pending
+        if pending:
+            self._first_frame_pending = None
+            trace_id, start_ns = pending
+            tracer.record('audio.first_frame', start_ns, time.perf_counter_ns(), trace_id)
+        self._frame_ready = True
+        self._check_audible()
+
+    def _opening(self):
+        """A new stream is being opened - time its first frame and when it's first heard"""
+        self._first_frame_pending = (tracer.current(), time.perf_counter_ns())
+        self._frame_ready = False
+        self._audible_pending = True
+
+    def _check_audible(self):
+        """Report the first moment a new stream has a frame and is neither paused nor buffering"""
+        state = self.state
+        if self._audible_pending and self._frame_ready and not state.paused and not state.buffering:
+            self._audible_pending = False
+            if self.on_first_audio:
+                self.on_first_audio()
+
     def _log_handler(self, loglevel: str, component: str, message: str):
         """Handle mpv log messages"""
         if loglevel in ('error', 'fatal'):
-            print(f"mpv {loglevel}: {message}")
+            log.error("mpv %s: %s", loglevel, message)
 
     def _handle_end_file(self, event):
         """Handle track end or error"""
@@ -83,32 +258,147 @@ class AudioPlayer:
         reason = event.get('reason', 'unknown')
 
         if reason == 'eof':
-            # Normal end of file
+            # Normal end of file - mpv carries straight on if a next stream was queued
             self._is_playing = False
+            self._advanced = self._next_url is not None
             self.on_track_end()
         elif reason == 'error':
             # Playback error
             self._is_playing = False
+            PLAY_ERRORS.inc()
             error_msg = event.get('file_error', 'Unknown error')
             self.on_error(error_msg)
         elif reason == 'stop':
             # Manually stopped
             self._is_playing = False
 
-    def play(self, url: str):
-        """Play audio from URL"""
+    def play(self, url: str, start: Optional[float] = None, byte_range: Optional[Tuple[int, int]] = None):
+        """
+        Play audio from URL
+
+        Args:
+            url: Stream URL
+            start: Optional position in seconds to start from
+            byte_range: Optional (first, end) bytes to fetch instead of the whole file
+        """
         if not self.player:
-            print(f"Would play: {url}")
+            log.debug("Would play: %s", url)
             return
 
+        if url == self._next_url and byte_range == self._next_range and not start:
+            self._play_queued()
+            return
+
+        try:
+            log.debug("Opening: %s...", url[:80])
+            PLAYS.inc()
+            self._next_url = None
+            self._advanced = False
+            start_time = time.perf_counter()
+            self._opening()
+            with tracer.span('audio.open'):
+                # A preload or user pause would otherwise carry over
+                self.player.pause = False
+                options = _file_options(start, byte_range)
+                if options:
+                    # Let mpv open the stream at the offset instead of seeking later
+                    self.player.loadfile(url, **options)
+                else:
+                    self.player.play(url)
+                self.player.wait_until_playing()
+            OPEN_TIME.observe(time.perf_counter() - start_time)
+            self._is_playing = True
+
+        except Exception as e:
+            log.warning("Play error: %s", e)
+            PLAY_ERRORS.inc()
+            self.on_error(str(e))
+
+    def _play_queued(self):
+        """Switch to the stream queue_next() handed mpv (already open if it ended)"""
+        PLAYS.inc()
+        self._next_url = None
         try:
-            print(f"Playing: {url[:80]}...")
-            self.player.play(url)
-            self.player.wait_until_playing()
+            if self._advanced:
+                # mpv moved on by itself at the end of the last track
+                log.debug("Playing queued stream")
+            else:
+                # Skipped early - jump to it
+                log.debug("Skipping to queued stream")
+                start_time = time.perf_counter()
+                self._opening()
+                with tracer.span('audio.open', queued=True):
+                    self.player.pause = False
+                    self.player.playlist_next()
+                    self.player.wait_until_playing()
+                OPEN_TIME.observe(time.perf_counter() - start_time)
+            self._advanced = False
             self._is_playing = True
 
         except Exception as e:
-            print(f"Play error: {e}")
+            log.warning("Play error: %s", e)
+            PLAY_ERRORS.inc()
+            self.on_error(str(e))
+
+    def queue_next(self, url: str, byte_range: Optional[Tuple[int, int]] = None):
+        """
+        Queue the stream to play after the current one
+
+        mpv opens it as the current track finishes downloading, so the
+        next play() of the same URL (and range) starts without a fresh open.
+
+        Args:
+            url: Stream URL
+            byte_range: Optional (first, end) bytes to fetch instead of the whole file
+        """
+        if not self.player:
+            log.debug("Would queue: %s", url)
+            return
+
+        try:
+            # Anything queued earlier is stale - keep only the current entry
+            self.player.playlist_clear()
+            self.player.loadfile(url, 'append', **_file_options(None, byte_range))
+            self._next_url = url
+            self._next_range = byte_range
+            self._advanced = False
+
+        except Exception as e:
+            log.warning("Queue error: %s", e)
+            self._next_url = None
+
+    def preload(self, url: str, start: Optional[float] = None, timeout: float = 10):
+        """
+        Open a stream paused so that resume() starts it instantly
+
+        Blocks until mpv has opened the stream and started filling its
+        cache (or the timeout passes).
+
+        Args:
+            url: Stream URL
+            start: Optional position in seconds to start from
+            timeout: Max seconds to wait for the stream to open
+        """
+        if not self.player:
+            log.debug("Would preload: %s", url)
+            return
+
+        try:
+            log.debug("Preloading: %s...", url[:80])
+            self._next_url = None
+            self._file_loaded.clear()
+            self._opening()
+            with tracer.span('audio.open', preload=True):
+                self.player.pause = True
+                if start:
+                    self.player.loadfile(url, start=f"{start:.1f}")
+                else:
+                    self.player.play(url)
+                if not self._file_loaded.wait(timeout=timeout):
+                    log.warning("Preload timed out, stream still opening")
+
+        except Exception as e:
+            log.warning("Preload error: %s", e)
             self.on_error(str(e))
 
     def pause(self):
@@ -124,6 +414,8 @@ class AudioPlayer:
 
     def stop(self):
         """Stop playback"""
+        self._next_url = None
+        self._stall_started = None
         if self.player:
             try:
                 self.player.stop()
@@ -146,27 +438,46 @@ class AudioPlayer:
         return self._volume
 
     def is_playing(self) -> bool:
-        """Check if currently playing"""
-        return self._is_playing
+        """Check if audio is actually coming out (not paused, idle or stalled)"""
+        if not self.player:
+            return self._is_playing
+        state = self.state
+        return self._is_playing and not (state.idle or state.paused or state.buffering)
+
+    def is_stalled(self) -> bool:
+        """Check if playback is waiting on the network cache"""
+        return self._stall_started is not None
 
     def get_position(self) -> Optional[float]:
-        """Get current playback position in seconds"""
+        """Get current playback position in seconds (from the observer snapshot)"""
         if self.player and self._is_playing:
-            try:
-                return self.player.time_pos
-            except:
-                pass
+            return self.state.position
         return None
 
     def get_duration(self) -> Optional[float]:
-        """Get track duration in seconds"""
+        """Get track duration in seconds (from the observer snapshot)"""
         if self.player and self._is_playing:
-            try:
-                return self.player.duration
-            except:
-                pass
+            return self.state.duration
         return None
 
+    def recreate(self):
+        """Replace the mpv instance with a fresh one (e.g. after it wedged)"""
+        old = self.player
+        self.player = None
+        self._is_playing = False
+        self._next_url = None
+        self._stall_started = None
+        self.state = PlaybackState()
+
+        if old:
+            # A wedged mpv may never finish terminating - don't wait on it
+            threading.Thread(target=old.terminate, name="mpv-terminate", daemon=True).start()
+
+        log.info("Re-creating mpv player")
+        self._setup_player()
+        if self.player:
+            self.player.volume = self._volume
+
     def cleanup(self):
         """Clean up player resources"""
         if self.player:
@@ -182,33 +493,61 @@ class MockAudioPlayer(AudioPlayer):
     def __init__(self, **kwargs):
         self.on_track_end = kwargs.get('on_track_end', lambda: None)
         self.on_error = kwargs.get('on_error', lambda e: None)
+        self.on_stall = kwargs.get('on_stall')
+        self.on_rebuffer = kwargs.get('on_rebuffer')
+        self.on_first_audio = kwargs.get('on_first_audio')
+        self._audible_pending = False
         self.player = None
+        self.state = PlaybackState()
+        self._stall_started = None
         self._volume = 50
         self._is_playing = False
         self._current_url = None
-        print("Mock audio player initialized")
+        log.info("Mock audio player initialized")
 
     def _setup_player(self):
         pass
 
-    def play(self, url: str):
-        print(f"[Mock] Playing: {url[:60]}...")
+    def play(self, url: str, start: Optional[float] = None, byte_range: Optional[Tuple[int, int]] = None):
+        log.debug("[Mock] Playing: %s...", url[:60])
         self._current_url = url
         self._is_playing = True
+        self._heard()
+
+    def queue_next(self, url: str, byte_range: Optional[Tuple[int, int]] = None):
+        log.debug("[Mock] Queued next: %s...", url[:60])
+
+    def preload(self, url: str, start: Optional[float] = None, timeout: float = 10):
+        log.debug("[Mock] Preloading: %s...", url[:60])
+        self._current_url = url
+        self._is_playing = False
+        self._audible_pending = True
 
     def pause(self):
-        print("[Mock] Paused")
+        log.debug("[Mock] Paused")
         self._is_playing = False
 
     def resume(self):
-        print("[Mock] Resumed")
+        log.debug("[Mock] Resumed")
         self._is_playing = True
+        if self._audible_pending:
+            self._heard()
+
+    def _heard(self):
+        """No network or decoder - a stream is heard as soon as it plays"""
+        self._audible_pending = False
+        if self.on_first_audio:
+            self.on_first_audio()
 
     def stop(self):
-        print("[Mock] Stopped")
+        log.debug("[Mock] Stopped")
         self._is_playing = False
         self._current_url = None
 
+    def recreate(self):
+        log.debug("[Mock] Re-created player")
+        self._is_playing = False
+
     def simulate_end(self):
         """Simulate track ending for testing"""
         self._is_playing = False
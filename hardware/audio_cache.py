@@ -0,0 +1,242 @@
+"""
+Audio Cache for Anamnesis.fm Radio
+Keeps recently played tracks on local storage for offline playback
+
+Each cached track is an audio file plus an entry in the cache's store
+index holding its metadata and the filters it was played under. Caching is opt-in
+(AudioCache.MAX_BYTES). Downloads run one at a time on a background
+thread and only while the player is idle, so they never compete with
+the live stream. The oldest-played tracks are evicted once the cache is
+over budget.
+"""
+
+import os
+import queue
+import random
+import re
+import threading
+import time
+from typing import Callable, List, Optional
+
+import requests
+
+from config import AudioCache as AudioCacheConfig, State
+from log import get_logger
+from models import Track, parse_year
+from store import open_store
+
+log = get_logger("audio_cache")
+
+
+def cache_key(track: Track) -> Optional[str]:
+    """Filesystem-safe key for a track"""
+    key = f"sc-{track.soundcloud_id}" if track.soundcloud_id else track.identifier
+    return re.sub(r"[^\w.-]", "_", key) if key else None
+
+
+class AudioCache:
+    """Bounded on-disk cache of played tracks"""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = AudioCacheConfig.MAX_BYTES,
+        session: Optional[requests.Session] = None,
+        is_idle: Optional[Callable[[], bool]] = None,
+    ):
+        """
+        Args:
+            directory: Cache directory (default under State.DIR)
+            max_bytes: Total size budget, 0 disables caching new tracks
+            session: HTTP session for downloads
+            is_idle: True while nothing is streaming (default: always)
+        """
+        self.directory = directory or os.path.join(State.DIR, AudioCacheConfig.DIR_NAME)
+        self.max_bytes = max_bytes
+        self.session = session
+        self.is_idle = is_idle or (lambda: True)
+
+        self._index = open_store(self.directory).kv(AudioCacheConfig.INDEX_FILE)
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._downloads: "queue.Queue[tuple]" = queue.Queue()
+        self._pending = set()
+        self._worker: Optional[threading.Thread] = None
+
+        self._load_index()
+
+    def _load_index(self):
+        """Read the index; drop half-written and unindexed files from a previous run"""
+        if not os.path.isdir(self.directory):
+            return
+
+        for key, entry in self._index.items():
+            if isinstance(entry, dict) and os.path.exists(entry.get("path", "")):
+                self._entries[key] = entry
+            else:
+                self._index.delete(key)
+
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.unlink(path)
+
+        # Downloaded after the index was last flushed - can't be played without metadata
+        for name in os.listdir(self.directory):
+            if name.endswith(".audio") and name[:-6] not in self._entries:
+                os.unlink(os.path.join(self.directory, name))
+
+        log.info("Audio cache: %s tracks, %.0f MB", len(self._entries), self.size_bytes() / 1024 ** 2)
+
+    def size_bytes(self) -> int:
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # === Adding ===
+
+    def add(self, track: Track, filters: dict):
+        """
+        Cache a track in the background (no-op if cached or disabled)
+
+        Args:
+            track: Track with a resolved stream_url
+            filters: Era/location/genre queries it was played under
+        """
+        key = cache_key(track)
+        url = track.stream_url
+        if not self.max_bytes or not key or not url or track.is_local:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                # Replaced, not mutated - the index compares against what it holds
+                entry = dict(self._entries[key], played_at=time.time())
+                self._entries[key] = entry
+                self._index.set(key, entry)
+                return
+            if key in self._pending or len(self._pending) >= AudioCacheConfig.MAX_PENDING:
+                return
+            self._pending.add(key)
+
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._download_loop, name="audio-cache", daemon=True
+                )
+                self._worker.start()
+
+        self._downloads.put((key, url, track.to_dict(), dict(filters)))
+
+    def _download_loop(self):
+        if self.session is None:
+            self.session = requests.Session()
+
+        while True:
+            item = self._downloads.get()
+            while not self.is_idle():
+                time.sleep(AudioCacheConfig.IDLE_POLL_S)
+            key = item[0]
+            try:
+                if not self._download(*item):
+                    # Playback started - try again once it stops
+                    self._downloads.put(item)
+                    continue
+            except (OSError, requests.RequestException) as e:
+                log.warning("Audio cache download failed: %s", e)
+            with self._lock:
+                self._pending.discard(key)
+
+    def _download(self, key: str, url: str, track: dict, filters: dict) -> bool:
+        """Fetch one track, returns False if interrupted by playback"""
+        os.makedirs(self.directory, exist_ok=True)
+        audio_path = os.path.join(self.directory, key + ".audio")
+        tmp_path = audio_path + ".part"
+
+        size = 0
+        with self.session.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(64 * 1024):
+                    size += len(chunk)
+                    if size > AudioCacheConfig.MAX_FILE_BYTES or not self.is_idle():
+                        f.close()
+                        os.unlink(tmp_path)
+                        return size > AudioCacheConfig.MAX_FILE_BYTES
+                    f.write(chunk)
+        os.replace(tmp_path, audio_path)
+
+        entry = {
+            "track": {k: v for k, v in track.items() if k != "streamUrl"},
+            "filters": filters,
+            "path": audio_path,
+            "size": size,
+            "played_at": time.time(),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._index.set(key, entry)
+        self._evict()
+        return True
+
+    def _evict(self):
+        """Drop least recently played tracks until under budget"""
+        with self._lock:
+            by_age = sorted(self._entries.items(), key=lambda kv: kv[1]["played_at"])
+            total = sum(entry["size"] for _, entry in by_age)
+            while by_age and total > self.max_bytes:
+                key, entry = by_age.pop(0)
+                total -= entry["size"]
+                del self._entries[key]
+                self._index.delete(key)
+                try:
+                    os.unlink(entry["path"])
+                except FileNotFoundError:
+                    pass
+
+    # === Offline Playback ===
+
+    def tracks(
+        self,
+        era: Optional[str] = None,
+        location: Optional[str] = None,
+        genre: Optional[str] = None,
+        exclude: Optional[str] = None,
+    ) -> List[Track]:
+        """
+        Every cached track, closest match to the filters first
+
+        Era counts most (by recording year, else the era it was played
+        under), then genre, then location. Ties are shuffled.
+
+        Args:
+            era: Year range query (e.g., "1940-1949")
+            location: Location query
+            genre: Genre query
+            exclude: Cache key to leave out (the track playing now)
+
+        Returns:
+            Tracks whose stream_url is the local file
+        """
+        with self._lock:
+            entries = [(key, entry) for key, entry in self._entries.items() if key != exclude]
+
+        def score(entry: dict) -> int:
+            played_under = entry["filters"]
+            points = 0
+            if era:
+                start, _, end = era.partition("-")
+                stored = entry["track"]
+                year = parse_year(stored.get("year") or stored.get("date"))
+                if year is not None and start.isdigit() and end.isdigit():
+                    points += 4 if int(start) <= year <= int(end) else 0
+                elif played_under.get("era") == era:
+                    points += 4
+            if genre and played_under.get("genre") == genre:
+                points += 2
+            if location and played_under.get("location") == location:
+                points += 1
+            return points
+
+        ranked = sorted(entries, key=lambda kv: (score(kv[1]), random.random()), reverse=True)
+        return [Track.from_dict(dict(entry["track"], streamUrl=entry["path"])) for _, entry in ranked]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark AnamnesisAPI against the local stub Worker
+Reports throughput and tail latency per endpoint
+
+Example:
+    python3 bench_api.py --requests 200 --concurrency 4 \\
+        --latency-ms 120 --jitter-ms 200 --error-rate 0.02
+
+    # Tail latency with and without retries/hedging
+    python3 bench_api.py --only metadata --requests 300 --concurrency 4 \\
+        --latency-ms 80 --slow-rate 0.05 --slow-ms 3000 [--baseline]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api import AnamnesisAPI
+from metrics import REGISTRY
+from simulate import format_distribution
+from stub_server import add_fault_arguments, server_from_args
+from transport import Policy
+
+
+def scenarios(api: AnamnesisAPI, identifiers: List[str]) -> Dict[str, Callable[[int], object]]:
+    """Named calls to benchmark, each taking the request number"""
+    return {
+        "search": lambda n: api.search(era="1940-1949"),
+        "metadata": lambda n: api.get_metadata(identifiers[n % len(identifiers)]),
+        "penguin-radio": lambda n: api.get_penguin_radio(),
+        "heartbeat": lambda n: api.heartbeat(),
+        "listeners": lambda n: api.get_listener_count(),
+    }
+
+
+def run_scenario(call: Callable[[int], object], requests: int, concurrency: int):
+    """Run `requests` calls on `concurrency` threads, returns (latencies, wall)"""
+    latencies: List[float] = []
+
+    def timed(n: int):
+        start = time.perf_counter()
+        call(n)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+def transport_summary(endpoint: str) -> str:
+    """Per-attempt vs whole-call tail, and how often retries/hedges kicked in"""
+    labels = {"endpoint": endpoint}
+    attempt = REGISTRY.histogram("anamnesis_api_attempt_seconds", "Latency of single API attempts", labels)
+    call = REGISTRY.histogram("anamnesis_api_request_seconds", "API request latency", labels)
+    retries = REGISTRY.counter("anamnesis_api_retries_total", "API request retries", labels)
+    hedges = REGISTRY.counter("anamnesis_api_hedges_total", "Duplicate requests sent after the p95", labels)
+    wins = REGISTRY.counter("anamnesis_api_hedge_wins_total", "Hedged duplicates that answered first", labels)
+
+    def bound(histogram, q):
+        value = histogram.quantile(q)
+        return "-" if value is None else f"<={value * 1000:.0f}ms"
+
+    return (
+        f"  {'':<22} attempt p99 {bound(attempt, 0.99)}, call p99 {bound(call, 0.99)};"
+        f" {attempt.count} attempts, {retries.value:.0f} retries,"
+        f" {hedges.value:.0f} hedges ({wins.value:.0f} won)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AnamnesisAPI benchmark against the stub Worker")
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads")
+    parser.add_argument("--only", action="append", help="benchmark only these endpoints")
+    parser.add_argument("--baseline", action="store_true", help="single attempts, no hedging")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args).start()
+    api = AnamnesisAPI(server.url)
+    if args.baseline:
+        api.transport.policies = {
+            endpoint: Policy(attempts=1, timeout_s=policy.timeout_s, budget_s=policy.budget_s)
+            for endpoint, policy in api.transport.policies.items()
+        }
+    identifiers = list(server.fixtures.metadata)
+
+    bandwidth = f"{args.bandwidth_kbps:g}kbps" if args.bandwidth_kbps else "unlimited"
+    print(f"Stub at {server.url}: latency={args.latency_ms:g}ms jitter={args.jitter_ms:g}ms "
+          f"bandwidth={bandwidth} errors={args.error_rate:.0%}")
+    print(f"{args.requests} requests per endpoint, concurrency {args.concurrency}"
+          f"{' (baseline: no retries or hedging)' if args.baseline else ''}")
+    print()
+
+    # Quiet the client's per-request prints while measuring
+    stdout = sys.stdout
+    try:
+        for name, call in scenarios(api, identifiers).items():
+            if args.only and name not in args.only:
+                continue
+            sys.stdout = open(os.devnull, "w")
+            try:
+                latencies, wall = run_scenario(call, args.requests, args.concurrency)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            print(f"{format_distribution(name, latencies)}  {len(latencies) / wall:7.1f} req/s")
+            print(transport_summary(name))
+    finally:
+        sys.stdout = stdout
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark search response decoding: plain dicts vs slotted Tracks
+Reports parse time and retained/peak memory for one result set
+
+Example:
+    python3 bench_tracks.py --items 450 --repeat 50
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import parse_tracks
+
+WORDS = (
+    "radio broadcast program news music interview live recording station orchestra "
+    "announcer episode drama comedy serial war report jazz folk blues hour evening "
+    "morning special transcription network local community archive collection"
+).split()
+
+
+def make_response(items: int, seed: int = 1) -> bytes:
+    """Search response shaped like the Worker's, with archive.org-sized blobs"""
+    rng = random.Random(seed)
+
+    def words(n: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    docs = []
+    for n in range(items):
+        year = rng.randint(1930, 2020)
+        docs.append({
+            "identifier": f"item-{n}-{rng.getrandbits(32):08x}",
+            "title": words(rng.randint(3, 9)).title(),
+            "creator": f"Station {rng.randint(1, 200)}",
+            "date": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "year": str(year),
+            "coverage": rng.choice(["North America", "Europe", "Asia", "Africa"]),
+            "subject": [words(2) for _ in range(rng.randint(4, 16))],
+            "description": words(rng.randint(80, 500)),
+        })
+    return json.dumps({"items": docs, "page": 1, "count": items}).encode("utf-8")
+
+
+def parse_dicts(body: bytes) -> list:
+    """What the API client did before - keep every item dict"""
+    return json.loads(body).get("items", [])
+
+
+def measure(parse: Callable[[bytes], list], body: bytes, repeat: int) -> Tuple[List[float], int, int]:
+    """Returns (parse times, bytes retained by the result, peak bytes while parsing)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(body)
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = parse(body)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    del result
+    return times, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dict vs Track decoding of search results")
+    parser.add_argument("--items", type=int, default=450, help="items per response (Worker max is 450)")
+    parser.add_argument("--repeat", type=int, default=30, help="timed parses per approach")
+    args = parser.parse_args()
+
+    body = make_response(args.items)
+    print(f"Response: {args.items} items, {len(body) / 1024:.0f} KB\n")
+    print(f"{'approach':<10}{'p50 parse':>12}{'min parse':>12}{'retained':>12}{'peak':>12}")
+
+    results = {}
+    for name, parse in (("dicts", parse_dicts), ("tracks", parse_tracks)):
+        times, retained, peak = measure(parse, body, args.repeat)
+        results[name] = retained
+        print(
+            f"{name:<10}{statistics.median(times) * 1000:>10.2f}ms{min(times) * 1000:>10.2f}ms"
+            f"{retained / 1024:>10.0f}KB{peak / 1024:>10.0f}KB"
+        )
+
+    print(f"\nTracks keep {results['tracks'] / results['dicts']:.1%} of the dict memory")
+
+
+if __name__ == "__main__":
+    main()
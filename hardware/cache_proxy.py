@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+LAN Caching Proxy for Anamnesis.fm Radios
+Lets several radios share one download of each stream and metadata lookup
+
+Run it on one radio (or any box on the LAN), then set Proxy.URL in
+config.py on every radio:
+    python3 cache_proxy.py --port 8788 --max-gb 8
+
+Streams are fetched upstream once and written to disk as they arrive;
+clients are served from that file while the download is still running,
+with byte ranges honoured. Finished files are kept in a size-bounded
+LRU. Metadata responses are cached in memory for as long as the Worker
+allows. Everything else passes straight through. Per-client request and
+byte counters are served at /metrics.
+"""
+
+import argparse
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from config import API_BASE_URL, Proxy
+from log import get_logger
+from metrics import REGISTRY
+
+log = get_logger("cache_proxy")
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+CHUNK_SIZE = 64 * 1024
+
+# Response headers worth passing back from the Worker
+FORWARDED_HEADERS = (
+    "Content-Type", "Content-Length", "Content-Encoding", "Content-Range", "Accept-Ranges", "Cache-Control",
+)
+
+UPSTREAM_BYTES = REGISTRY.counter("anamnesis_proxy_upstream_bytes_total", "Bytes fetched from the Worker")
+CACHE_BYTES = REGISTRY.gauge("anamnesis_proxy_cache_bytes", "Bytes of finished streams on disk")
+
+
+def parse_range(header: str, total: int) -> Optional[Tuple[int, int]]:
+    """
+    Single byte range from a Range header
+
+    Returns:
+        (first, last) inclusive, None for no/unsupported range
+
+    Raises:
+        ValueError: Range can't be satisfied
+    """
+    match = RANGE_RE.fullmatch(header or "")
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if match.group(1):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else total - 1
+    else:
+        start = max(0, total - int(match.group(2)))
+        end = total - 1
+    end = min(end, total - 1)
+    if start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+class Download:
+    """One upstream fetch, shared by every client reading the stream"""
+
+    def __init__(self, key: str, part_path: str):
+        self.key = key
+        self.part_path = part_path
+        self.written = 0
+        self.total: Optional[int] = None
+        self.content_type = "application/octet-stream"
+        self.done = False
+        self.error: Optional[str] = None
+        self.started = threading.Event()  # Headers are in
+        self.changed = threading.Condition()
+
+    def wait_for(self, offset: int, timeout: float) -> bool:
+        """Block until byte `offset` is on disk; False if it never will be"""
+        deadline = time.monotonic() + timeout
+        with self.changed:
+            while self.written <= offset and not self.done and not self.error:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.changed.wait(remaining)
+            return self.written > offset
+
+
+class StreamStore:
+    """Finished streams on disk (LRU by last read) plus downloads in flight"""
+
+    def __init__(self, directory: str, max_bytes: int, session: requests.Session):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.session = session
+
+        self._files: "OrderedDict[str, int]" = OrderedDict()  # key -> size, least recent first
+        self._downloads: Dict[str, Download] = {}
+        self._readers: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Pick up files from a previous run, oldest first"""
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.unlink(path)
+            else:
+                stat = os.stat(path)
+                found.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(found):
+            self._files[name] = size
+        CACHE_BYTES.set(self.size_bytes())
+        log.info("Proxy cache: %s streams, %.0f MB", len(self._files), self.size_bytes() / 1024 ** 2)
+
+    @staticmethod
+    def key_for(path: str) -> str:
+        return hashlib.sha1(path.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def size_bytes(self) -> int:
+        return sum(self._files.values())
+
+    def open(self, key: str, url: str) -> Tuple[str, object]:
+        """
+        Find or start fetching a stream, marking it in use
+
+        Returns:
+            ("file", size) if cached, ("miss", Download) if this call
+            started the fetch, else ("partial", Download)
+        """
+        with self._lock:
+            self._readers[key] = self._readers.get(key, 0) + 1
+            if key in self._files:
+                self._files.move_to_end(key)
+                os.utime(self.path_for(key))
+                return "file", self._files[key]
+
+            download = self._downloads.get(key)
+            if download is not None:
+                return "partial", download
+
+            download = Download(key, self.path_for(key) + ".part")
+            self._downloads[key] = download
+            threading.Thread(
+                target=self._fetch, args=(download, url), name="proxy-fetch", daemon=True
+            ).start()
+            return "miss", download
+
+    def release(self, key: str):
+        with self._lock:
+            self._readers[key] -= 1
+            if not self._readers[key]:
+                del self._readers[key]
+
+    def _fetch(self, download: Download, url: str):
+        try:
+            # Identity encoding keeps Content-Length equal to the bytes we store
+            with self.session.get(
+                url, stream=True, timeout=Proxy.UPSTREAM_TIMEOUT_S, headers={"Accept-Encoding": "identity"}
+            ) as response:
+                if response.status_code != 200:
+                    raise requests.HTTPError(f"upstream {response.status_code}")
+                length = response.headers.get("Content-Length")
+                download.total = int(length) if length else None
+                download.content_type = response.headers.get("Content-Type", download.content_type)
+
+                with open(download.part_path, "wb") as f:
+                    download.started.set()
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        f.flush()
+                        UPSTREAM_BYTES.inc(len(chunk))
+                        with download.changed:
+                            download.written += len(chunk)
+                            download.changed.notify_all()
+
+            os.replace(download.part_path, self.path_for(download.key))
+            with self._lock:
+                self._files[download.key] = download.written
+            self._evict()
+        except (requests.RequestException, OSError) as e:
+            log.warning("Proxy fetch failed for %s: %s", url, e)
+            download.error = str(e)
+            try:
+                os.unlink(download.part_path)
+            except OSError:
+                pass
+        finally:
+            download.started.set()
+            with download.changed:
+                download.done = True
+                download.changed.notify_all()
+            with self._lock:
+                self._downloads.pop(download.key, None)
+
+    def _evict(self):
+        """Drop least recently read streams until under budget (never ones being read)"""
+        with self._lock:
+            total = self.size_bytes()
+            for key in list(self._files):
+                if total <= self.max_bytes:
+                    break
+                if key in self._readers:
+                    continue
+                total -= self._files.pop(key)
+                try:
+                    os.unlink(self.path_for(key))
+                except OSError:
+                    pass
+            CACHE_BYTES.set(total)
+
+
+class MetadataCache:
+    """Recent metadata responses, kept for the Worker's cache lifetime"""
+
+    def __init__(self, ttl_s: float = Proxy.METADATA_TTL_S, max_entries: int = Proxy.METADATA_ENTRIES):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._entries.move_to_end(path)
+            return entry[1], entry[2]
+
+    def put(self, path: str, body: bytes, content_type: str):
+        with self._lock:
+            self._entries[path] = (time.monotonic() + self.ttl_s, body, content_type)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    server: "CacheProxy"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        try:
+            if path == "/metrics":
+                self._send(200, REGISTRY.exposition().encode("utf-8"), "text/plain; version=0.0.4")
+            elif path.startswith("/api/stream/") or path.startswith("/api/soundcloud-stream/"):
+                self._serve_stream(path)
+            elif path.startswith("/api/metadata/"):
+                self._serve_metadata()
+            else:
+                self._count("other", "pass")
+                self._forward()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client seeked or stopped
+
+    def do_HEAD(self):
+        self._count("other", "pass")
+        self._forward(head=True)
+
+    # === Streams ===
+
+    def _serve_stream(self, path: str):
+        store = self.server.store
+        key = store.key_for(path)
+        kind, found = store.open(key, self.server.upstream + self.path)
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        try:
+            if kind == "file":
+                self._count("stream", "hit")
+                self._send_file(store.path_for(key), found, content_type)
+            else:
+                self._serve_download(found, kind, store.path_for(key))
+        finally:
+            store.release(key)
+
+    def _send_file(self, path: str, total: int, content_type: str):
+        try:
+            byte_range = parse_range(self.headers.get("Range"), total)
+        except ValueError:
+            self._send_unsatisfiable(total)
+            return
+        start, end = byte_range or (0, total - 1)
+        self._send_stream_headers(206 if byte_range else 200, start, end, total, content_type)
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self._write(chunk)
+                remaining -= len(chunk)
+
+    def _serve_download(self, download: Download, kind: str, final_path: str):
+        """Serve from a file still being written, waiting for bytes as needed"""
+        timeout = Proxy.UPSTREAM_TIMEOUT_S
+        if not download.started.wait(timeout) or download.error:
+            self._count("stream", "pass")
+            self._forward()
+            return
+
+        requested = self.headers.get("Range")
+        if requested and download.total is None:
+            # Can't place a range in a stream of unknown length
+            self._count("stream", "pass")
+            self._forward()
+            return
+
+        total = download.total
+        try:
+            byte_range = parse_range(requested, total) if total is not None else None
+        except ValueError:
+            self._send_unsatisfiable(total)
+            return
+        start = byte_range[0] if byte_range else 0
+        if start > download.written + Proxy.PASSTHROUGH_AHEAD_BYTES:
+            # Seek far past the download - don't make the client wait for it
+            self._count("stream", "pass")
+            self._forward()
+            return
+
+        self._count("stream", kind)
+        if total is not None:
+            end = byte_range[1] if byte_range else total - 1
+            self._send_stream_headers(206 if byte_range else 200, start, end, total, download.content_type)
+        else:
+            end = None
+            self.send_response(200)
+            self.send_header("Content-Type", download.content_type)
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+        try:
+            f = open(download.part_path, "rb")
+        except FileNotFoundError:
+            f = open(final_path, "rb")  # Finished since we looked
+
+        with f:
+            position = start
+            f.seek(position)
+            while end is None or position <= end:
+                if not download.wait_for(position, timeout):
+                    break
+                available = download.written - position
+                if end is not None:
+                    available = min(available, end - position + 1)
+                chunk = f.read(min(CHUNK_SIZE, available))
+                if not chunk:
+                    break
+                self._write(chunk)
+                position += len(chunk)
+
+    def _send_stream_headers(self, status: int, start: int, end: int, total: int, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+        self.end_headers()
+
+    def _send_unsatisfiable(self, total: int):
+        self.send_response(416)
+        self.send_header("Content-Range", f"bytes */{total}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    # === Metadata ===
+
+    def _serve_metadata(self):
+        cache = self.server.metadata
+        cached = cache.get(self.path)
+        if cached is not None:
+            self._count("metadata", "hit")
+            self._send(200, *cached)
+            return
+
+        self._count("metadata", "miss")
+        try:
+            response = self.server.session.get(
+                self.server.upstream + self.path, timeout=Proxy.UPSTREAM_TIMEOUT_S
+            )
+        except requests.RequestException as e:
+            self._send(502, str(e).encode("utf-8"), "text/plain")
+            return
+        UPSTREAM_BYTES.inc(len(response.content))
+        content_type = response.headers.get("Content-Type", "application/json")
+        if response.status_code == 200:
+            cache.put(self.path, response.content, content_type)
+        self._send(response.status_code, response.content, content_type)
+
+    # === Pass-through ===
+
+    def _forward(self, head: bool = False):
+        """Relay the request upstream uncached (Range and all)"""
+        headers = {}
+        if self.headers.get("Range"):
+            headers["Range"] = self.headers["Range"]
+        try:
+            response = self.server.session.request(
+                "HEAD" if head else "GET", self.server.upstream + self.path,
+                headers=headers, stream=True, timeout=Proxy.UPSTREAM_TIMEOUT_S,
+            )
+        except requests.RequestException as e:
+            self._send(502, str(e).encode("utf-8"), "text/plain")
+            return
+
+        with response:
+            self.send_response(response.status_code)
+            for name in FORWARDED_HEADERS:
+                if name in response.headers:
+                    self.send_header(name, response.headers[name])
+            if "Content-Length" not in response.headers:
+                self.send_header("Connection", "close")
+            self.end_headers()
+            if head:
+                return
+            # Relay the body as sent, still compressed if it was
+            for chunk in response.raw.stream(CHUNK_SIZE, decode_content=False):
+                UPSTREAM_BYTES.inc(len(chunk))
+                self._write(chunk)
+
+    # === Helpers ===
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self._write(body)
+
+    def _write(self, data: bytes):
+        self.wfile.write(data)
+        REGISTRY.counter(
+            "anamnesis_proxy_bytes_sent_total", "Bytes sent to each radio", {"client": self.client_address[0]}
+        ).inc(len(data))
+
+    def _count(self, route: str, result: str):
+        """result: hit, miss, partial (joined a download in progress) or pass (relayed uncached)"""
+        REGISTRY.counter(
+            "anamnesis_proxy_requests_total", "Requests from each radio",
+            {"client": self.client_address[0], "route": route, "result": result},
+        ).inc()
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class CacheProxy(ThreadingHTTPServer):
+    """Threaded caching proxy; use .url once started"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = Proxy.PORT,
+        upstream: str = API_BASE_URL,
+        directory: str = Proxy.DIR,
+        max_bytes: int = Proxy.MAX_BYTES,
+        verbose: bool = False,
+    ):
+        super().__init__((host, port), ProxyHandler)
+        self.upstream = upstream.rstrip("/")
+        self.verbose = verbose
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "anamnesis-radio-proxy/1.0"
+        # One connection per concurrent client plus background fetches
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=32)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.store = StreamStore(directory, max_bytes, self.session)
+        self.metadata = MetadataCache()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "CacheProxy":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="cache-proxy", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LAN caching proxy for Anamnesis.fm radios")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=Proxy.PORT)
+    parser.add_argument("--upstream", default=API_BASE_URL, help="Worker API base URL")
+    parser.add_argument("--dir", default=Proxy.DIR, help="stream cache directory")
+    parser.add_argument("--max-gb", type=float, default=Proxy.MAX_BYTES / 1024 ** 3, help="disk budget")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    proxy = CacheProxy(
+        host=args.host,
+        port=args.port,
+        upstream=args.upstream,
+        directory=args.dir,
+        max_bytes=int(args.max_gb * 1024 ** 3),
+        verbose=args.verbose,
+    )
+    print(f"Caching proxy for {proxy.upstream} listening on {proxy.url}")
+    try:
+        proxy.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.server_close()
+
+
+if __name__ == "__main__":
+    main()
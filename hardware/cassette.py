@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Record/Replay HTTP Cassettes for AnamnesisAPI
+Captures real API exchanges to compact fixture files and replays them
+through the same requests.Session
+
+Record a cassette from the live Worker, then inspect it:
+    python3 cassette.py record cassettes/live.jsonl.gz --searches 10
+    python3 cassette.py info cassettes/live.jsonl.gz
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Only the JSON endpoints are worth capturing - streams are far too big
+RECORDED_PREFIXES = ('/api/search', '/api/metadata/', '/api/penguin-radio')
+
+# Query parameters that change on every request and must not affect matching
+VOLATILE_PARAMS = {'_t', 'exclude'}
+
+
+def exchange_key(method: str, url: str) -> str:
+    """Match key for a request: method, path and stable query params"""
+    parsed = urlparse(url)
+    params = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query) if k not in VOLATILE_PARAMS
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{method} {parsed.path}{query}"
+
+
+def is_recorded(url: str) -> bool:
+    return urlparse(url).path.startswith(RECORDED_PREFIXES)
+
+
+def load_cassette(path: str) -> List[dict]:
+    """Read all exchanges from a (multi-member) gzip JSON-lines cassette"""
+    entries = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return entries
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter that sends for real and appends exchanges to a cassette"""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+
+        if is_recorded(request.url):
+            # Reading .content here buffers the body; the caller still sees it
+            body = response.content
+            entry = {
+                'key': exchange_key(request.method, request.url),
+                'status': response.status_code,
+                'type': response.headers.get('Content-Type', 'application/json'),
+                'elapsed': round(time.perf_counter() - start, 4),
+                'body': body.decode('utf-8', errors='replace'),
+            }
+            line = json.dumps(entry, separators=(',', ':')) + '\n'
+            with self._lock:
+                # Each append is its own gzip member - crash-safe and still one file
+                with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                    f.write(line)
+
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter that answers from a cassette instead of the network
+
+    Requests are matched on method, path and stable query params;
+    repeated requests cycle through the recorded answers in order.
+    Unmatched requests fail like an unreachable network.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        """
+        Args:
+            path: Cassette file
+            speed: Multiplier on recorded timings (0 = no delay, 1 = as recorded)
+        """
+        super().__init__()
+        self.speed = speed
+        self._entries: Dict[str, List[dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        for entry in load_cassette(path):
+            self._entries.setdefault(entry['key'], []).append(entry)
+
+    def _next_entry(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return entries[index % len(entries)]
+
+    def send(self, request, **kwargs):
+        key = exchange_key(request.method, request.url)
+        entry = self._next_entry(key)
+        if entry is None:
+            raise requests.ConnectionError(f"No recorded exchange for {key}", request=request)
+
+        delay = entry['elapsed'] * self.speed
+        if delay > 0:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.headers = CaseInsensitiveDict({'Content-Type': entry['type']})
+        response._content = entry['body'].encode('utf-8')
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'Replayed'
+        response.elapsed = timedelta(seconds=delay)
+        return response
+
+    def close(self):
+        pass
+
+
+def summarize(path: str) -> List[Tuple[str, int, int, float]]:
+    """Per-endpoint (name, exchanges, body bytes, mean elapsed) for a cassette"""
+    stats: Dict[str, List[float]] = {}
+    for entry in load_cassette(path):
+        path_part = entry['key'].split(' ', 1)[1].split('?', 1)[0]
+        name = next((p.strip('/') for p in RECORDED_PREFIXES if path_part.startswith(p)), path_part)
+        row = stats.setdefault(name, [0, 0, 0.0])
+        row[0] += 1
+        row[1] += len(entry['body'])
+        row[2] += entry['elapsed']
+    return [(name, int(n), int(size), total / n) for name, (n, size, total) in sorted(stats.items())]
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from api import AnamnesisAPI
+    from config import ERAS, GENRES
+
+    parser = argparse.ArgumentParser(description="Record or inspect API cassettes")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    record = sub.add_parser('record', help='capture live exchanges')
+    record.add_argument('path')
+    record.add_argument('--searches', type=int, default=5, help='searches to record')
+    record.add_argument('--metadata', type=int, default=3, help='metadata lookups per search')
+    record.add_argument('--base-url', default=None, help='API to record from')
+
+    info = sub.add_parser('info', help='summarize a cassette')
+    info.add_argument('path')
+
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        print(f"{'endpoint':<16}{'count':>7}{'bytes':>11}{'mean':>9}")
+        for name, count, size, mean in summarize(args.path):
+            print(f"{name:<16}{count:>7}{size:>11}{mean * 1000:>7.0f}ms")
+        return
+
+    kwargs = {'base_url': args.base_url} if args.base_url else {}
+    api = AnamnesisAPI(record_path=args.path, **kwargs)
+
+    for n in range(args.searches):
+        era = ERAS[n % len(ERAS)]['query']
+        genre = GENRES[n % len(GENRES)]['query']
+        items = api.search(era=era, genre=genre)
+        for item in items[:args.metadata]:
+            api.get_metadata(item.identifier)
+    api.get_penguin_radio()
+
+    print(f"Recorded to {args.path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""
+Offline Catalog for Anamnesis.fm Radio
+Local SQLite index of search results the radio has already seen
+
+Answers era/location/genre searches with the same filter semantics as
+the Worker's handleSearch - strict year range, location matched against
+coverage/title/description/creator, genre against subject/title/
+description - then applies its diversity rule (one random item per
+creator) so the network is only needed to top the catalog up.
+"""
+
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Container, Dict, Iterable, List, Optional, Tuple
+
+from config import Catalog as CatalogConfig, State
+from log import get_logger
+from models import Track
+
+log = get_logger("catalog")
+
+# Long descriptions only add index size - the matching words come early
+MAX_TEXT_CHARS = 2000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    identifier  TEXT PRIMARY KEY,
+    title       TEXT,
+    creator     TEXT,
+    date        TEXT,
+    year        INTEGER,
+    coverage    TEXT,
+    subject     TEXT,
+    description TEXT,
+    seen_at     REAL
+);
+CREATE INDEX IF NOT EXISTS items_year ON items(year);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, creator, coverage, subject, description,
+    content='items', content_rowid='rowid'
+);
+
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts(rowid, title, creator, coverage, subject, description)
+    VALUES (new.rowid, new.title, new.creator, new.coverage, new.subject, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, creator, coverage, subject, description)
+    VALUES ('delete', old.rowid, old.title, old.creator, old.coverage, old.subject, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, creator, coverage, subject, description)
+    VALUES ('delete', old.rowid, old.title, old.creator, old.coverage, old.subject, old.description);
+    INSERT INTO items_fts(rowid, title, creator, coverage, subject, description)
+    VALUES (new.rowid, new.title, new.creator, new.coverage, new.subject, new.description);
+END;
+
+-- Worker result count per filter combination ('' = no filter)
+CREATE TABLE IF NOT EXISTS combinations (
+    era          TEXT NOT NULL,
+    location     TEXT NOT NULL,
+    genre        TEXT NOT NULL,
+    results      INTEGER NOT NULL,
+    harvested_at REAL NOT NULL,
+    PRIMARY KEY (era, location, genre)
+);
+"""
+
+# (era, location, genre) filter queries, None = no filter
+Combination = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def _text(value) -> Optional[str]:
+    """Flatten archive.org string-or-list fields"""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        value = "; ".join(str(v) for v in value)
+    return str(value)[:MAX_TEXT_CHARS]
+
+
+def _year(item: dict) -> Optional[int]:
+    for value in (item.get("year"), item.get("date")):
+        match = re.search(r"\d{4}", _text(value) or "")
+        if match:
+            return int(match.group())
+    return None
+
+
+def _fts_match(columns: str, query: str) -> str:
+    """
+    FTS5 expression for a filter query restricted to columns
+
+    Words within a query must all match; "/" separates alternatives
+    (e.g. "country/blues").
+    """
+    alternatives = []
+    for part in query.split("/"):
+        words = re.findall(r"\w+", part.lower())
+        if words:
+            alternatives.append("(" + " AND ".join(f'"{w}"' for w in words) + ")")
+    return "{%s} : (%s)" % (columns, " OR ".join(alternatives))
+
+
+def creator_key(track: Track) -> str:
+    """Grouping key for the one-item-per-creator diversity rule"""
+    creator = (
+        track.creator
+        or track.identifier.split("-")[0]
+        or (track.title or "").split(" - ")[0]
+        or "unknown"
+    )
+    return creator.lower().strip()
+
+
+def diversify(tracks: List[Track], rng: random.Random = random) -> List[Track]:
+    """One random track per creator, shuffled"""
+    by_creator = {}
+    for track in tracks:
+        by_creator.setdefault(creator_key(track), []).append(track)
+    diverse = [rng.choice(group) for group in by_creator.values()]
+    rng.shuffle(diverse)
+    return diverse
+
+
+class Catalog:
+    """SQLite + FTS5 index of archive.org items"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(State.DIR, CatalogConfig.DB_FILE)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        # Shared by the fetch threads; sqlite3 serializes access but
+        # multi-statement writes need to be atomic as a group
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock, self._db:
+            # WAL keeps reads from blocking on writes and batches SD card syncs
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+
+    def add_items(self, items: Iterable[dict]) -> int:
+        """
+        Insert or refresh search result items
+
+        Returns:
+            Number of items stored
+        """
+        now = time.time()
+        rows = [
+            (
+                item["identifier"],
+                _text(item.get("title")),
+                _text(item.get("creator")),
+                _text(item.get("date")),
+                _year(item),
+                _text(item.get("coverage")),
+                _text(item.get("subject")),
+                _text(item.get("description")),
+                now,
+            )
+            for item in items
+            if item.get("identifier")
+        ]
+        if not rows:
+            return 0
+
+        with self._lock, self._db:
+            self._db.executemany(
+                """
+                INSERT INTO items (identifier, title, creator, date, year,
+                                   coverage, subject, description, seen_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(identifier) DO UPDATE SET
+                    title=excluded.title, creator=excluded.creator,
+                    date=excluded.date, year=excluded.year,
+                    coverage=excluded.coverage, subject=excluded.subject,
+                    description=excluded.description, seen_at=excluded.seen_at
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def count(self, era: Optional[str] = None, location: Optional[str] = None, genre: Optional[str] = None) -> int:
+        """Number of catalog items matching the filters"""
+        sql, params = self._query("SELECT count(*)", era, location, genre)
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()[0]
+
+    def search(
+        self,
+        era: Optional[str] = None,
+        location: Optional[str] = None,
+        genre: Optional[str] = None,
+        exclude: Container[str] = (),
+        sample_size: int = CatalogConfig.SAMPLE_SIZE,
+    ) -> List[Track]:
+        """
+        Search the catalog like the Worker does
+
+        Args:
+            era: Year range query (e.g., "1940-1949")
+            location: Location query (e.g., "North America")
+            genre: Genre query (e.g., "jazz")
+            exclude: Identifiers to leave out (a set or the history's Bloom filter)
+            sample_size: Random matches drawn before the diversity pass
+
+        Returns:
+            List of Tracks, one per creator, in random order
+        """
+        sql, params = self._query(
+            "SELECT items.identifier, items.title, items.creator, items.date, items.year",
+            era, location, genre,
+        )
+        sql += " ORDER BY random() LIMIT ?"
+        params.append(sample_size)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        tracks = [
+            Track(row["identifier"], row["title"], row["creator"], row["year"])
+            for row in rows
+            if row["identifier"] not in exclude
+        ]
+        return diversify(tracks)
+
+    def _query(self, select: str, era: Optional[str], location: Optional[str], genre: Optional[str]):
+        """FROM/WHERE clause for the filters, with parameters"""
+        sql = f"{select} FROM items"
+        where, params = [], []
+
+        matches = []
+        if location:
+            matches.append(_fts_match("coverage title description creator", location))
+        if genre:
+            matches.append(_fts_match("subject title description", genre))
+        if matches:
+            sql += " JOIN items_fts ON items_fts.rowid = items.rowid"
+            where.append("items_fts MATCH ?")
+            params.append(" AND ".join(matches))
+
+        if era:
+            start, _, end = era.partition("-")
+            if start.isdigit() and end.isdigit():
+                where.append("items.year BETWEEN ? AND ?")
+                params.extend([int(start), int(end)])
+
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, params
+
+    # === Filter Combinations ===
+
+    def record_combination(self, combination: Combination, results: int):
+        """Store how many items the Worker returned for a combination"""
+        key = tuple(value or "" for value in combination)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO combinations VALUES (?, ?, ?, ?, ?)",
+                (*key, results, time.time()),
+            )
+
+    def combination_results(self, combination: Combination) -> Optional[int]:
+        """Worker result count for a combination, or None if never harvested"""
+        key = tuple(value or "" for value in combination)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT results FROM combinations WHERE era=? AND location=? AND genre=?", key
+            ).fetchone()
+        return row[0] if row else None
+
+    def harvested_combinations(self) -> Dict[Combination, Tuple[int, float]]:
+        """Every harvested combination -> (results, harvested_at)"""
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM combinations").fetchall()
+        return {
+            (row["era"] or None, row["location"] or None, row["genre"] or None):
+                (row["results"], row["harvested_at"])
+            for row in rows
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_catalog(path: Optional[str] = None) -> Optional[Catalog]:
+    """Open the catalog, or None if local storage isn't usable"""
+    try:
+        return Catalog(path)
+    except (OSError, sqlite3.Error) as e:
+        log.warning("Offline catalog unavailable: %s", e)
+        return None
@@ -0,0 +1,38 @@
+"""
+Time and Threading Source for Anamnesis.fm Radio
+Lets the controller run against real time or a simulated clock
+"""
+
+import threading
+import time
+from typing import Callable
+
+
+class Clock:
+    """Real time, real timers and real threads"""
+
+    def monotonic(self) -> float:
+        """Seconds from an arbitrary fixed point"""
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        """Block the calling thread"""
+        time.sleep(seconds)
+
+    def call_later(self, delay: float, func: Callable, *args):
+        """
+        Run func(*args) after delay seconds
+
+        Returns:
+            Handle with a cancel() method
+        """
+        timer = threading.Timer(delay, func, args=args)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def spawn(self, func: Callable, *args, name: str = None):
+        """Run func(*args) in the background"""
+        thread = threading.Thread(target=func, args=args, name=name, daemon=True)
+        thread.start()
+        return thread
@@ -2,6 +2,8 @@
 Configuration for Anamnesis.fm Physical Radio
 """
 
+import os
+
 # API Configuration
 API_BASE_URL = "https://anamnesis-api.teddy-557.workers.dev"
 
@@ -12,7 +14,7 @@ class Pins:
     BTN_1 = 23          # Era cycle
     BTN_2 = 24          # Location cycle
     BTN_3 = 25          # Genre cycle
-    BTN_4 = 12          # Previous track
+    BTN_4 = 12          # Scan mode
     BTN_5 = 16          # Next track
     BTN_6_PLUS = 20     # Skip forward
 
@@ -102,9 +104,178 @@ class Timing:
     DISPLAY_SCROLL_SPEED_MS = 150  # Text scroll speed
     API_TIMEOUT_S = 10             # API request timeout
     RETUNE_DEBOUNCE_MS = 500       # Debounce filter changes
+    STARTUP_SPLASH_S = 1.0         # Minimum time the power-on splash shows
 
 # Volume Configuration
 class Volume:
     MIN = 0
     MAX = 100
     DEFAULT = 50
+
+# Metrics
+class Metrics:
+    HTTP_PORT = 0                  # Localhost Prometheus endpoint (0 = disabled)
+    SUMMARY_INTERVAL_S = 300       # Compact summary to the journal (0 = disabled)
+
+# Latency Tracing
+class Tracing:
+    ENABLED = True                 # Record spans into the ring buffer
+    BUFFER_SIZE = 4096             # Spans kept (oldest dropped first)
+    DUMP_PATH = "/tmp/anamnesis-trace.json"
+
+# Sampling Profiler and Control Socket
+class Profiling:
+    SAMPLE_INTERVAL_S = 0.01       # 100 Hz across all threads
+    MAX_DURATION_S = 300           # Stop on its own if nobody does (0 = never)
+    OUTPUT_PATH = "/tmp/anamnesis-profile.folded"
+    CONTROL_SOCKET = "/tmp/anamnesis-radio.sock"
+
+# Local State (warm-boot snapshot)
+class State:
+    DIR = os.path.expanduser("~/.anamnesis-radio")
+    SNAPSHOT_FILE = "snapshot.json"
+    SNAPSHOT_INTERVAL_S = 30       # How often to persist while running
+    SNAPSHOT_MAX_AGE_S = 6 * 3600  # Ignore snapshots older than this
+    QUEUE_HEAD_SIZE = 5            # Queued tracks kept in the snapshot
+
+# Offline Catalog (SQLite index of seen search results)
+class Catalog:
+    DB_FILE = "catalog.db"         # Under State.DIR
+    SAMPLE_SIZE = 450              # Random matches before one-per-creator (as the Worker)
+    MIN_LOCAL_RESULTS = 30         # Fewer diverse matches than this goes to the network
+    TOPUP_INTERVAL_S = 15 * 60     # Background network top-up per filter combination
+
+# Background Catalog Harvester
+class Harvest:
+    REQUESTS_PER_HOUR = 30         # Hard budget for harvest searches
+    REFRESH_AFTER_S = 7 * 24 * 3600  # Re-sweep a combination after this long
+    SPARSE_THRESHOLD = 5           # Fewer results than this earns a warning
+    OFF_HOURS = (2, 6)             # Local hours [start, end) to harvest even when on
+    MAX_BACKOFF_S = 3600           # Longest wait after repeated failures
+
+# Connectivity (circuit breaker around the API)
+class Connectivity:
+    FAILURE_THRESHOLD = 3          # Consecutive network failures that open the circuit
+    PROBE_MIN_S = 2                # First recovery probe delay
+    PROBE_MAX_S = 120              # Probe backoff ceiling
+
+# Cached Audio (offline fallback)
+class AudioCache:
+    DIR_NAME = "audio"             # Under State.DIR
+    INDEX_FILE = "index.json"      # Track metadata, in the cache directory
+    MAX_BYTES = 0                  # Total cache size (0 = disabled, e.g. 2 * 1024 ** 3 to enable)
+    MAX_FILE_BYTES = 80 * 1024 ** 2  # Don't cache anything bigger than this
+    MAX_PENDING = 20               # Played tracks waiting for the player to go idle
+    IDLE_POLL_S = 5                # How often a waiting download checks for idle
+
+# Play History
+class History:
+    FILE = "history.jsonl"         # Under State.DIR
+    MAX_ENTRIES = 10000            # Plays kept (older ones trimmed)
+    REPEAT_WINDOW_S = 7 * 24 * 3600  # Don't repeat a track played this recently
+    BLOOM_ERROR_RATE = 0.01        # Fresh tracks wrongly skipped as repeats
+    BLOOM_MIN_CAPACITY = 1024
+
+# Refill/Preload Scheduling
+class Scheduler:
+    TICK_S = 1.0                   # How often the main loop re-plans
+    MIN_QUEUE = 2                  # Always keep a spare in case the next has no audio
+    DEFAULT_TRACK_S = 30 * 60      # Assumed length until some tracks have played
+    DEFAULT_API_S = 2.0            # Assumed request latency until measured
+    DEFAULT_OPEN_S = 3.0           # Assumed stream open time until measured
+    SAFETY_FACTOR = 1.5            # Multiplier on measured p95 latencies
+    MARGIN_S = 15.0                # Hand mpv the next stream before its readahead ends (Audio.CACHE_SECS + 5)
+
+# Tuning Dial (sub-era stations across the pot's range)
+class Tuning:
+    FIRST_YEAR = 1930              # Left end of the dial
+    LAST_YEAR = 2029               # Right end of the dial
+    BAND_YEARS = 5                 # Years per station
+    SETTLE_MS = 150                # Dial must rest this long before switching
+    WARM_RADIUS = 1                # Stations either side of the dial kept warm
+    WARM_QUEUE_SIZE = 3            # Tracks kept per warm station (first one resolved)
+    WARM_SLOTS = 8                 # Warm queues held at once (least recent dropped)
+    WARM_TTL_S = 10 * 60           # Refresh a warm queue older than this
+    WARM_ACTIVE_S = 5 * 60         # Only keep stations warm this long after the dial last moved
+
+# Scan Mode (PREV button auditions the queue)
+class Scan:
+    EXCERPT_S = 8                  # Length of each audition
+    POSITION = 0.4                 # Where excerpts start, as a fraction of the track
+    DEFAULT_OFFSET_S = 120         # Start here when the length isn't known
+    EOF_GRACE_S = 2                # Wait this long past a ranged excerpt for its EOF
+
+# Multi-process Mode (input, rendering and network engine in child processes)
+class Processes:
+    ENABLED = False                # Same as --multiprocess
+    START_TIMEOUT_S = 15           # Wait this long for the engine to come up
+    CALL_TIMEOUT_S = 60            # Longest wait on an engine call
+    ENGINE_WORKERS = 4             # Engine calls served at once
+    FLUSH_INTERVAL_S = 0.02        # How often the input process checks for a new frame
+
+# LAN Caching Proxy (cache_proxy.py, shared by radios in one building)
+class Proxy:
+    URL = None                     # e.g. "http://radio-1.local:8788" - route streams/metadata through it
+    PORT = 8788
+    DIR = os.path.expanduser("~/.anamnesis-proxy")
+    MAX_BYTES = 8 * 1024 ** 3      # Disk budget for cached streams
+    METADATA_TTL_S = 3600          # Matches the Worker's Cache-Control
+    METADATA_ENTRIES = 2000
+    UPSTREAM_TIMEOUT_S = 30
+    PASSTHROUGH_AHEAD_BYTES = 4 * 1024 ** 2  # Ranges this far past a download go straight upstream
+    RETRY_AFTER_S = 60             # Radios bypass an unreachable proxy for this long
+
+# API Transport (transport.py - pooling, retries, hedging)
+class Transport:
+    POOL_CONNECTIONS = 4           # Hosts with a pool kept (Worker, proxy)
+    POOL_MAXSIZE = 8               # Keep-alive connections per host (warm queues, top-ups, scheduler at once)
+    CONNECT_TIMEOUT_S = 3.05       # Just over a TCP retransmit window
+    BACKOFF_BASE_S = 0.25          # First retry waits up to this long (full jitter)
+    BACKOFF_MAX_S = 2.0            # Cap on any one backoff
+    HEDGE_MIN_SAMPLES = 20         # Attempts seen before the measured p95 is trusted
+    HEDGE_WINDOW = 200             # Recent attempt latencies the p95 is taken from
+    HEDGE_DEFAULT_S = 1.0          # Hedge delay until then
+    HEDGE_MIN_S = 0.1              # Never hedge sooner than this
+    HEDGE_WORKERS = 8              # Threads running hedged requests
+    # endpoint: (attempts, read timeout per attempt, total budget, hedge)
+    POLICIES = {
+        "search":        (2, 10, 20, False),  # Worker searches take 6-10s when archive.org is slow
+        "harvest":       (1, 10, 10, False),  # One request per pass - keeps the hourly budget strict
+        "metadata":      (3, 4, 10, True),
+        "proxy":         (1, 4, 4, False),    # LAN proxy - fall back to the Worker instead of retrying
+        "penguin-radio": (2, 8, 12, False),
+        "heartbeat":     (1, 5, 5, False),    # Next heartbeat is the retry
+        "listeners":     (1, 5, 5, False),
+    }
+
+# Playback Watchdog (watchdog.py, with systemd WatchdogSec)
+class Watchdog:
+    STALL_S = 15                   # No progress this long -> next recovery step (Audio.CACHE_SECS + 5)
+    CHECK_S = 2                    # How often playback is checked
+    LOOP_STALL_S = 20              # Main loop silent this long -> stop pinging systemd
+
+# mpv Buffering (sized per board by the hardware profile)
+class Audio:
+    CACHE_SECS = 10                # Readahead kept in the network cache
+    DEMUXER_MAX_BYTES = "50MiB"    # Cap on demuxer cache memory
+    STREAM_BUFFER_SIZE = "1MiB"    # Low-level stream read buffer
+
+# Logging (log.py - ring buffer plus batched journal writes)
+class Logging:
+    LEVEL = "debug"                # Lowest level kept in the ring
+    JOURNAL_LEVEL = "info"         # Lowest level written to the journal
+    RING_SIZE = 2000               # Records kept in memory (oldest dropped first)
+    FLUSH_INTERVAL_S = 1.0         # Journal batch interval
+    FLUSH_BATCH = 200              # Or sooner once this many are waiting
+    DUMP_PATH = "/tmp/anamnesis-log.txt"
+    DUMP_ON_ERROR = True           # Dump the ring when an error is logged
+    DUMP_MIN_INTERVAL_S = 300      # At most one automatic dump this often
+
+# Local Persistence (store.py - coalesced writes to the SD card)
+class Persist:
+    FLUSH_INTERVAL_S = 60          # Write changed state at most this often (shutdown always flushes)
+
+# Hardware Profile - retunes the classes above for this board, then
+# applies overrides from ~/.anamnesis-radio/config.json (hwprofile.py)
+from hwprofile import apply_profile
+PROFILE = apply_profile(globals())
@@ -0,0 +1,98 @@
+"""
+Connectivity Monitor for Anamnesis.fm Radio
+Circuit breaker around the Worker API with backoff recovery probes
+
+After a run of consecutive network failures the circuit opens: requests
+fail immediately instead of each waiting out a timeout, and the radio
+falls back to cached audio. A probe thread then checks the API with
+exponential backoff and closes the circuit on the first success.
+"""
+
+import random
+import threading
+import time
+from typing import Callable, List, Optional
+
+import requests
+
+from config import Connectivity
+from log import get_logger
+
+log = get_logger("connectivity")
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Request refused without trying because the API is known to be unreachable"""
+
+
+class ConnectivityMonitor:
+    """Consecutive-failure circuit breaker with a background recovery probe"""
+
+    def __init__(
+        self,
+        probe: Callable[[], bool],
+        failure_threshold: int = Connectivity.FAILURE_THRESHOLD,
+    ):
+        """
+        Args:
+            probe: Cheap reachability check, True if the API answered
+            failure_threshold: Consecutive failures that open the circuit
+        """
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+
+        self._failures = 0
+        self._open = False
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[bool], None]] = []
+        self._probe_thread: Optional[threading.Thread] = None
+
+    def add_listener(self, callback: Callable[[bool], None]):
+        """Call callback(online) whenever the circuit opens or closes"""
+        self._listeners.append(callback)
+
+    def is_online(self) -> bool:
+        return not self._open
+
+    def allow(self) -> bool:
+        """Whether a request should be attempted"""
+        return not self._open
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if not self._open:
+                return
+            self._open = False
+        self._notify(True)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._open or self._failures < self.failure_threshold:
+                return
+            self._open = True
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop, name="connectivity-probe", daemon=True
+            )
+            self._probe_thread.start()
+        self._notify(False)
+
+    def _notify(self, online: bool):
+        log.info("Network %s", 'restored' if online else 'unreachable - circuit open')
+        for callback in self._listeners:
+            try:
+                callback(online)
+            except Exception as e:
+                log.error("Connectivity listener error: %s", e)
+
+    def _probe_loop(self):
+        """Probe with jittered exponential backoff until the API answers"""
+        delay = Connectivity.PROBE_MIN_S
+
+        while self._open:
+            time.sleep(delay * random.uniform(0.8, 1.2))
+            if self.probe():
+                self.record_success()
+                return
+            delay = min(delay * 2, Connectivity.PROBE_MAX_S)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Local Control Socket for Anamnesis.fm Radio
+Line-based commands over a Unix socket, for poking at the running service
+
+    python3 control.py profile start
+    python3 control.py profile stop
+    python3 control.py trace
+    python3 control.py metrics
+"""
+
+import argparse
+import os
+import socket
+import socketserver
+import threading
+from typing import Callable, Dict, List
+
+from config import Profiling
+from log import get_logger
+
+log = get_logger("control")
+
+# A command takes its arguments and returns the reply text
+Command = Callable[[List[str]], str]
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(1024).decode("utf-8", errors="replace").split()
+        if not line:
+            return
+        name, args = line[0], line[1:]
+        command = self.server.commands.get(name)
+        if command is None:
+            reply = f"unknown command '{name}' (try: {', '.join(sorted(self.server.commands))})"
+        else:
+            try:
+                reply = command(args)
+            except Exception as e:
+                reply = f"error: {e}"
+        self.wfile.write((reply + "\n").encode("utf-8"))
+
+
+class ControlServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server dispatching one command per connection"""
+
+    daemon_threads = True
+
+    def __init__(self, commands: Dict[str, Command], path: str = Profiling.CONTROL_SOCKET):
+        """
+        Args:
+            commands: Command name -> handler
+            path: Socket path (a stale socket from a previous run is replaced)
+        """
+        self.commands = commands
+        self.path = path
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _ControlHandler)
+        # Owner only - the socket can start the profiler and write files
+        os.chmod(path, 0o600)
+
+    def start(self) -> "ControlServer":
+        threading.Thread(target=self.serve_forever, name="control", daemon=True).start()
+        log.info("Control socket on %s", self.path)
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def send_command(command: str, path: str = Profiling.CONTROL_SOCKET, timeout: float = 30) -> str:
+    """Send one command to a running radio and return its reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(command.encode("utf-8") + b"\n")
+        chunks = []
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b"".join(chunks).decode("utf-8").rstrip("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send a command to the running radio")
+    parser.add_argument("command", nargs="+", help="e.g. 'profile start', 'trace', 'metrics'")
+    parser.add_argument("--socket", default=Profiling.CONTROL_SOCKET, help="control socket path")
+    args = parser.parse_args()
+
+    print(send_command(" ".join(args.command), args.socket))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,21 +7,64 @@ import threading
 import time
 from typing import Callable, Optional
 
-try:
-    import RPi.GPIO as GPIO
-    GPIO_AVAILABLE = True
-except ImportError:
-    GPIO_AVAILABLE = False
-    print("Warning: RPi.GPIO not available, controls disabled")
-
-try:
-    import spidev
-    SPI_AVAILABLE = True
-except ImportError:
-    SPI_AVAILABLE = False
-    print("Warning: spidev not available, ADC disabled")
-
 from config import Pins, ADC, Timing
+from log import get_logger
+from metrics import REGISTRY
+from startup import profiler
+from tracing import tracer
+
+log = get_logger("controls")
+
+# Hardware modules are imported on first use so that importing this
+# module (and MockControls) stays cheap
+GPIO = None
+GPIO_AVAILABLE: Optional[bool] = None
+spidev = None
+SPI_AVAILABLE: Optional[bool] = None
+
+
+def _callback_time(control: str):
+    return REGISTRY.histogram(
+        "anamnesis_control_callback_seconds",
+        "Time spent in control callbacks",
+        {"control": control},
+    )
+
+
+BUTTON_TIME = _callback_time("button")
+VOLUME_TIME = _callback_time("volume")
+TUNING_TIME = _callback_time("tuning")
+PRESSES = REGISTRY.counter("anamnesis_button_presses_total", "Debounced button presses")
+
+
+def _load_gpio() -> bool:
+    """Import RPi.GPIO, returns True if available"""
+    global GPIO, GPIO_AVAILABLE
+
+    if GPIO_AVAILABLE is None:
+        try:
+            import RPi.GPIO as GPIO
+            GPIO_AVAILABLE = True
+        except ImportError:
+            GPIO_AVAILABLE = False
+            log.warning("RPi.GPIO not available, controls disabled")
+
+    return GPIO_AVAILABLE
+
+
+def _load_spi() -> bool:
+    """Import spidev, returns True if available"""
+    global spidev, SPI_AVAILABLE
+
+    if SPI_AVAILABLE is None:
+        try:
+            import spidev
+            SPI_AVAILABLE = True
+        except ImportError:
+            SPI_AVAILABLE = False
+            log.warning("spidev not available, ADC disabled")
+
+    return SPI_AVAILABLE
 
 
 class Controls:
@@ -79,7 +122,10 @@ class Controls:
 
     def _setup_gpio(self):
         """Initialize GPIO for buttons"""
-        if not GPIO_AVAILABLE:
+        with profiler.phase("controls import"):
+            available = _load_gpio()
+
+        if not available:
             return
 
         GPIO.setmode(GPIO.BCM)
@@ -143,11 +189,11 @@ class Controls:
                               callback=lambda p: self._button_callback(p, self.on_stop),
                               bouncetime=Timing.BUTTON_DEBOUNCE_MS)
 
-        print("GPIO buttons initialized (11 buttons)")
+        log.info("GPIO buttons initialized (11 buttons)")
 
     def _setup_spi(self):
         """Initialize SPI for MCP3008 ADC"""
-        if not SPI_AVAILABLE:
+        if not _load_spi():
             return
 
         try:
@@ -155,26 +201,31 @@ class Controls:
             self.spi.open(0, Pins.MCP3008_CE)  # Bus 0, CE0
             self.spi.max_speed_hz = 1000000  # 1MHz
             self.spi.mode = 0
-            print("SPI ADC initialized")
+            log.info("SPI ADC initialized")
         except Exception as e:
-            print(f"Failed to initialize SPI: {e}")
+            log.error("Failed to initialize SPI: %s", e)
             self.spi = None
 
     def _button_callback(self, pin: int, callback: Callable):
         """Handle button press with debouncing"""
-        current_time = time.time() * 1000
+        # Each edge starts a trace that follows the press through the radio
+        with tracer.activate(tracer.new_trace()):
+            with tracer.span("input.debounce", pin=pin):
+                current_time = time.time() * 1000
 
-        # Extra debounce check
-        if current_time - self._last_button_time.get(pin, 0) < Timing.BUTTON_DEBOUNCE_MS:
-            return
+                # Extra debounce check
+                if current_time - self._last_button_time.get(pin, 0) < Timing.BUTTON_DEBOUNCE_MS:
+                    return
 
-        self._last_button_time[pin] = current_time
+                self._last_button_time[pin] = current_time
+            PRESSES.inc()
 
-        # Call the callback
-        try:
-            callback()
-        except Exception as e:
-            print(f"Button callback error: {e}")
+            # Call the callback
+            try:
+                with BUTTON_TIME.time(), tracer.span("input.dispatch", control=callback.__name__):
+                    callback()
+            except Exception as e:
+                log.error("Button callback error: %s", e)
 
     def _read_adc(self, channel: int) -> int:
         """Read value from MCP3008 ADC channel (0-7)"""
@@ -193,7 +244,7 @@ class Controls:
             return value
 
         except Exception as e:
-            print(f"ADC read error: {e}")
+            log.warning("ADC read error: %s", e)
             return 0
 
     def _start_polling(self):
@@ -218,18 +269,20 @@ class Controls:
         if abs(volume - self._last_volume) > Timing.POT_CHANGE_THRESHOLD:
             self._last_volume = volume
             try:
-                self.on_volume_change(volume)
+                with VOLUME_TIME.time():
+                    self.on_volume_change(volume)
             except Exception as e:
-                print(f"Volume callback error: {e}")
+                log.error("Volume callback error: %s", e)
 
         # Read tuning pot
         tuning = self._read_adc(ADC.TUNING)
         if abs(tuning - self._last_tuning) > Timing.POT_CHANGE_THRESHOLD:
             self._last_tuning = tuning
             try:
-                self.on_tuning_change(tuning)
+                with TUNING_TIME.time():
+                    self.on_tuning_change(tuning)
             except Exception as e:
-                print(f"Tuning callback error: {e}")
+                log.error("Tuning callback error: %s", e)
 
     def get_volume(self) -> int:
         """Get current volume pot value (0-1023)"""
@@ -252,7 +305,7 @@ class Controls:
         if GPIO_AVAILABLE:
             GPIO.cleanup()
 
-        print("Controls cleaned up")
+        log.info("Controls cleaned up")
 
 
 class MockControls(Controls):
@@ -277,7 +330,7 @@ class MockControls(Controls):
         self._last_volume = 512  # Mid-point
         self._last_tuning = 512
 
-        print("Mock controls initialized (no hardware)")
+        log.info("Mock controls initialized (no hardware)")
 
     def simulate_button(self, button: str):
         """Simulate a button press for testing"""
@@ -304,7 +357,10 @@ class MockControls(Controls):
             'menu': self.on_menu,
         }
         if button.lower() in callbacks:
-            callbacks[button.lower()]()
+            callback = callbacks[button.lower()]
+            with tracer.activate(tracer.new_trace()):
+                with tracer.span("input.dispatch", control=callback.__name__):
+                    callback()
 
     def simulate_volume(self, value: int):
         """Simulate volume pot change"""
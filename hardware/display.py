@@ -7,23 +7,73 @@ import threading
 import time
 from typing import Optional
 
-try:
-    from luma.core.interface.serial import i2c
-    from luma.oled.device import ssd1306
-    from luma.core.render import canvas
-    from PIL import ImageFont, Image, ImageDraw
-    DISPLAY_AVAILABLE = True
-except ImportError:
-    DISPLAY_AVAILABLE = False
-    print("Warning: luma.oled not available, display disabled")
-
 from config import Display as DisplayConfig, Timing
+from log import get_logger
+from metrics import REGISTRY
+from models import Track
+from startup import profiler
+from tracing import tracer
+
+log = get_logger("display")
+
+# luma/PIL are imported on first use - they take a noticeable
+# fraction of a second to load on a Pi 2B
+i2c = ssd1306 = canvas = ImageFont = None
+DISPLAY_AVAILABLE: Optional[bool] = None
+
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
+
+FRAME_TIME = REGISTRY.histogram(
+    "anamnesis_display_frame_seconds", "Time to render and flush one OLED frame"
+)
+
+
+def _load_luma() -> bool:
+    """Import luma.oled and PIL, returns True if available"""
+    global i2c, ssd1306, canvas, ImageFont, DISPLAY_AVAILABLE
+
+    if DISPLAY_AVAILABLE is None:
+        try:
+            from luma.core.interface.serial import i2c
+            from luma.oled.device import ssd1306
+            from luma.core.render import canvas
+            from PIL import ImageFont
+            DISPLAY_AVAILABLE = True
+        except ImportError:
+            DISPLAY_AVAILABLE = False
+            log.warning("luma.oled not available, display disabled")
+
+    return DISPLAY_AVAILABLE
+
+
+def open_device():
+    """Open the SSD1306 over I2C, None if luma or the display is missing"""
+    if not _load_luma():
+        return None
+    try:
+        serial = i2c(port=1, address=DisplayConfig.I2C_ADDRESS)
+        device = ssd1306(
+            serial,
+            width=DisplayConfig.WIDTH,
+            height=DisplayConfig.HEIGHT,
+            rotate=DisplayConfig.ROTATION,
+        )
+        log.info("OLED display initialized (%sx%s)", DisplayConfig.WIDTH, DisplayConfig.HEIGHT)
+        return device
+    except Exception as e:
+        log.error("Failed to initialize display: %s", e)
+        return None
 
 
 class Display:
     """OLED display controller"""
 
-    def __init__(self):
+    def __init__(self, use_device: bool = True, device=None):
+        """
+        Args:
+            use_device: Set False to run headless even if an OLED is attached
+            device: luma device to draw on instead of opening the OLED
+        """
         self.device = None
         self.width = DisplayConfig.WIDTH
         self.height = DisplayConfig.HEIGHT
@@ -34,44 +84,50 @@ class Display:
         self._scroll_thread: Optional[threading.Thread] = None
         self._scroll_running = False
 
+        # Fonts load in the background once the device is up
+        self.font_large = self.font_medium = self.font_small = None
+        self._fonts_ready = threading.Event()
+
         # Try to initialize display
-        if DISPLAY_AVAILABLE:
-            try:
-                serial = i2c(port=1, address=DisplayConfig.I2C_ADDRESS)
-                self.device = ssd1306(
-                    serial,
-                    width=self.width,
-                    height=self.height,
-                    rotate=DisplayConfig.ROTATION,
-                )
-                print(f"OLED display initialized ({self.width}x{self.height})")
-            except Exception as e:
-                print(f"Failed to initialize display: {e}")
-                self.device = None
-
-        # Load fonts
-        self._load_fonts()
+        with profiler.phase("display import"):
+            available = (use_device or device is not None) and _load_luma()
+
+        if available:
+            self.device = device if device is not None else open_device()
+
+        # Nothing to render without a device, so don't pay for fonts
+        if self.device:
+            threading.Thread(target=self._load_fonts, name="fonts", daemon=True).start()
+        else:
+            self._fonts_ready.set()
 
     def _load_fonts(self):
-        """Load fonts for display"""
-        try:
-            # Try to load a nice pixel font, fall back to default
-            self.font_large = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf", 12)
-            self.font_medium = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf", 10)
-            self.font_small = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf", 8)
-        except:
-            # Fall back to default PIL font
-            self.font_large = ImageFont.load_default()
-            self.font_medium = ImageFont.load_default()
-            self.font_small = ImageFont.load_default()
+        """Load fonts for display (runs on a background thread)"""
+        with profiler.phase("display fonts"):
+            try:
+                # Try to load a nice pixel font, fall back to default
+                self.font_large = ImageFont.truetype(FONT_PATH, 12)
+                self.font_medium = ImageFont.truetype(FONT_PATH, 10)
+                self.font_small = ImageFont.truetype(FONT_PATH, 8)
+            except Exception:
+                # Fall back to default PIL font
+                self.font_large = ImageFont.load_default()
+                self.font_medium = ImageFont.load_default()
+                self.font_small = ImageFont.load_default()
+            finally:
+                self._fonts_ready.set()
 
     def _draw(self, draw_func):
         """Helper to draw on display"""
         if not self.device:
             return
 
-        with canvas(self.device) as draw:
-            draw_func(draw)
+        # Only the very first frames can get here before fonts are loaded
+        self._fonts_ready.wait(timeout=5)
+
+        with FRAME_TIME.time(), tracer.span("display.flush"):
+            with canvas(self.device) as draw:
+                draw_func(draw)
 
     def show_off(self):
         """Show powered off state (blank or subtle)"""
@@ -128,12 +184,12 @@ class Display:
         if self.device:
             threading.Timer(0.1, lambda: self.show_tuning(filters) if self._scroll_running == False else None).start()
 
-    def show_playing(self, track: dict, filters: dict, volume: int, is_paused: bool = False):
+    def show_playing(self, track: Track, filters: dict, volume: int, is_paused: bool = False,
+                     is_scanning: bool = False, is_buffering: bool = False):
         """Show now playing screen"""
-        title = track.get("title", "Unknown Track")
-        creator = track.get("creator", "Unknown Artist")
-        date = track.get("date", "")
-        year = date[:4] if date else ""
+        title = track.title or "Unknown Track"
+        creator = track.creator or "Unknown Artist"
+        year = str(track.year) if track.year else ""
 
         # Start scrolling if title is long
         if len(title) > 18:
@@ -145,7 +201,12 @@ class Display:
 
         def draw(draw):
             # Status bar at top
-            status = "PAUSED" if is_paused else "PLAYING"
+            if is_paused:
+                status = "PAUSED"
+            elif is_buffering:
+                status = "BUFFERING"
+            else:
+                status = "SCANNING" if is_scanning else "PLAYING"
             draw.text((2, 2), status, font=self.font_small, fill="white")
 
             # Volume indicator
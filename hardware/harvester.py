@@ -0,0 +1,152 @@
+"""
+Background Catalog Harvester for Anamnesis.fm Radio
+Slowly sweeps every era/location/genre combination into the catalog
+
+Runs only while the radio is idle (powered off) or during off hours,
+under a hard requests-per-hour budget. Each sweep stores the compact
+results in the catalog and records how many items the Worker returned
+for the combination, so sparse or empty stations are known before
+anyone tunes to them.
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+import requests
+
+from catalog import Catalog, Combination
+from config import ERAS, LOCATIONS, GENRES, Harvest
+from log import get_logger
+
+log = get_logger("harvester")
+
+
+def all_combinations() -> List[Combination]:
+    """Every filter combination that goes through search"""
+    return [
+        (era["query"], location["query"], genre["query"])
+        for era in ERAS
+        for location in LOCATIONS
+        # Antarctica plays Penguin Radio instead of searching
+        if location["id"] != "antarctica"
+        for genre in GENRES
+    ]
+
+
+def describe(combination: Combination) -> str:
+    """Display labels for a combination, e.g. "1940s | EUROPE | JAZZ" """
+    era, location, genre = combination
+    labels = (
+        next(e["label"] for e in ERAS if e["query"] == era),
+        next(l["label"] for l in LOCATIONS if l["query"] == location),
+        next(g["label"] for g in GENRES if g["query"] == genre),
+    )
+    return " | ".join(labels)
+
+
+def in_off_hours(hours=Harvest.OFF_HOURS, now: Optional[float] = None) -> bool:
+    start, end = hours
+    hour = time.localtime(now).tm_hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class Harvester:
+    """Budgeted background sweep of all filter combinations"""
+
+    def __init__(
+        self,
+        api,
+        catalog: Catalog,
+        is_idle: Callable[[], bool] = lambda: True,
+        requests_per_hour: float = Harvest.REQUESTS_PER_HOUR,
+    ):
+        """
+        Args:
+            api: AnamnesisAPI used for the Worker searches
+            catalog: Catalog that receives results and combination counts
+            is_idle: True while harvesting won't compete with playback
+            requests_per_hour: Hard request budget
+        """
+        self.api = api
+        self.catalog = catalog
+        self.is_idle = is_idle
+        self.interval_s = 3600 / requests_per_hour
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Harvester":
+        self._thread = threading.Thread(target=self._run, name="harvester", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def next_combination(self) -> Optional[Combination]:
+        """Never-harvested combinations first, then the stalest one due a refresh"""
+        harvested = self.catalog.harvested_combinations()
+        due_before = time.time() - Harvest.REFRESH_AFTER_S
+
+        stalest, stalest_at = None, due_before
+        for combination in all_combinations():
+            if combination not in harvested:
+                return combination
+            _, harvested_at = harvested[combination]
+            if harvested_at < stalest_at:
+                stalest, stalest_at = combination, harvested_at
+        return stalest
+
+    def report(self) -> str:
+        """Sweep progress and the sparse combinations found so far"""
+        harvested = self.catalog.harvested_combinations()
+        total = len(all_combinations())
+        sparse = sorted(
+            (results, describe(combination))
+            for combination, (results, _) in harvested.items()
+            if results < Harvest.SPARSE_THRESHOLD
+        )
+        lines = [f"harvested {len(harvested)}/{total} stations, {len(sparse)} sparse"]
+        lines.extend(f"  {results:3d}  {label}" for results, label in sparse)
+        return "\n".join(lines)
+
+    def harvest(self, combination: Combination) -> int:
+        """
+        Search one combination and record its result count
+
+        Raises:
+            requests.RequestException: On network or HTTP errors
+        """
+        era, location, genre = combination
+        items = self.api.search_remote(era, location, genre, exclude_recent=False, endpoint="harvest")
+        self.catalog.record_combination(combination, len(items))
+
+        if len(items) < Harvest.SPARSE_THRESHOLD:
+            log.warning("Sparse station: %s -> %s results", describe(combination), len(items))
+        return len(items)
+
+    def _run(self):
+        wait_s = self.interval_s
+        failures = 0
+
+        # Every pass through the loop spends at most one request
+        while not self._stop.wait(wait_s):
+            wait_s = self.interval_s
+            if not (self.is_idle() or in_off_hours()):
+                continue
+
+            combination = self.next_combination()
+            if combination is None:
+                continue
+
+            try:
+                self.harvest(combination)
+                failures = 0
+            except requests.RequestException as e:
+                failures += 1
+                log.warning("Harvest of %s failed: %s", describe(combination), e)
+                # Back off exponentially, never faster than the budget
+                wait_s = max(self.interval_s, min(self.interval_s * 2 ** failures, Harvest.MAX_BACKOFF_S))
@@ -0,0 +1,152 @@
+"""
+Play History for Anamnesis.fm Radio
+Persistent log of played tracks with a Bloom filter for repeat checks
+
+Plays are appended to a JSON-lines store log with their time and the filters
+they were played under. Identifiers played inside the repeat window are
+loaded into a Bloom filter, so dropping repeats from search results is
+a few hash probes per item and nothing has to go into request URLs.
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+from typing import List, Optional
+
+from config import History, State
+from store import open_store
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set (no false negatives, rare false positives)"""
+
+    def __init__(self, capacity: int, error_rate: float = History.BLOOM_ERROR_RATE):
+        """
+        Args:
+            capacity: Expected number of members
+            error_rate: Target false positive rate at capacity
+        """
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Kirsch-Mitzenmacher: k positions from two halves of one digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class PlayHistory:
+    """Append-only play log plus a repeat filter over the recent window"""
+
+    def __init__(self, path: Optional[str] = None, window_s: float = History.REPEAT_WINDOW_S):
+        """
+        Args:
+            path: History file (default under State.DIR)
+            window_s: Tracks played within this many seconds count as recent
+        """
+        self.path = path or os.path.join(State.DIR, History.FILE)
+        self.window_s = window_s
+        self._log = open_store(os.path.dirname(self.path)).log(os.path.basename(self.path))
+
+        self._entries: List[dict] = []
+        self._lock = threading.Lock()
+        self._recent = BloomFilter(0)
+        self._recent_count = 0  # Plays added to the filter (past capacity -> rebuild larger)
+        self._recent_until = 0.0
+
+        self._load()
+
+    def _load(self):
+        self._entries = [
+            entry for entry in self._log
+            if isinstance(entry, dict) and isinstance(entry.get("id"), str)
+            and isinstance(entry.get("t"), (int, float))
+        ]
+
+        if len(self._entries) > History.MAX_ENTRIES:
+            self._entries = self._entries[-History.MAX_ENTRIES:]
+            self._log.rewrite(self._entries)
+
+        self._rebuild_filter()
+
+    def _rebuild_filter(self):
+        """Rebuild the Bloom filter from plays still inside the window"""
+        now = time.time()
+        cutoff = now - self.window_s
+        recent = [entry for entry in self._entries if entry["t"] >= cutoff]
+
+        bloom = BloomFilter(max(len(recent) * 2, History.BLOOM_MIN_CAPACITY))
+        for entry in recent:
+            bloom.add(entry["id"])
+
+        self._recent = bloom
+        self._recent_count = len(recent)
+        # Entries age out of the window - rebuild once the oldest has
+        self._recent_until = (recent[0]["t"] + self.window_s) if recent else math.inf
+
+    def record(self, identifier: str, filters: Optional[dict] = None):
+        """
+        Log a play
+
+        Args:
+            identifier: Track identifier
+            filters: Era/location/genre queries it was played under
+        """
+        entry = {"id": identifier, "t": round(time.time(), 1)}
+        if filters:
+            entry.update({k: v for k, v in filters.items() if v})
+
+        with self._lock:
+            self._entries.append(entry)
+            # Window was empty - this play is now the first to age out
+            self._recent_until = min(self._recent_until, entry["t"] + self.window_s)
+            self._recent_count += 1
+            if self._recent_count > self._recent.capacity:
+                # Past capacity the false positive rate climbs fast - resize
+                self._rebuild_filter()
+            else:
+                self._recent.add(identifier)
+            self._log.append(entry)
+
+            if len(self._entries) > History.MAX_ENTRIES * 2:
+                self._entries = self._entries[-History.MAX_ENTRIES:]
+                self._log.rewrite(self._entries)
+
+    @property
+    def recent(self) -> BloomFilter:
+        """Membership filter of identifiers played within the window"""
+        if time.time() >= self._recent_until:
+            with self._lock:
+                self._rebuild_filter()
+        return self._recent
+
+    def was_played_recently(self, identifier: str) -> bool:
+        return identifier in self.recent
+
+    def filter_recent(self, tracks: list) -> list:
+        """Drop Tracks played within the window"""
+        recent = self.recent
+        return [track for track in tracks if track.identifier not in recent]
+
+    def least_recent_first(self, tracks: list) -> list:
+        """Tracks never played first, then those played longest ago"""
+        with self._lock:
+            last_played = {entry["id"]: entry["t"] for entry in self._entries}
+        return sorted(tracks, key=lambda track: last_played.get(track.identifier, 0.0))
+
+    def __len__(self) -> int:
+        return len(self._entries)
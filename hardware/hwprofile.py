@@ -0,0 +1,215 @@
+"""
+Hardware Profile for Anamnesis.fm Radio
+Tunes buffers, caches, pools and refresh rates to the board it runs on
+
+config.py's values are sized for the Pi 2B the radio was built around.
+At the end of config.py, apply_profile() probes the board, RAM, CPU
+count and storage, picks the closest profile and writes its values over
+those defaults. Overrides from ~/.anamnesis-radio/config.json are
+applied last, so a local file always has the final say:
+
+    {
+        "profile": "small",
+        "Audio": {"CACHE_SECS": 20},
+        "Timing": {"POT_SAMPLE_INTERVAL_MS": 80}
+    }
+
+Settings tied to mpv's readahead (DERIVED) then follow Audio.CACHE_SECS
+unless the local file sets them.
+
+This module must not import config - config imports it.
+"""
+
+import json
+import os
+import shutil
+from typing import Dict, List, NamedTuple, Optional
+
+MiB = 1024 ** 2
+GiB = 1024 ** 3
+
+MODEL_PATHS = ("/proc/device-tree/model", "/sys/firmware/devicetree/base/model")
+OVERRIDES_FILE = "config.json"  # Under State.DIR
+
+# Share of the SD card the offline audio cache may use (when enabled)
+STORAGE_FRACTION = 0.2
+
+# Section -> setting -> value. "standard" is config.py as written.
+PROFILES: Dict[str, Dict[str, Dict[str, object]]] = {
+    # Pi Zero / 512MB boards: small buffers, fewer threads, slower refresh
+    "small": {
+        "Audio": {"CACHE_SECS": 10, "DEMUXER_MAX_BYTES": "16MiB", "STREAM_BUFFER_SIZE": "256KiB"},
+        "Timing": {"POT_SAMPLE_INTERVAL_MS": 150, "DISPLAY_SCROLL_SPEED_MS": 200},
+        "Processes": {"ENGINE_WORKERS": 2, "FLUSH_INTERVAL_S": 0.04},
+        "Transport": {"POOL_MAXSIZE": 4, "HEDGE_WORKERS": 2},
+        "Tuning": {"WARM_SLOTS": 4},
+        "Tracing": {"BUFFER_SIZE": 1024},
+        "Logging": {"RING_SIZE": 500},
+    },
+    # Pi 2B / 3B
+    "standard": {},
+    # Pi 4 / Pi 5: deeper buffers, more warm stations, snappier controls
+    "large": {
+        "Audio": {"CACHE_SECS": 30, "DEMUXER_MAX_BYTES": "150MiB", "STREAM_BUFFER_SIZE": "4MiB"},
+        "Timing": {"POT_SAMPLE_INTERVAL_MS": 50, "DISPLAY_SCROLL_SPEED_MS": 100},
+        "Processes": {"ENGINE_WORKERS": 8, "FLUSH_INTERVAL_S": 0.01},
+        "Transport": {"POOL_MAXSIZE": 16},
+        "Scheduler": {"MIN_QUEUE": 3},
+        "Tuning": {"WARM_RADIUS": 2, "WARM_SLOTS": 16},
+        "Tracing": {"BUFFER_SIZE": 16384},
+        "Logging": {"RING_SIZE": 10000},
+    },
+}
+
+
+# Settings that follow mpv's readahead, unless set in the local file
+DERIVED = {
+    ("Scheduler", "MARGIN_S"): lambda config: config["Audio"].CACHE_SECS + 5.0,
+    ("Watchdog", "STALL_S"): lambda config: config["Audio"].CACHE_SECS + 5,
+}
+
+
+class Hardware(NamedTuple):
+    board: str
+    ram_bytes: int
+    cpus: int
+    disk_bytes: Optional[int]   # Size of the filesystem holding State.DIR
+    free_bytes: Optional[int]
+
+
+class Profile(NamedTuple):
+    name: str
+    hardware: Hardware
+    overrides: List[str]        # "Section.SETTING" names set from the local file
+
+    def summary(self) -> str:
+        hw = self.hardware
+        parts = [f"{self.name} ({hw.board}, {hw.ram_bytes / GiB:.1f}GiB RAM, {hw.cpus} CPUs"]
+        if hw.free_bytes is not None:
+            parts.append(f", {hw.free_bytes / GiB:.1f}GiB free")
+        parts.append(")")
+        if self.overrides:
+            parts.append(f", local overrides: {', '.join(self.overrides)}")
+        return "".join(parts)
+
+
+def _read_model() -> str:
+    for path in MODEL_PATHS:
+        try:
+            with open(path, "rb") as f:
+                return f.read().rstrip(b"\0\n").decode(errors="replace")
+        except OSError:
+            continue
+    return "unknown board"
+
+
+def _read_ram() -> int:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 1 * GiB  # Assume a Pi 2B
+
+
+def _nearest_existing(path: str) -> str:
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def probe(state_dir: str) -> Hardware:
+    """Detect the board, RAM, CPU count and storage"""
+    try:
+        usage = shutil.disk_usage(_nearest_existing(state_dir))
+        disk, free = usage.total, usage.free
+    except OSError:
+        disk = free = None
+    return Hardware(
+        board=_read_model(),
+        ram_bytes=_read_ram(),
+        cpus=os.cpu_count() or 1,
+        disk_bytes=disk,
+        free_bytes=free,
+    )
+
+
+def choose(hardware: Hardware) -> str:
+    """Profile name for this hardware"""
+    if hardware.ram_bytes < 768 * MiB or hardware.cpus < 2:
+        return "small"
+    if hardware.ram_bytes >= 1.5 * GiB and hardware.cpus >= 4:
+        return "large"
+    return "standard"
+
+
+def load_overrides(state_dir: str) -> dict:
+    path = os.path.join(state_dir, OVERRIDES_FILE)
+    try:
+        with open(path) as f:
+            overrides = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Ignoring {path}: {e}")
+        return {}
+    if not isinstance(overrides, dict):
+        print(f"Ignoring {path}: expected a JSON object")
+        return {}
+    return overrides
+
+
+def _apply(namespace: dict, settings: Dict[str, Dict[str, object]], source: str) -> List[str]:
+    """Set Section.SETTING values on config's classes, returns what was set"""
+    applied = []
+    for section, values in settings.items():
+        target = namespace.get(section)
+        if not isinstance(target, type) or not isinstance(values, dict):
+            print(f"Unknown config section in {source}: {section}")
+            continue
+        for key, value in values.items():
+            if not hasattr(target, key):
+                print(f"Unknown config setting in {source}: {section}.{key}")
+                continue
+            setattr(target, key, value)
+            applied.append(f"{section}.{key}")
+    return applied
+
+
+def apply_profile(namespace: dict) -> Profile:
+    """
+    Tune config's classes for this hardware, then apply local overrides
+
+    Args:
+        namespace: config module globals
+
+    Returns:
+        The profile in effect
+    """
+    state_dir = namespace["State"].DIR
+    hardware = probe(state_dir)
+    overrides = load_overrides(state_dir)
+
+    name = overrides.pop("profile", None) or choose(hardware)
+    if name not in PROFILES:
+        print(f"Unknown hardware profile {name!r}, choosing automatically")
+        name = choose(hardware)
+    _apply(namespace, PROFILES[name], f"profile {name}")
+
+    # Don't let the offline cache take over a small SD card
+    if hardware.disk_bytes:
+        cache = namespace["AudioCache"]
+        cache.MAX_BYTES = min(cache.MAX_BYTES, int(hardware.disk_bytes * STORAGE_FRACTION))
+
+    applied = _apply(namespace, overrides, OVERRIDES_FILE)
+
+    for (section, key), derive in DERIVED.items():
+        if f"{section}.{key}" not in applied:
+            setattr(namespace[section], key, derive(namespace))
+
+    return Profile(name=name, hardware=hardware, overrides=applied)
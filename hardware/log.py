@@ -0,0 +1,196 @@
+"""
+Structured Logging for Anamnesis.fm Radio
+Level-filtered records into a ring buffer, written to the journal in batches
+
+Records are kept unformatted - message, %-style args and key=value
+fields - and only turned into text when written out, so a debug call
+on a hot path costs a level check, or a tuple and a deque append.
+Everything at LEVEL or above stays in memory (a flight recorder that
+can be dumped on error, SIGHUP or the control socket); JOURNAL_LEVEL
+and above is written to stdout, one batch per FLUSH_INTERVAL_S, once
+start() has been called. Before that (CLI tools, the simulator) lines
+are written straight away, like print().
+
+Usage:
+    from log import get_logger
+    log = get_logger("radio")
+    log.info("Playing: %s", title, queue=len(queue))
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from config import Logging
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARN", ERROR: "ERROR"}
+# sd-daemon priority prefixes, understood by journald on stdout
+PRIORITIES = {DEBUG: "<7>", INFO: "<6>", WARNING: "<4>", ERROR: "<3>"}
+
+
+def _render(record: tuple) -> str:
+    """Record -> 'name: message key=value'"""
+    _, _, name, msg, args, fields = record
+    if args:
+        try:
+            msg = msg % args
+        except (TypeError, ValueError):
+            msg = f"{msg} {args!r}"
+    if fields:
+        msg += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+    return f"{name}: {msg}"
+
+
+def _timestamp(wall: float) -> str:
+    return time.strftime("%H:%M:%S", time.localtime(wall)) + f".{int(wall % 1 * 1000):03d}"
+
+
+class LogRing:
+    """Ring buffer of log records plus the batched journal writer"""
+
+    def __init__(
+        self,
+        capacity: int = Logging.RING_SIZE,
+        level: str = Logging.LEVEL,
+        journal_level: str = Logging.JOURNAL_LEVEL,
+    ):
+        # deque.append is atomic, so emitting needs no lock
+        self._records: deque = deque(maxlen=capacity)
+        self._pending: deque = deque()
+        self.level = LEVELS[level]
+        self.journal_level = LEVELS[journal_level]
+
+        # journald sets JOURNAL_STREAM when stdout is connected to it
+        self._journal = bool(os.environ.get("JOURNAL_STREAM"))
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._running = False
+        self._dump_requested: Optional[str] = None
+        self._last_auto_dump = 0.0
+
+    def emit(self, level: int, name: str, msg: str, args: tuple, fields: Dict[str, object]):
+        record = (time.time(), level, name, msg, args, fields)
+        self._records.append(record)
+
+        if level >= self.journal_level:
+            if self._running:
+                self._pending.append(record)
+                if len(self._pending) >= Logging.FLUSH_BATCH:
+                    self._wake.set()
+            else:
+                self._write([record])
+
+        if level >= ERROR and Logging.DUMP_ON_ERROR and self._running:
+            now = time.monotonic()
+            if now - self._last_auto_dump >= Logging.DUMP_MIN_INTERVAL_S:
+                self._last_auto_dump = now
+                self.request_dump()
+
+    # === Journal ===
+
+    def format(self, record: tuple) -> str:
+        wall, level = record[0], record[1]
+        if self._journal:
+            return PRIORITIES[level] + _render(record)
+        return f"{_timestamp(wall)} {LEVEL_NAMES[level]:<5} {_render(record)}"
+
+    def _write(self, records):
+        text = "".join(self.format(record) + "\n" for record in records)
+        with self._write_lock:
+            try:
+                sys.stdout.write(text)
+                sys.stdout.flush()
+            except (OSError, ValueError):
+                pass  # stdout gone (closed pipe) - the ring still has them
+
+    def start(self):
+        """Batch journal writes on a background thread from now on"""
+        if not self._running:
+            self._running = True
+            threading.Thread(target=self._run, name="log-writer", daemon=True).start()
+            atexit.register(self.flush)
+        return self
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(Logging.FLUSH_INTERVAL_S)
+            self._wake.clear()
+            self.flush()
+            path = self._dump_requested
+            if path:
+                self._dump_requested = None
+                self.dump(path)
+
+    def flush(self):
+        """Write out everything waiting for the journal"""
+        batch = []
+        while self._pending:
+            batch.append(self._pending.popleft())
+        if batch:
+            self._write(batch)
+
+    def stop(self):
+        self._running = False
+        self.flush()
+
+    # === Dumps ===
+
+    def request_dump(self, path: str = Logging.DUMP_PATH):
+        """Dump the ring from the writer thread (safe from signal handlers)"""
+        self._dump_requested = path
+        self._wake.set()
+
+    def dump(self, path: str = Logging.DUMP_PATH) -> int:
+        """
+        Write every record in the ring (debug included) to a file
+
+        Returns:
+            Number of records written
+        """
+        records = list(self._records)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for record in records:
+                f.write(f"{_timestamp(record[0])} {LEVEL_NAMES[record[1]]:<5} {_render(record)}\n")
+        os.replace(tmp_path, path)
+        self._write([(time.time(), INFO, "log", "Wrote %d records to %s", (len(records), path), None)])
+        return len(records)
+
+
+class Logger:
+    """Named front end onto the shared ring"""
+
+    __slots__ = ("name", "_ring")
+
+    def __init__(self, name: str, ring: LogRing):
+        self.name = name
+        self._ring = ring
+
+    def debug(self, msg: str, *args, **fields):
+        if DEBUG >= self._ring.level:
+            self._ring.emit(DEBUG, self.name, msg, args, fields)
+
+    def info(self, msg: str, *args, **fields):
+        if INFO >= self._ring.level:
+            self._ring.emit(INFO, self.name, msg, args, fields)
+
+    def warning(self, msg: str, *args, **fields):
+        if WARNING >= self._ring.level:
+            self._ring.emit(WARNING, self.name, msg, args, fields)
+
+    def error(self, msg: str, *args, **fields):
+        if ERROR >= self._ring.level:
+            self._ring.emit(ERROR, self.name, msg, args, fields)
+
+
+RING = LogRing()
+
+
+def get_logger(name: str) -> Logger:
+    return Logger(name, RING)
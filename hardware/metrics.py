@@ -0,0 +1,249 @@
+"""
+Metrics for Anamnesis.fm Radio
+Counters, gauges and fixed-bucket histograms with a Prometheus endpoint
+
+Metrics are created once (get-or-create by name and labels) and updated
+from hot paths; updates are an index lookup and an add on preallocated
+arrays under an uncontended lock.
+"""
+
+import json
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from log import get_logger
+
+log = get_logger("metrics")
+
+# Seconds - covers fast callbacks through slow searches
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(key: LabelKey, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name: str, key: LabelKey) -> List[str]:
+        return [f"{name}{_format_labels(key)} {self.value}"]
+
+
+class Gauge:
+    """Value that can go up and down (plain assignment is atomic)"""
+
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self, name: str, key: LabelKey) -> List[str]:
+        return [f"{name}{_format_labels(key)} {self.value}"]
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts live in a preallocated array"""
+
+    kind = "histogram"
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # Last slot is the +Inf bucket
+        self.counts = array("Q", [0] * (len(self.buckets) + 1))
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> "_Timer":
+        """Context manager that observes the elapsed seconds"""
+        return _Timer(self)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket containing it"""
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for index, n in enumerate(self.counts):
+            running += n
+            if running >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def samples(self, name: str, key: LabelKey) -> List[str]:
+        lines = []
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            running += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            bucket_labels = _format_labels(key, 'le="%s"' % le)
+            lines.append(f"{name}_bucket{bucket_labels} {running}")
+        lines.append(f"{name}_sum{_format_labels(key)} {self.sum}")
+        lines.append(f"{name}_count{_format_labels(key)} {self.count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Registry:
+    """All metrics, keyed by name and labels"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Tuple[str, Dict[LabelKey, object]]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help_text: str, labels: Optional[Dict[str, str]], *args):
+        key = _label_key(labels)
+        family = self._metrics.get(name)
+        if family is not None and key in family[1]:
+            return family[1][key]
+
+        with self._lock:
+            family = self._metrics.setdefault(name, (help_text, {}))
+            metric = family[1].get(key)
+            if metric is None:
+                metric = family[1][key] = cls(*args)
+            return metric
+
+    def counter(self, name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._get(Counter, name, help_text, labels)
+
+    def gauge(self, name: str, help_text: str = "", labels: Optional[Dict[str, str]] = None) -> Gauge:
+        return self._get(Gauge, name, help_text, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str = "",
+        labels: Optional[Dict[str, str]] = None,
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._get(Histogram, name, help_text, labels, buckets)
+
+    def exposition(self) -> str:
+        """Prometheus text format"""
+        lines = []
+        for name, (help_text, family) in sorted(self._metrics.items()):
+            metrics = list(family.items())
+            if not metrics:
+                continue
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metrics[0][1].kind}")
+            for key, metric in metrics:
+                lines.extend(metric.samples(name, key))
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One compact line for the journal"""
+        parts = []
+        for name, (_, family) in sorted(self._metrics.items()):
+            short = name.replace("anamnesis_", "")
+            for key, metric in family.items():
+                label = short + ("[" + ",".join(v for _, v in key) + "]" if key else "")
+                if isinstance(metric, Histogram):
+                    if metric.count:
+                        p50 = metric.quantile(0.5)
+                        p95 = metric.quantile(0.95)
+                        parts.append(f"{label} n={metric.count} p50<={p50:g} p95<={p95:g}")
+                elif metric.value:
+                    parts.append(f"{label}={metric.value:g}")
+        return "metrics: " + ("; ".join(parts) if parts else "(none)")
+
+
+# Shared registry for the whole radio
+REGISTRY = Registry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body = REGISTRY.exposition().encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        elif path == "/trace.json":
+            # Span ring buffer as Chrome trace JSON
+            from tracing import tracer
+            body = json.dumps(tracer.chrome_trace(), separators=(",", ":")).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would flood the journal
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics (and /trace.json) on localhost in a background thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    log.info("Metrics endpoint on http://%s:%s/metrics", host, port)
+    return server
+
+
+def start_summary_logger(interval_s: float) -> threading.Thread:
+    """Log REGISTRY.summary() every interval_s seconds"""
+
+    def loop():
+        while True:
+            time.sleep(interval_s)
+            log.info("%s", REGISTRY.summary())
+
+    thread = threading.Thread(target=loop, name="metrics-summary", daemon=True)
+    thread.start()
+    return thread
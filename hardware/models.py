@@ -0,0 +1,146 @@
+"""
+Track Model for Anamnesis.fm Radio
+Compact playback-only view of search results
+
+Search responses carry description/subject blobs that can run to
+kilobytes per item; nothing after the search needs them. parse_tracks()
+projects each item down to a slotted Track as the JSON is decoded, so
+the raw dicts are dropped one at a time instead of living on in the
+queue.
+"""
+
+import json
+import re
+from typing import Callable, List, Optional, Union
+
+
+def parse_year(value) -> Optional[int]:
+    """First four-digit year in a date/year field (string, number or list)"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and len(value) == 4 and value.isdigit():
+        return int(value)
+    match = re.search(r"\d{4}", str(value or ""))
+    return int(match.group()) if match else None
+
+
+def parse_duration(value) -> Optional[float]:
+    """archive.org file length ("1834.5" or "30:34" / "1:02:03") in seconds"""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, str) and ":" in value:
+            seconds = 0.0
+            for part in value.split(":"):
+                seconds = seconds * 60 + float(part)
+            return seconds
+        return float(value) or None
+    except ValueError:
+        return None
+
+
+def parse_size(value) -> Optional[int]:
+    """archive.org file size (a string of bytes)"""
+    try:
+        return int(value) or None
+    except (TypeError, ValueError):
+        return None
+
+
+def as_text(value) -> Optional[str]:
+    """Flatten archive.org string-or-list fields"""
+    if isinstance(value, list):
+        value = ", ".join(str(v) for v in value)
+    return str(value) if value is not None else None
+
+
+class Track:
+    """One playable item - search result fields plus resolved stream info"""
+
+    __slots__ = (
+        "identifier", "title", "creator", "year", "soundcloud_id",
+        "stream_url", "duration", "size",
+    )
+
+    def __init__(
+        self,
+        identifier: str,
+        title: Optional[str] = None,
+        creator: Optional[str] = None,
+        year: Optional[int] = None,
+        soundcloud_id: Optional[int] = None,
+        stream_url: Optional[str] = None,
+        duration: Optional[float] = None,
+        size: Optional[int] = None,
+    ):
+        self.identifier = identifier
+        self.title = title
+        self.creator = creator
+        self.year = year
+        self.soundcloud_id = soundcloud_id
+        self.stream_url = stream_url
+        self.duration = duration
+        self.size = size
+
+    @classmethod
+    def from_dict(cls, item: dict) -> "Track":
+        """Build from an API item or a stored dict, ignoring unknown fields"""
+        return cls(
+            identifier=item.get("identifier") or f"soundcloud-{item.get('soundcloudId')}",
+            title=as_text(item.get("title")),
+            creator=as_text(item.get("creator")),
+            year=parse_year(item.get("year") or item.get("date")),
+            soundcloud_id=item.get("soundcloudId"),
+            stream_url=item.get("streamUrl"),
+            duration=parse_duration(item.get("duration")),
+            size=parse_size(item.get("size")),
+        )
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form using the API's field names (None fields left out)"""
+        item = {
+            "identifier": self.identifier,
+            "title": self.title,
+            "creator": self.creator,
+            "year": self.year,
+            "soundcloudId": self.soundcloud_id,
+            "streamUrl": self.stream_url,
+            "duration": self.duration,
+            "size": self.size,
+        }
+        return {k: v for k, v in item.items() if v is not None}
+
+    @property
+    def is_local(self) -> bool:
+        """Stream is a file in the offline audio cache"""
+        return bool(self.stream_url) and self.stream_url.startswith("/")
+
+    def __repr__(self) -> str:
+        return f"Track({self.identifier!r}, {self.title!r})"
+
+
+def parse_tracks(text: Union[str, bytes], on_item: Optional[Callable[[dict], None]] = None) -> List[Track]:
+    """
+    Decode a search/penguin-radio response body into Tracks
+
+    Each item is projected to a Track inside the decoder's object hook,
+    so its full dict is garbage as soon as it has been seen.
+
+    Args:
+        text: Response body ({"items": [...], ...}), str or UTF-8 bytes
+        on_item: Optional callback given each raw item first (e.g. to index it)
+
+    Returns:
+        Tracks in response order
+    """
+    def hook(obj: dict):
+        if "identifier" in obj or "soundcloudId" in obj:
+            if on_item is not None:
+                on_item(obj)
+            return Track.from_dict(obj)
+        return obj
+
+    data = json.loads(text, object_hook=hook)
+    return [item for item in data.get("items", []) if isinstance(item, Track)]
@@ -0,0 +1,469 @@
+"""
+Multi-process Mode for Anamnesis.fm Radio
+Runs input, display rendering and the network engine in their own processes
+
+On a single-core Pi 2B a slow PIL frame or a large search response
+holds the GIL long enough to delay button handling and pot polling.
+In this mode the Radio controller stays in the main process as
+coordinator and talks to:
+
+- input:  Controls (GPIO/ADC), plus flushing finished frames to the OLED
+- render: Display drawing into a shared-memory framebuffer
+- engine: AnamnesisAPI, catalog and play history (requests, JSON, SQLite)
+
+Control events and engine calls go over pipes; frames go through shared
+memory. Each side gets a stand-in with the same interface as the object
+it replaces, so Radio itself is unchanged.
+"""
+
+import atexit
+import functools
+import itertools
+import multiprocessing
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import Display as DisplayConfig, Processes
+from log import get_logger
+
+log = get_logger("multiproc")
+
+# Controls callbacks, in the order Controls takes them
+CONTROL_CALLBACKS = (
+    "on_power", "on_play", "on_stop", "on_prev", "on_next", "on_skip",
+    "on_era", "on_location", "on_genre", "on_info", "on_menu",
+    "on_volume_change", "on_tuning_change",
+)
+
+
+# === Shared Framebuffer ===
+
+class FrameBuffer:
+    """One 1-bit frame in shared memory, guarded by a sequence counter"""
+
+    HEADER = struct.Struct("<I")
+
+    def __init__(self, width: int = DisplayConfig.WIDTH, height: int = DisplayConfig.HEIGHT):
+        self.width = width
+        self.height = height
+        self.frame_bytes = width * height // 8
+        self._shm = shared_memory.SharedMemory(create=True, size=self.HEADER.size + self.frame_bytes)
+        self.HEADER.pack_into(self._shm.buf, 0, 0)
+
+    def write(self, frame: bytes):
+        """Publish a frame (PIL mode "1" bytes) - single writer only"""
+        buf = self._shm.buf
+        seq = self.HEADER.unpack_from(buf)[0]
+        # Odd while the frame is half-written
+        self.HEADER.pack_into(buf, 0, seq + 1)
+        buf[self.HEADER.size:self.HEADER.size + self.frame_bytes] = frame[:self.frame_bytes]
+        self.HEADER.pack_into(buf, 0, seq + 2)
+
+    def read(self, last_seq: int) -> Optional[Tuple[int, bytes]]:
+        """
+        Latest frame if it changed since last_seq
+
+        Returns:
+            (sequence, frame bytes), or None if unchanged or mid-write
+        """
+        buf = self._shm.buf
+        seq = self.HEADER.unpack_from(buf)[0]
+        if seq == last_seq or seq & 1:
+            return None
+        frame = bytes(buf[self.HEADER.size:self.HEADER.size + self.frame_bytes])
+        if self.HEADER.unpack_from(buf)[0] != seq:
+            return None  # Overwritten while copying - next poll gets it
+        return seq, frame
+
+    def close(self, unlink: bool = False):
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+# === Render Process ===
+
+def _render_main(conn, framebuffer: FrameBuffer):
+    """Draw Display calls into the framebuffer"""
+    from display import Display, _load_luma
+
+    class FrameBufferDisplay(Display):
+        def _draw(self, draw_func):
+            super()._draw(draw_func)
+            if self.device:
+                framebuffer.write(self.device.image.tobytes())
+
+    device = None
+    if _load_luma():
+        from luma.core.device import dummy
+        device = dummy(width=framebuffer.width, height=framebuffer.height, mode="1")
+    display = FrameBufferDisplay(use_device=False, device=device)
+
+    while True:
+        try:
+            message = conn.recv()
+            # Only the newest screen matters - skip any that queued up behind it
+            while message[0] != "stop" and conn.poll():
+                message = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        method, args, kwargs = message
+        if method == "stop":
+            break
+        try:
+            getattr(display, method)(*args, **kwargs)
+        except Exception as e:
+            log.error("Render error in %s: %s", method, e)
+
+
+class RemoteDisplay:
+    """Display stand-in that forwards every call to the render process"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def forward(*args, **kwargs):
+            with self._lock:
+                self._conn.send((name, args, kwargs))
+        return forward
+
+    def stop(self):
+        with self._lock:
+            self._conn.send(("stop", (), {}))
+
+
+# === Input Process ===
+
+def _input_main(conn, framebuffer: FrameBuffer):
+    """Poll buttons and pots, and push new frames to the OLED"""
+    from controls import Controls
+    from display import open_device
+
+    lock = threading.Lock()
+
+    def sender(name: str) -> Callable:
+        def send(*args):
+            with lock:
+                conn.send(("control", name, args))
+        return send
+
+    controls = Controls(**{name: sender(name) for name in CONTROL_CALLBACKS})
+    oled = open_device()
+    if oled is not None:
+        from PIL import Image
+
+    stopped = threading.Event()
+
+    def listen():
+        try:
+            while conn.recv()[0] != "stop":
+                pass
+        except (EOFError, OSError):
+            pass
+        stopped.set()
+
+    threading.Thread(target=listen, name="input-listen", daemon=True).start()
+
+    last_seq = 0
+    while not stopped.wait(Processes.FLUSH_INTERVAL_S):
+        frame = framebuffer.read(last_seq)
+        if frame is None or oled is None:
+            continue
+        last_seq, data = frame
+        try:
+            oled.display(Image.frombytes("1", (framebuffer.width, framebuffer.height), data))
+        except Exception as e:
+            log.warning("OLED flush error: %s", e)
+
+    controls.cleanup()
+
+
+class RemoteControls:
+    """Controls stand-in fed by events from the input process"""
+
+    def __init__(self, conn, process, **callbacks: Callable):
+        """
+        Args:
+            conn: Pipe end connected to the input process
+            process: The input process (joined on cleanup)
+            **callbacks: Same callbacks Controls takes
+        """
+        self._conn = conn
+        self._process = process
+        self._callbacks = callbacks
+        self._volume = 0
+        self._tuning = 0
+
+        threading.Thread(target=self._listen, name="controls-listen", daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                _, name, args = self._conn.recv()
+            except (EOFError, OSError):
+                return
+
+            if name == "on_volume_change":
+                self._volume = args[0]
+            elif name == "on_tuning_change":
+                self._tuning = args[0]
+
+            try:
+                self._callbacks[name](*args)
+            except Exception as e:
+                log.error("Control callback error in %s: %s", name, e)
+
+    def get_volume(self) -> int:
+        return self._volume
+
+    def get_tuning(self) -> int:
+        return self._tuning
+
+    def cleanup(self):
+        try:
+            self._conn.send(("stop",))
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(timeout=2)
+
+
+# === Engine Process ===
+
+def _engine_main(conn):
+    """Serve API, catalog and history calls from the coordinator"""
+    from api import AnamnesisAPI
+    from catalog import open_catalog
+    from history import PlayHistory
+    import store
+
+    history = PlayHistory()
+    # History is written from this process - the coordinator's flusher can't see it
+    store.start_flusher()
+    catalog = open_catalog()
+    api = AnamnesisAPI(catalog=catalog, history=history)
+    targets = {"api": api, "catalog": catalog, "history": history}
+
+    lock = threading.Lock()
+
+    def send(message: tuple):
+        with lock:
+            conn.send(message)
+
+    def handle(call_id: int, target: str, method: str, args: tuple, kwargs: dict):
+        try:
+            result = getattr(targets[target], method)(*args, **kwargs)
+        except Exception as e:
+            send(("result", call_id, False, (type(e), str(e))))
+            return
+        try:
+            send(("result", call_id, True, result))
+        except Exception as e:
+            # Result didn't pickle
+            send(("result", call_id, False, (RuntimeError, f"{method}: {e}")))
+
+    api.connectivity.add_listener(lambda online: send(("event", "online", online)))
+    send(("ready", catalog is not None))
+
+    with ThreadPoolExecutor(Processes.ENGINE_WORKERS, thread_name_prefix="engine") as pool:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "stop":
+                break
+            pool.submit(handle, *message[1:])
+
+    store.flush_all()
+    if catalog is not None:
+        catalog.close()
+
+
+class _EngineClient:
+    """Calls into the engine process and waits for the replies"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, list] = {}
+        self._listeners: Dict[str, List[Callable]] = {}
+        self._ready = threading.Event()
+        self.has_catalog = False
+
+        threading.Thread(target=self._listen, name="engine-listen", daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                break
+
+            kind = message[0]
+            if kind == "result":
+                _, call_id, ok, value = message
+                slot = self._pending.pop(call_id, None)
+                if slot is not None:
+                    slot[1:] = [ok, value]
+                    slot[0].set()
+            elif kind == "event":
+                for listener in self._listeners.get(message[1], []):
+                    listener(message[2])
+            elif kind == "ready":
+                self.has_catalog = message[1]
+                self._ready.set()
+
+        # Engine gone - fail anything still waiting
+        for slot in list(self._pending.values()):
+            slot[1:] = [False, (RuntimeError, "engine process exited")]
+            slot[0].set()
+
+    def wait_ready(self, timeout: float) -> bool:
+        return self._ready.wait(timeout)
+
+    def on_event(self, name: str, listener: Callable):
+        self._listeners.setdefault(name, []).append(listener)
+
+    def call(self, target: str, method: str, *args, **kwargs):
+        call_id = next(self._ids)
+        slot = [threading.Event(), False, None]
+        self._pending[call_id] = slot
+        with self._lock:
+            self._conn.send(("call", call_id, target, method, args, kwargs))
+
+        if not slot[0].wait(Processes.CALL_TIMEOUT_S):
+            self._pending.pop(call_id, None)
+            raise TimeoutError(f"engine call {target}.{method} timed out")
+
+        _, ok, value = slot
+        if ok:
+            return value
+        error_type, message = value
+        try:
+            error = error_type(message)
+        except Exception:
+            error = RuntimeError(f"{error_type.__name__}: {message}")
+        raise error
+
+    def stop(self):
+        with self._lock:
+            self._conn.send(("stop",))
+
+
+class RemoteObject:
+    """Forwards method calls to an object living in the engine process"""
+
+    def __init__(self, client: _EngineClient, target: str):
+        self._client = client
+        self._target = target
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return functools.partial(self._client.call, self._target, name)
+
+
+class RemoteConnectivity:
+    """ConnectivityMonitor stand-in driven by the engine's online/offline events"""
+
+    def __init__(self, client: _EngineClient):
+        self._online = True
+        self._listeners: List[Callable[[bool], None]] = []
+        client.on_event("online", self._on_change)
+
+    def _on_change(self, online: bool):
+        self._online = online
+        for listener in self._listeners:
+            try:
+                listener(online)
+            except Exception as e:
+                log.warning("Connectivity listener error: %s", e)
+
+    def add_listener(self, listener: Callable[[bool], None]):
+        self._listeners.append(listener)
+
+    def is_online(self) -> bool:
+        return self._online
+
+
+class RemoteAPI(RemoteObject):
+    """AnamnesisAPI stand-in - same calls, run in the engine process"""
+
+    def __init__(self, client: _EngineClient):
+        super().__init__(client, "api")
+        self.catalog = RemoteObject(client, "catalog") if client.has_catalog else None
+        self.connectivity = RemoteConnectivity(client)
+
+
+# === Startup ===
+
+class Workers:
+    """The three child processes and the stand-ins Radio is built with"""
+
+    def __init__(self):
+        ctx = multiprocessing.get_context("fork")
+        self.framebuffer = FrameBuffer()
+
+        render_conn, render_child = ctx.Pipe()
+        input_conn, input_child = ctx.Pipe()
+        engine_conn, engine_child = ctx.Pipe()
+
+        self.processes = [
+            ctx.Process(target=_render_main, args=(render_child, self.framebuffer), name="render", daemon=True),
+            ctx.Process(target=_input_main, args=(input_child, self.framebuffer), name="input", daemon=True),
+            ctx.Process(target=_engine_main, args=(engine_child,), name="engine", daemon=True),
+        ]
+        for process in self.processes:
+            process.start()
+        log.info("Started processes: %s", ', '.join(f'{p.name}={p.pid}' for p in self.processes))
+
+        self._engine = _EngineClient(engine_conn)
+        if not self._engine.wait_ready(Processes.START_TIMEOUT_S):
+            log.warning("Engine process slow to start, catalog disabled")
+
+        self.display = RemoteDisplay(render_conn)
+        self.controls_class = functools.partial(RemoteControls, input_conn, self.processes[1])
+        self.api = RemoteAPI(self._engine)
+        self.history = RemoteObject(self._engine, "history")
+
+        self._stopped = False
+        atexit.register(self.stop)
+
+    def radio_kwargs(self) -> dict:
+        """Keyword arguments for Radio()"""
+        return {
+            "display": self.display,
+            "controls_class": self.controls_class,
+            "api": self.api,
+            "history": self.history,
+        }
+
+    def stop(self):
+        """Stop the render and engine processes and free the framebuffer"""
+        if self._stopped:
+            return
+        self._stopped = True
+
+        for stop in (self.display.stop, self._engine.stop):
+            try:
+                stop()
+            except (BrokenPipeError, OSError):
+                pass
+
+        deadline = time.monotonic() + 2
+        for process in self.processes:
+            process.join(timeout=max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        self.framebuffer.close(unlink=True)
@@ -4,24 +4,97 @@ Anamnesis.fm Physical Radio Controller
 Main entry point for the Raspberry Pi radio
 """
 
+from startup import profiler
+
+import argparse
 import time
 import signal
 import sys
 import threading
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 
-from config import ERAS, LOCATIONS, GENRES, Timing, Volume
+from config import ERAS, LOCATIONS, GENRES, Timing, Volume, State, Metrics, Tracing, Profiling, Processes
+from config import Logging
+from config import Scan, Scheduler as SchedulerConfig, Tuning, PROFILE
 from display import Display
 from controls import Controls
 from audio import AudioPlayer
-from api import AnamnesisAPI
+from state import StateSnapshot
+from models import Track, as_text, parse_duration, parse_size, parse_year
+from audio_cache import AudioCache, cache_key
+from history import PlayHistory
+from scheduler import PlaybackScheduler
+from stations import STATIONS, WarmQueues, neighbours, station_at
+from clock import Clock
+from watchdog import PlaybackWatchdog, sd_notify
+import metrics
+from log import RING as LOG_RING, get_logger
+from metrics import REGISTRY
+from tracing import tracer
+from sampler import sampler
+import store
+
+log = get_logger("radio")
+
+
+TTFA = REGISTRY.histogram(
+    "anamnesis_time_to_first_audio_seconds", "Power-on press to audible playback"
+)
+QUEUE_DEPTH = REGISTRY.gauge("anamnesis_queue_depth", "Tracks waiting in the queue")
+SCAN_SWITCH = REGISTRY.histogram(
+    "anamnesis_scan_switch_seconds", "Scan mode switch to the next excerpt playing"
+)
+
+
+def excerpt_for(track: Track) -> Tuple[float, Optional[Tuple[int, int]]]:
+    """
+    Where a scan excerpt of a track starts, and its bytes if they can be cut out
+
+    Returns:
+        (start seconds, (first, end) byte range or None)
+    """
+    start_s = track.duration * Scan.POSITION if track.duration else Scan.DEFAULT_OFFSET_S
+    if track.size and track.duration and track.stream_url.lower().endswith(".mp3"):
+        # Average bitrate is close enough for VBR - the decoder resyncs on the next frame
+        bytes_per_s = track.size / track.duration
+        first = int(start_s * bytes_per_s)
+        return start_s, (first, first + int(Scan.EXCERPT_S * bytes_per_s))
+    return start_s, None
 
 
 class Radio:
     """Main radio controller that coordinates all components"""
 
-    def __init__(self):
-        print("Initializing Anamnesis.fm Radio...")
+    def __init__(
+        self,
+        display: Optional[Display] = None,
+        controls_class: Callable[..., Controls] = Controls,
+        audio_class: Callable[..., AudioPlayer] = AudioPlayer,
+        api=None,
+        clock: Optional[Clock] = None,
+        snapshot: Optional[StateSnapshot] = None,
+        audio_cache: Optional[AudioCache] = None,
+        history: Optional[PlayHistory] = None,
+    ):
+        """
+        Args:
+            display: Display to drive (default: real OLED)
+            controls_class: Controls or MockControls
+            audio_class: AudioPlayer or MockAudioPlayer
+            api: API client (default: AnamnesisAPI)
+            clock: Time/timer/thread source (default: real time)
+            snapshot: Warm-boot snapshot store (default: ~/.anamnesis-radio)
+            audio_cache: Offline audio cache (default: ~/.anamnesis-radio/audio)
+            history: Play history (default: ~/.anamnesis-radio/history.jsonl)
+        """
+        log.info("Initializing Anamnesis.fm Radio...")
+        log.info("Hardware profile: %s", PROFILE.summary())
+
+        self.clock = clock or Clock()
+        self._controls_class = controls_class
+        self._audio_class = audio_class
 
         # State
         self.powered_on = False
@@ -33,22 +106,135 @@ class Radio:
         self.location_index = 0
         self.genre_index = 0
 
+        # Tuning dial station (None = era button decides)
+        self.station_index: Optional[int] = None
+        self._tune_timer = None
+        self._last_tuned: Optional[float] = None  # Monotonic time the dial last changed station
+
         # Current track info
-        self.current_track: Optional[dict] = None
-        self.queue: list = []
+        self.current_track: Optional[Track] = None
+        self.current_stream_url: Optional[str] = None
+        self.queue: List[Track] = []
+
+        # Refill/resolve/preload timing
+        self.scheduler = PlaybackScheduler()
+        self._refilling = False
+        self._resolving: Optional[Track] = None
+        self._queued_url: Optional[str] = None
+        self._last_schedule_time = 0.0
+
+        # Scan mode - (monotonic time, track seconds) the current excerpt started at
+        self.scan_mode = False
+        self._scan_started: Optional[Tuple[float, float]] = None
+        self._scan_timer = None
 
         # Volume (0-100)
         self.volume = Volume.DEFAULT
 
         # Retune debounce
-        self._retune_timer: Optional[threading.Timer] = None
+        self._retune_timer = None
+
+        # Power-on pipeline
+        self._power_generation = 0
+        self.power_on_ttfa: deque = deque(maxlen=20)  # Time to first audio (s)
+        self._ttfa_pressed_at: Optional[float] = None  # Power-on press awaiting its first audio
 
         # Display mode (for INFO/MENU buttons)
         self.display_mode = 0  # 0=normal, 1=extended info, 2=filters only
 
-        # Initialize components
-        self.display = Display()
-        self.controls = Controls(
+        # Initialize components - display first so the unit looks alive,
+        # then audio and the API client (the slow imports) in parallel
+        with profiler.phase("display"):
+            self.display = display or Display()
+            self.display.show_off()
+
+        # Needed by the API client to leave out recent plays
+        self.history = history if history is not None else PlayHistory()
+
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="init") as pool:
+            audio_future = pool.submit(self._init_audio)
+            api_future = pool.submit(self._init_api) if api is None else None
+            self.audio = audio_future.result()
+            self.api = api_future.result() if api_future else api
+
+        # Connect DNS/TLS while the user is still reaching for STANDBY
+        self._warmup_thread = threading.Thread(
+            target=self._warm_up_network, name="warmup", daemon=True
+        )
+        self._warmup_thread.start()
+
+        # Warm-boot snapshot
+        self.snapshot = snapshot or StateSnapshot()
+        self._last_snapshot_time = 0.0
+
+        # Played tracks are kept locally for when the network drops
+        # Idle by intent, not mpv's state - a stall must never look idle
+        self.audio_cache = audio_cache if audio_cache is not None else AudioCache(
+            is_idle=lambda: not self.powered_on or not (self.is_playing or self.is_loading)
+        )
+        connectivity = getattr(self.api, "connectivity", None)
+        if connectivity is not None:
+            connectivity.add_listener(self._on_connectivity_change)
+
+        # Ready queues for the stations either side of the dial
+        self.warm_queues = WarmQueues(
+            fetch=lambda filters: self.api.search(**filters),
+            resolve=self._resolve_stream,
+            spawn=lambda func, *args: self.clock.spawn(tracer.bind(func), *args, name="warm"),
+            monotonic=self.clock.monotonic,
+        )
+
+        # Local control socket and catalog harvester (started in run())
+        self._control = None
+        self.harvester = None
+
+        # Stuck-playback recovery, mildest first (started in run())
+        self.watchdog = PlaybackWatchdog(
+            self.clock,
+            expecting=self._expecting_audio,
+            state=lambda: self.audio.state if self.audio.player else None,
+            recoveries=[
+                ("reconnect", self._reconnect_stream),
+                ("skip", self._play_next),
+                ("recreate mpv", self._recreate_audio),
+            ],
+        )
+
+        # Controls last - callbacks may fire as soon as GPIO is armed
+        with profiler.phase("controls"):
+            self.controls = self._init_controls()
+
+        # Set initial volume
+        self.audio.set_volume(self.volume)
+
+        log.info("Radio initialized!")
+
+    def _init_audio(self) -> AudioPlayer:
+        """Create the audio player (imports python-mpv)"""
+        with profiler.phase("audio"):
+            return self._audio_class(
+                on_track_end=self._on_track_end,
+                on_error=self._on_error,
+                on_stall=self._on_stall,
+                on_rebuffer=self._on_rebuffer,
+                on_first_audio=self._on_first_audio,
+            )
+
+    def _init_api(self):
+        """Create the API client (imports requests)"""
+        with profiler.phase("api"):
+            from api import AnamnesisAPI
+            from catalog import open_catalog
+            return AnamnesisAPI(catalog=open_catalog(), history=self.history)
+
+    def _warm_up_network(self):
+        """Pre-connect to the API in the background"""
+        with profiler.phase("network warm-up"):
+            self.api.warm_up()
+
+    def _init_controls(self) -> Controls:
+        """Create the hardware controls and wire up callbacks"""
+        return self._controls_class(
             on_power=self._on_power,       # STANDBY
             on_play=self._on_play,         # SOURCE
             on_stop=self._on_stop,         # TIMER
@@ -63,37 +249,37 @@ class Radio:
             on_volume_change=self._on_volume_change,
             on_tuning_change=self._on_tuning_change,
         )
-        self.audio = AudioPlayer(
-            on_track_end=self._on_track_end,
-            on_error=self._on_error,
-        )
-        self.api = AnamnesisAPI()
-
-        # Set initial volume
-        self.audio.set_volume(self.volume)
-
-        # Setup signal handlers for clean shutdown
-        signal.signal(signal.SIGINT, self._shutdown)
-        signal.signal(signal.SIGTERM, self._shutdown)
-
-        print("Radio initialized!")
 
-    def _get_current_filters(self) -> dict:
-        """Get current filter settings as API parameters"""
-        era = ERAS[self.era_index]
+    def _get_current_filters(self, station_index: Optional[int] = None) -> dict:
+        """
+        Get current filter settings as API parameters
+
+        Args:
+            station_index: Dial station to use instead of the tuned one
+        """
+        if station_index is None:
+            station_index = self.station_index
+        if station_index is not None:
+            era_query = STATIONS[station_index].era
+        else:
+            era_query = ERAS[self.era_index]["query"]
         location = LOCATIONS[self.location_index]
         genre = GENRES[self.genre_index]
 
         return {
-            "era": era["query"],
+            "era": era_query,
             "location": location["query"],
             "genre": genre["query"],
         }
 
     def _get_filter_labels(self) -> dict:
         """Get current filter labels for display"""
+        if self.station_index is not None:
+            era_label = STATIONS[self.station_index].label
+        else:
+            era_label = ERAS[self.era_index]["label"]
         return {
-            "era": ERAS[self.era_index]["label"],
+            "era": era_label,
             "location": LOCATIONS[self.location_index]["label"],
             "genre": GENRES[self.genre_index]["label"],
         }
@@ -103,18 +289,31 @@ class Radio:
     def _on_power(self):
         """Handle power button press"""
         self.powered_on = not self.powered_on
-        print(f"Power: {'ON' if self.powered_on else 'OFF'}")
+        log.info("Power: %s", 'ON' if self.powered_on else 'OFF')
+
+        # Invalidates any power-on pipeline still in flight
+        self._power_generation += 1
+        self._ttfa_pressed_at = None
 
         if self.powered_on:
             self.display.show_startup()
-            time.sleep(1)
-            self._update_display()
-            # Auto-play on power on
-            self._start_playback()
+            # Auto-play on power on - runs while the splash is showing
+            self.clock.spawn(
+                tracer.bind(self._power_on_pipeline),
+                self._power_generation,
+                self.clock.monotonic(),
+            )
+            self.clock.call_later(
+                Timing.STARTUP_SPLASH_S,
+                tracer.bind(self._end_splash),
+                self._power_generation,
+            )
         else:
+            self.scan_mode = False
             self.audio.stop()
             self.is_playing = False
             self.current_track = None
+            self.current_stream_url = None
             self.queue = []
             self.display.show_off()
 
@@ -124,11 +323,11 @@ class Radio:
             return
 
         if self.is_playing:
-            print("Pausing...")
+            log.info("Pausing...")
             self.audio.pause()
             self.is_playing = False
         else:
-            print("Playing...")
+            log.info("Playing...")
             self.audio.resume()
             self.is_playing = True
 
@@ -139,25 +338,32 @@ class Radio:
         if not self.powered_on:
             return
 
-        print("Stopping...")
+        log.info("Stopping...")
         self.audio.stop()
         self.is_playing = False
         self.current_track = None
+        self.current_stream_url = None
         self.queue = []
         self._update_display()
 
     def _on_prev(self):
-        """Handle previous button (not implemented - no history)"""
+        """Handle previous button (4) - toggle scan mode"""
         if not self.powered_on:
             return
-        print("Previous (no history available)")
+
+        self.scan_mode = not self.scan_mode
+        log.info("Scan: %s", 'ON' if self.scan_mode else 'OFF')
+        if self.scan_mode:
+            self._play_next()
+        else:
+            self._stay_on_excerpt()
 
     def _on_next(self):
         """Handle next button (5) - skip to next track"""
         if not self.powered_on:
             return
 
-        print("Skipping to next...")
+        log.info("Skipping to next...")
         self._play_next()
 
     def _on_skip(self):
@@ -171,7 +377,7 @@ class Radio:
             if pos is not None and dur is not None:
                 new_pos = min(pos + 30, dur - 1)
                 self.audio.player.seek(new_pos, reference='absolute')
-                print(f"Skipped to {new_pos:.0f}s")
+                log.debug("Skipped to %.0fs", new_pos)
 
     def _on_info(self):
         """Handle INFO button - toggle extended track info display"""
@@ -180,7 +386,7 @@ class Radio:
 
         # Toggle between normal and extended info display
         self.display_mode = 1 if self.display_mode != 1 else 0
-        print(f"Display mode: {'extended' if self.display_mode == 1 else 'normal'}")
+        log.debug("Display mode: %s", 'extended' if self.display_mode == 1 else 'normal')
         self._update_display()
 
     def _on_menu(self):
@@ -191,7 +397,7 @@ class Radio:
         # Cycle through display modes: normal -> extended -> filters -> normal
         self.display_mode = (self.display_mode + 1) % 3
         modes = ['normal', 'extended info', 'filters only']
-        print(f"Display mode: {modes[self.display_mode]}")
+        log.debug("Display mode: %s", modes[self.display_mode])
         self._update_display()
 
     def _on_era(self):
@@ -200,7 +406,9 @@ class Radio:
             return
 
         self.era_index = (self.era_index + 1) % len(ERAS)
-        print(f"Era: {ERAS[self.era_index]['label']}")
+        # Back to whole decades until the dial is turned again
+        self.station_index = None
+        log.info("Era: %s", ERAS[self.era_index]['label'])
         self._schedule_retune()
         self._update_display()
 
@@ -210,7 +418,7 @@ class Radio:
             return
 
         self.location_index = (self.location_index + 1) % len(LOCATIONS)
-        print(f"Location: {LOCATIONS[self.location_index]['label']}")
+        log.info("Location: %s", LOCATIONS[self.location_index]['label'])
         self._schedule_retune()
         self._update_display()
 
@@ -220,7 +428,7 @@ class Radio:
             return
 
         self.genre_index = (self.genre_index + 1) % len(GENRES)
-        print(f"Genre: {GENRES[self.genre_index]['label']}")
+        log.info("Genre: %s", GENRES[self.genre_index]['label'])
         self._schedule_retune()
         self._update_display()
 
@@ -239,24 +447,116 @@ class Radio:
         if not self.powered_on:
             return
 
-        # Map tuning pot to fine-tune within current era
-        # For now, could scroll through era sub-ranges
-        # This is a placeholder for more advanced tuning behavior
-        pass
+        index = station_at(value)
+        if index == self.station_index:
+            return
+
+        self.station_index = index
+        self.era_index = STATIONS[index].era_index
+        self._last_tuned = self.clock.monotonic()
+        log.info("Tuned: %s", STATIONS[index].label)
+
+        # Wait for the dial to settle rather than opening every station it passes
+        if self._tune_timer:
+            self._tune_timer.cancel()
+        self._tune_timer = self.clock.call_later(
+            Tuning.SETTLE_MS / 1000,
+            tracer.bind(self._tune_in)
+        )
+
+    def _tune_in(self):
+        """Switch to the dial's station, instantly if its queue is warm"""
+        if not self.powered_on:
+            return
+
+        if self._retune_timer:
+            self._retune_timer.cancel()
+
+        warm = self.warm_queues.take(self._get_current_filters())
+        if warm is None or self._is_offline():
+            self._retune()
+        else:
+            log.debug("Warm station: %s tracks ready", len(warm))
+            self.audio.stop()
+            self.queue = warm
+            self.is_loading = False
+            self._play_next()
+
+        self._warm_stations()
+
+    def _warm_stations(self):
+        """Keep the stations next to the dial ready to play while it's in use"""
+        if not self.powered_on or self._is_offline():
+            return
+        # A dial at rest costs no requests - its first turn goes to the network
+        if self._last_tuned is None or self.clock.monotonic() - self._last_tuned > Tuning.WARM_ACTIVE_S:
+            return
+        if LOCATIONS[self.location_index]["id"] == "antarctica":
+            return  # Penguin Radio ignores the era
+
+        center = self.station_index
+        if center is None:
+            center = station_at(self.controls.get_tuning())
+        nearby = neighbours(center)
+        if self.station_index is None:
+            nearby.insert(0, center)
+
+        self.warm_queues.warm(self._get_current_filters(index) for index in nearby)
 
     # === Audio Callbacks ===
 
     def _on_track_end(self):
         """Called when current track finishes"""
-        print("Track ended, playing next...")
+        log.info("Track ended, playing next...")
         self._play_next()
 
     def _on_error(self, error: str):
         """Called on playback error"""
-        print(f"Playback error: {error}")
+        log.warning("Playback error: %s", error)
         # Try next track
         self._play_next()
 
+    def _on_first_audio(self):
+        """Called when a newly opened stream is first heard - closes out power-on"""
+        pressed_at, self._ttfa_pressed_at = self._ttfa_pressed_at, None
+        if pressed_at is None:
+            return
+        ttfa = self.clock.monotonic() - pressed_at
+        self.power_on_ttfa.append(ttfa)
+        TTFA.observe(ttfa)
+        log.info("Time to first audio: %.0fms", ttfa * 1000)
+
+    def _on_stall(self):
+        """Called (on mpv's event thread) when playback stops to wait for the network"""
+        # Rendering and the SPI flush would hold up mpv's later events
+        self.clock.spawn(tracer.bind(self._update_display))
+
+    def _on_rebuffer(self, stalled_s: float):
+        """Called (on mpv's event thread) when playback carries on after a stall"""
+        self.clock.spawn(tracer.bind(self._update_display))
+
+    def _expecting_audio(self) -> bool:
+        """Whether audio should be coming out right now"""
+        return (
+            self.powered_on
+            and self.is_playing
+            and not self.is_loading
+            and self.current_stream_url is not None
+        )
+
+    def _reconnect_stream(self):
+        """Reopen the current stream where it stalled"""
+        position = self.audio.state.position
+        log.info("Reconnecting stream at %.0fs", position or 0)
+        self.audio.play(self.current_stream_url, start=position)
+
+    def _recreate_audio(self):
+        """Start a fresh mpv and carry on with the current stream"""
+        position = self.audio.state.position
+        self.audio.recreate()
+        if self.current_stream_url:
+            self.audio.play(self.current_stream_url, start=position)
+
     # === Playback Logic ===
 
     def _schedule_retune(self):
@@ -264,15 +564,14 @@ class Radio:
         if self._retune_timer:
             self._retune_timer.cancel()
 
-        self._retune_timer = threading.Timer(
+        self._retune_timer = self.clock.call_later(
             Timing.RETUNE_DEBOUNCE_MS / 1000,
-            self._retune
+            tracer.bind(self._retune)
         )
-        self._retune_timer.start()
 
     def _retune(self):
         """Clear queue and fetch new tracks with current filters"""
-        print("Retuning radio...")
+        log.info("Retuning radio...")
         self.is_loading = True
         self._update_display()
 
@@ -280,52 +579,208 @@ class Radio:
         self.audio.stop()
         self.is_playing = False
         self.current_track = None
+        self.current_stream_url = None
         self.queue = []
 
         # Start fresh
         self._start_playback()
 
+    def _station_is_empty(self) -> bool:
+        """True if the harvester found nothing for the current filters"""
+        catalog = getattr(self.api, "catalog", None)
+        if catalog is None or LOCATIONS[self.location_index]["id"] == "antarctica":
+            return False
+
+        filters = self._get_current_filters()
+        combination = (filters["era"], filters["location"], filters["genre"])
+        return catalog.combination_results(combination) == 0 and catalog.count(**filters) == 0
+
     def _start_playback(self):
         """Start playback - fetch tracks and play"""
+        if not self._is_offline() and self._station_is_empty():
+            # Known dead station - say so instead of searching again
+            log.info("No tracks found (known empty station)")
+            self.is_loading = False
+            self.display.show_error("No tracks here")
+            return
+
         self.is_loading = True
         self._update_display()
 
         # Fetch tracks in background
-        thread = threading.Thread(target=self._fetch_and_play)
-        thread.daemon = True
-        thread.start()
+        self.clock.spawn(tracer.bind(self._fetch_and_play))
+
+    def _fetch_tracks(self) -> list:
+        """Fetch a batch of tracks for the current filters"""
+        if self._is_offline():
+            return self._offline_tracks()
+
+        filters = self._get_current_filters()
+        location = LOCATIONS[self.location_index]
+
+        # Check for Antarctica easter egg
+        if location["id"] == "antarctica":
+            log.info("Penguin Radio mode!")
+            tracks = self.api.get_penguin_radio()
+        else:
+            tracks = self.api.search(**filters)
+
+        if not tracks and self._is_offline():
+            # This fetch is what tripped the circuit breaker
+            return self._offline_tracks()
+        return tracks
+
+    # === Offline Fallback ===
+
+    def _is_offline(self) -> bool:
+        connectivity = getattr(self.api, "connectivity", None)
+        return connectivity is not None and not connectivity.is_online()
+
+    def _offline_tracks(self) -> list:
+        """Cached tracks, closest to the current filters first"""
+        exclude = cache_key(self.current_track) if self.current_track else None
+        tracks = self.audio_cache.tracks(**self._get_current_filters(), exclude=exclude)
+        log.info("Offline: %s cached tracks available", len(tracks))
+        return tracks
+
+    def _on_connectivity_change(self, online: bool):
+        """Switch between streaming and cached audio"""
+        if not self.powered_on:
+            return
+
+        if online:
+            # Let the cached track finish; what follows streams again
+            self.queue = [t for t in self.queue if not t.is_local]
+        else:
+            # Queued network tracks can't be resolved or streamed now
+            self.queue = [t for t in self.queue if t.is_local]
+
+        # Sitting at "No tracks found" - try again with the other source
+        if self.current_track is None and not self.is_loading:
+            self._start_playback()
+
+    def _resolve_stream(self, track: Track) -> Optional[str]:
+        """
+        Resolve the stream URL for a track
+
+        Archive.org tracks need a metadata lookup; the result is cached
+        on the track so it's only fetched once.
+
+        Returns:
+            Stream URL, or None if the item has no playable audio
+        """
+        if track.stream_url:
+            return track.stream_url
+
+        if track.soundcloud_id:
+            # Penguin Radio track
+            stream_url = self.api.get_soundcloud_stream_url(track.soundcloud_id)
+        else:
+            # Archive.org track - need to get metadata first
+            metadata = self.api.get_metadata(track.identifier)
+            if not metadata or not metadata.get("audioFiles"):
+                return None
+
+            audio_file = metadata["audioFiles"][0]
+            stream_url = self.api.get_stream_url(track.identifier, audio_file["name"])
+            # Update track with full metadata
+            track.title = as_text(metadata.get("title")) or track.title
+            track.creator = as_text(metadata.get("creator"))
+            track.year = parse_year(metadata.get("date")) or track.year
+            track.duration = parse_duration(audio_file.get("duration"))
+            track.size = parse_size(audio_file.get("size"))
+
+        track.stream_url = stream_url
+        return stream_url
+
+    def _power_on_pipeline(self, generation: int, pressed_at: float):
+        """
+        Search, resolve and open the first track while the splash shows
+
+        The stream is opened paused so that it can start the moment the
+        splash ends. Time-to-first-audio is recorded when mpv's first
+        frame is actually heard (see _on_first_audio).
+        """
+        self.is_loading = True
+        track = None
+
+        try:
+            tracks = self._fetch_tracks()
+            if generation != self._power_generation:
+                return
+            self.queue = tracks
+
+            while self.queue and generation == self._power_generation:
+                candidate = self.queue.pop(0)
+                stream_url = self._resolve_stream(candidate)
+                if stream_url:
+                    track = candidate
+                    break
+                log.info("No audio files found, skipping...")
+
+            if track and generation == self._power_generation:
+                self.current_track = track
+                self.current_stream_url = track.stream_url
+                log.info("Playing: %s", track.title or 'Unknown')
+                self.audio.preload(track.stream_url)
+                self._on_track_started(track)
+
+        except Exception as e:
+            log.error("Error during power-on: %s", e)
+
+        # Never cut the splash short
+        remaining = pressed_at + Timing.STARTUP_SPLASH_S - self.clock.monotonic()
+        if remaining > 0:
+            self.clock.sleep(remaining)
+
+        # Powered off (or on again) while we were working
+        if generation != self._power_generation:
+            return
+
+        self.is_loading = False
+
+        if track:
+            self._ttfa_pressed_at = pressed_at
+            self.audio.resume()
+            self.is_playing = True
+            self._schedule_ahead()
+        else:
+            log.info("No tracks found")
+
+        self._update_display()
+
+    def _end_splash(self, generation: int):
+        """Switch from the splash to the tuning screen if still loading"""
+        if generation == self._power_generation and self.is_loading:
+            self._update_display()
 
     def _fetch_and_play(self):
         """Fetch tracks from API and start playing"""
         try:
-            filters = self._get_current_filters()
-            location = LOCATIONS[self.location_index]
-
-            # Check for Antarctica easter egg
-            if location["id"] == "antarctica":
-                print("Penguin Radio mode!")
-                tracks = self.api.get_penguin_radio()
-            else:
-                tracks = self.api.search(**filters)
+            tracks = self._fetch_tracks()
 
             if tracks:
                 self.queue = tracks
                 self.is_loading = False
                 self._play_next()
             else:
-                print("No tracks found")
+                log.info("No tracks found")
                 self.is_loading = False
                 self._update_display()
 
         except Exception as e:
-            print(f"Error fetching tracks: {e}")
+            log.warning("Error fetching tracks: %s", e)
             self.is_loading = False
             self._update_display()
 
     def _play_next(self):
         """Play next track from queue"""
+        if self.scan_mode:
+            self._scan_next()
+            return
+
         if not self.queue:
-            print("Queue empty, fetching more...")
+            log.info("Queue empty, fetching more...")
             self._start_playback()
             return
 
@@ -333,55 +788,186 @@ class Radio:
         track = self.queue.pop(0)
         self.current_track = track
 
-        print(f"Playing: {track.get('title', 'Unknown')}")
+        log.info("Playing: %s", track.title or 'Unknown')
 
         # Get stream URL
-        if track.get("soundcloudId"):
-            # Penguin Radio track
-            stream_url = self.api.get_soundcloud_stream_url(track["soundcloudId"])
-        else:
-            # Archive.org track - need to get metadata first
-            metadata = self.api.get_metadata(track["identifier"])
-            if metadata and metadata.get("audioFiles"):
-                audio_file = metadata["audioFiles"][0]["name"]
-                stream_url = self.api.get_stream_url(track["identifier"], audio_file)
-                # Update track with full metadata
-                self.current_track["title"] = metadata.get("title", track.get("title"))
-                self.current_track["creator"] = metadata.get("creator")
-                self.current_track["date"] = metadata.get("date")
-            else:
-                print("No audio files found, skipping...")
-                self._play_next()
-                return
+        stream_url = self._resolve_stream(track)
+        if not stream_url:
+            log.info("No audio files found, skipping...")
+            self._play_next()
+            return
 
         # Play it
+        self.current_stream_url = stream_url
         self.audio.play(stream_url)
         self.is_playing = True
+        self._on_track_started(track)
+        QUEUE_DEPTH.set(len(self.queue))
+        self._update_display()
+
+        self._schedule_ahead()
+
+    def _scan_next(self):
+        """Audition the next queued track from partway in"""
+        if self._scan_timer:
+            self._scan_timer.cancel()
+            self._scan_timer = None
+
+        if not self.queue:
+            log.info("Queue empty, fetching more...")
+            self._start_playback()
+            return
+
+        switched_at = self.clock.monotonic()
+        track = self.queue.pop(0)
+        if not self._resolve_stream(track):
+            log.info("No audio files found, skipping...")
+            self._scan_next()
+            return
+
+        start_s, byte_range = excerpt_for(track)
+        self.current_track = track
+        self.current_stream_url = track.stream_url
+        self._scan_started = (self.clock.monotonic(), start_s)
+        log.debug("Scanning: %s from %.0fs", track.title or 'Unknown', start_s)
+
+        self.audio.play(track.stream_url, start=None if byte_range else start_s, byte_range=byte_range)
+        self.is_playing = True
+        switch_s = self.clock.monotonic() - switched_at
+        SCAN_SWITCH.observe(switch_s)
+        log.debug("Scan switch: %.0fms", switch_s * 1000)
+        QUEUE_DEPTH.set(len(self.queue))
+        self._update_display()
+
+        # Ranged excerpts end at their own EOF - the timer covers whole
+        # streams, and servers that ignore the end of the range
+        excerpt_s = Scan.EXCERPT_S if byte_range is None else Scan.EXCERPT_S + Scan.EOF_GRACE_S
+        self._scan_timer = self.clock.call_later(excerpt_s, tracer.bind(self._end_excerpt), track)
+        self.clock.spawn(tracer.bind(self._prepare_next_excerpt))
+
+    def _end_excerpt(self, track: Track):
+        """Timer for excerpts that can't end at their own EOF"""
+        if self.scan_mode and self.current_track is track:
+            self._scan_next()
+
+    def _prepare_next_excerpt(self):
+        """Resolve the next track and hand mpv its excerpt while this one plays"""
+        if not self.queue:
+            self._schedule_ahead()
+            return
+
+        track = self.queue[0]
+        try:
+            if not self._resolve_stream(track):
+                if track in self.queue:
+                    self.queue.remove(track)
+                return
+        except Exception as e:
+            log.warning("Error resolving next excerpt: %s", e)
+            return
+
+        _, byte_range = excerpt_for(track)
+        if byte_range and self.scan_mode and self.queue and self.queue[0] is track:
+            self.audio.queue_next(track.stream_url, byte_range=byte_range)
+
+    def _stay_on_excerpt(self):
+        """Leave scan mode on the current track, carrying on from the excerpt"""
+        if self._scan_timer:
+            self._scan_timer.cancel()
+            self._scan_timer = None
+
+        track = self.current_track
+        if track is None or not self.current_stream_url or not self._scan_started:
+            return
+
+        started_at, start_s = self._scan_started
+        position = start_s + self.clock.monotonic() - started_at
+        log.info("Staying on %s at %.0fs", track.title or 'Unknown', position)
+        # The excerpt was a byte range - reopen the whole stream there
+        self.audio.play(self.current_stream_url, start=position)
+        self.is_playing = True
+        self._on_track_started(track)
         self._update_display()
+        self._schedule_ahead()
+
+    def _on_track_started(self, track: Track):
+        """Log the play and keep a copy for offline use"""
+        filters = self._get_current_filters()
+        self.history.record(track.identifier, filters)
+        self.audio_cache.add(track, filters)
+        self.scheduler.observe_duration(track.duration)
+
+    def _remaining_seconds(self) -> Optional[float]:
+        """Audio left in the current track, None if not playing or unknown"""
+        if not self.is_playing or self.current_track is None:
+            return None
+        duration = self.audio.get_duration() or self.current_track.duration
+        position = self.audio.get_position()
+        if not duration or position is None:
+            return None
+        return max(0.0, duration - position)
+
+    def _schedule_ahead(self):
+        """
+        Start whatever the next track needs, timed to when it's needed
+
+        Refills the queue, resolves the next track's stream and hands it
+        to mpv early enough (by measured latency) that each finishes just
+        before the current track ends.
+        """
+        if not self.powered_on or self.is_loading:
+            return
+
+        upcoming = self.queue[0] if self.queue else None
+        preloaded = upcoming is not None and upcoming.stream_url is not None \
+            and upcoming.stream_url == self._queued_url
+        plan = self.scheduler.plan(self._remaining_seconds(), self.queue, preloaded)
+        if self.scan_mode:
+            # Excerpts prepare their own successors
+            plan = plan._replace(resolve=False, preload=False)
+
+        if plan.refill and not self._refilling:
+            self._refilling = True
+            self.clock.spawn(tracer.bind(self._prefetch_tracks))
+
+        if plan.resolve and self._resolving is None:
+            self._resolving = upcoming
+            self.clock.spawn(tracer.bind(lambda: self._resolve_upcoming(upcoming)))
 
-        # Prefetch more if queue is low
-        if len(self.queue) < 3:
-            thread = threading.Thread(target=self._prefetch_tracks)
-            thread.daemon = True
-            thread.start()
+        if plan.preload:
+            self._queued_url = upcoming.stream_url
+            log.debug("Queueing next: %s", upcoming.title or 'Unknown')
+            self.audio.queue_next(upcoming.stream_url)
+
+        self._warm_stations()
+
+    def _resolve_upcoming(self, track: Track):
+        """Look up the next track's stream ahead of time, dropping it if it has none"""
+        try:
+            if not self._resolve_stream(track):
+                log.debug("No audio files for upcoming %s, dropping", track.identifier)
+                if track in self.queue:
+                    self.queue.remove(track)
+                    QUEUE_DEPTH.set(len(self.queue))
+        except Exception as e:
+            log.warning("Error resolving upcoming track: %s", e)
+        finally:
+            self._resolving = None
 
     def _prefetch_tracks(self):
         """Prefetch more tracks in background"""
         try:
-            filters = self._get_current_filters()
-            location = LOCATIONS[self.location_index]
-
-            if location["id"] == "antarctica":
-                tracks = self.api.get_penguin_radio()
-            else:
-                tracks = self.api.search(**filters)
+            tracks = self._fetch_tracks()
 
             if tracks:
                 self.queue.extend(tracks)
-                print(f"Prefetched {len(tracks)} tracks, queue now has {len(self.queue)}")
+                QUEUE_DEPTH.set(len(self.queue))
+                log.debug("Prefetched %s tracks, queue now has %s", len(tracks), len(self.queue))
 
         except Exception as e:
-            print(f"Error prefetching: {e}")
+            log.warning("Error prefetching: %s", e)
+        finally:
+            self._refilling = False
 
     # === Display ===
 
@@ -402,6 +988,8 @@ class Radio:
                 filters=self._get_filter_labels(),
                 volume=self.volume,
                 is_paused=not self.is_playing,
+                is_scanning=self.scan_mode,
+                is_buffering=self.audio.is_stalled(),
             )
         else:
             self.display.show_idle(
@@ -409,37 +997,252 @@ class Radio:
                 volume=self.volume,
             )
 
+    # === Warm-boot Snapshot ===
+
+    def _build_snapshot(self) -> dict:
+        """Collect the state needed to resume after a restart"""
+        position = self.audio.get_position() if self.current_track else None
+
+        return {
+            "powered_on": self.powered_on,
+            "era_index": self.era_index,
+            "location_index": self.location_index,
+            "genre_index": self.genre_index,
+            "station_index": self.station_index,
+            "volume": self.volume,
+            "queue": [t.to_dict() for t in self.queue[:State.QUEUE_HEAD_SIZE]],
+            "current_track": self.current_track.to_dict() if self.current_track else None,
+            "stream_url": self.current_stream_url,
+            # Whole seconds keep an idle/paused radio from rewriting the file
+            "position": int(position) if position else None,
+        }
+
+    def _save_snapshot(self):
+        """Persist current state (no-op if unchanged)"""
+        self._last_snapshot_time = self.clock.monotonic()
+        try:
+            self.snapshot.save(self._build_snapshot())
+        except Exception as e:
+            log.error("Snapshot error: %s", e)
+
+    def _restore_snapshot(self):
+        """Resume from the last snapshot, skipping search and metadata"""
+        state = self.snapshot.load()
+        if not state:
+            return
+
+        # Indices may be out of range if the filter lists changed
+        self.era_index = state.get("era_index", 0) % len(ERAS)
+        self.location_index = state.get("location_index", 0) % len(LOCATIONS)
+        self.genre_index = state.get("genre_index", 0) % len(GENRES)
+        station_index = state.get("station_index")
+        self.station_index = station_index if station_index is not None and station_index < len(STATIONS) else None
+        self.volume = state.get("volume", Volume.DEFAULT)
+        self.audio.set_volume(self.volume)
+
+        if not state.get("powered_on"):
+            return
+
+        log.info("Restoring from snapshot...")
+        self.powered_on = True
+        self.queue = [Track.from_dict(t) for t in state.get("queue", []) if t]
+
+        track = state.get("current_track")
+        stream_url = state.get("stream_url")
+        if track and stream_url:
+            self.current_track = Track.from_dict(track)
+            self.current_stream_url = stream_url
+            log.info("Resuming: %s at %ss", self.current_track.title or 'Unknown', state.get('position') or 0)
+            self.audio.play(stream_url, start=state.get("position"))
+            self.is_playing = True
+            self._update_display()
+        elif self.queue:
+            self._play_next()
+        else:
+            self._start_playback()
+
     # === Main Loop ===
 
     def run(self):
         """Main run loop"""
-        print("Starting radio main loop...")
-        print("Press Ctrl+C to exit")
+        log.info("Starting radio main loop...")
+        log.info("Press Ctrl+C to exit")
+
+        # Journal writes are batched from here on
+        LOG_RING.start()
+
+        # Setup signal handlers for clean shutdown
+        signal.signal(signal.SIGINT, self._shutdown)
+        signal.signal(signal.SIGTERM, self._shutdown)
+
+        self._start_debug_hooks()
 
         # Show startup
         self.display.show_off()
 
+        if Metrics.SUMMARY_INTERVAL_S:
+            metrics.start_summary_logger(Metrics.SUMMARY_INTERVAL_S)
+
+        # Sweep the catalog while the radio is off
+        catalog = getattr(self.api, "catalog", None)
+        if catalog is not None:
+            from harvester import Harvester
+            self.harvester = Harvester(
+                self.api, catalog, is_idle=lambda: not self.powered_on
+            ).start()
+
+        # Pick up where we left off before the restart
+        self._restore_snapshot()
+
+        # Snapshot, history and cache index reach the SD card in coalesced batches
+        store.start_flusher()
+
+        self.watchdog.start()
+        sd_notify("READY=1")
+
         try:
             while True:
                 # Controls polling is handled in Controls class
                 # Display updates happen on events
                 time.sleep(0.1)
+                self.watchdog.beat()
+
+                now = self.clock.monotonic()
+                if now - self._last_schedule_time >= SchedulerConfig.TICK_S:
+                    self._last_schedule_time = now
+                    self._schedule_ahead()
+
+                if now - self._last_snapshot_time >= State.SNAPSHOT_INTERVAL_S:
+                    self._save_snapshot()
 
         except KeyboardInterrupt:
             self._shutdown(None, None)
 
+    # === Debugging ===
+
+    def _start_debug_hooks(self):
+        """Profiler signals and the local control socket"""
+        # SIGUSR1 starts sampling, SIGUSR2 stops and writes the flamegraph input
+        # (joining and writing happen off the main thread, like the log dump)
+        signal.signal(signal.SIGUSR1, lambda signum, frame: sampler.start())
+        signal.signal(signal.SIGUSR2, lambda signum, frame: threading.Thread(
+            target=self._stop_sampler, name="sampler-stop", daemon=True
+        ).start())
+        # SIGHUP dumps the log ring (debug records included)
+        signal.signal(signal.SIGHUP, lambda signum, frame: LOG_RING.request_dump())
+
+        from control import ControlServer
+        try:
+            self._control = ControlServer({
+                "profile": self._control_profile,
+                "trace": self._control_trace,
+                "log": self._control_log,
+                "metrics": lambda args: REGISTRY.summary(),
+                "stations": lambda args: self.harvester.report() if self.harvester else "no catalog",
+                "store": lambda args: store.report(),
+            }).start()
+        except OSError as e:
+            log.warning("Control socket unavailable: %s", e)
+
+    def _control_profile(self, args) -> str:
+        """profile start | stop [PATH]"""
+        action = args[0] if args else "status"
+        if action == "start":
+            return "started" if sampler.start() else "already running"
+        if action == "stop":
+            path = args[1] if len(args) > 1 else Profiling.OUTPUT_PATH
+            if not sampler.is_running():
+                return "not running"
+            return f"wrote {sampler.stop(path)} samples to {path}"
+        return "running" if sampler.is_running() else "stopped"
+
+    def _stop_sampler(self):
+        """Stop the profiler and write its output, without taking the radio down"""
+        try:
+            sampler.stop()
+        except OSError as e:
+            log.error("Could not write profile: %s", e)
+
+    def _control_trace(self, args) -> str:
+        """trace [PATH] - dump the span ring buffer"""
+        path = args[0] if args else Tracing.DUMP_PATH
+        return f"wrote {tracer.dump(path)} spans to {path}"
+
+    def _control_log(self, args) -> str:
+        """log [PATH] - dump the log ring"""
+        path = args[0] if args else Logging.DUMP_PATH
+        return f"wrote {LOG_RING.dump(path)} records to {path}"
+
     def _shutdown(self, signum, frame):
         """Clean shutdown"""
-        print("\nShutting down...")
+        log.info("Shutting down...")
+        sd_notify("STOPPING=1")
+        self.watchdog.stop()
+
+        # Snapshot before stopping audio so the position is still known
+        self._save_snapshot()
+        written = store.flush_all()
+        log.info("Flushed %s bytes to storage (%.0f bytes/hour)", written, store.METER.bytes_per_hour())
+
+        if sampler.is_running():
+            self._stop_sampler()
+        if self._control:
+            self._control.stop()
 
         self.audio.stop()
         self.controls.cleanup()
         self.display.show_off()
 
-        print("Goodbye!")
+        log.info("Goodbye!")
+        LOG_RING.stop()
         sys.exit(0)
 
 
-if __name__ == "__main__":
-    radio = Radio()
+def main():
+    parser = argparse.ArgumentParser(description="Anamnesis.fm physical radio")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print a per-phase timing breakdown of cold start",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=Metrics.HTTP_PORT,
+        help="serve Prometheus metrics on localhost:PORT (0 = off)",
+    )
+    parser.add_argument(
+        "--multiprocess",
+        action="store_true",
+        default=Processes.ENABLED,
+        help="run controls, display rendering and the network engine in separate processes",
+    )
+    args = parser.parse_args()
+
+    # Fork the workers before any threads start
+    radio_kwargs = {}
+    if args.multiprocess:
+        from multiproc import Workers
+        radio_kwargs = Workers().radio_kwargs()
+
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+
+    if args.profile_startup:
+        profiler.enable()
+
+    with profiler.phase("radio init"):
+        radio = Radio(**radio_kwargs)
+
+    if args.profile_startup:
+        # Include background phases (fonts, network) in the report
+        radio._warmup_thread.join(timeout=Timing.API_TIMEOUT_S)
+        if not args.multiprocess:
+            radio.display._fonts_ready.wait(timeout=5)
+        print(profiler.report())
+
     radio.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Sampling Profiler for Anamnesis.fm Radio
+Periodically captures the stack of every thread in the running service
+
+Nothing runs until start() is called (SIGUSR1 or the control socket) -
+there is no tracing hook, so a stopped profiler costs nothing. stop()
+writes collapsed stacks ("thread;outer;...;inner count" per line) that
+flamegraph.pl, speedscope or inferno read directly.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from config import Profiling
+from log import get_logger
+
+log = get_logger("sampler")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+class SamplingProfiler:
+    """Samples all thread stacks at a fixed interval on a daemon thread"""
+
+    def __init__(self, interval_s: float = Profiling.SAMPLE_INTERVAL_S):
+        self.interval_s = interval_s
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, max_duration_s: float = Profiling.MAX_DURATION_S) -> bool:
+        """
+        Start sampling (no-op if already running)
+
+        Args:
+            max_duration_s: Stop sampling on its own after this long (0 = never)
+
+        Returns:
+            True if sampling was started by this call
+        """
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stacks = Counter()
+            self._samples = 0
+            self._started_at = time.monotonic()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(max_duration_s,), name="sampler", daemon=True
+            )
+            self._thread.start()
+
+        log.info("Sampling profiler started (%.0f Hz)", 1 / self.interval_s)
+        return True
+
+    def stop(self, path: str = Profiling.OUTPUT_PATH) -> int:
+        """
+        Stop sampling and write collapsed stacks to path
+
+        Returns:
+            Number of samples written (0 if the profiler was not running)
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return 0
+
+        self._stop.set()
+        thread.join()
+        return self.write(path)
+
+    def write(self, path: str) -> int:
+        """Write the collected stacks in collapsed format"""
+        lines = [f"{stack} {count}\n" for stack, count in self._stacks.most_common()]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, path)
+
+        elapsed = time.monotonic() - self._started_at
+        log.info("Wrote %s samples (%s stacks, %.1fs) to %s", self._samples, len(lines), elapsed, path)
+        return self._samples
+
+    def _run(self, max_duration_s: float):
+        own_ident = threading.get_ident()
+        deadline = self._started_at + max_duration_s if max_duration_s else None
+
+        while not self._stop.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self._stacks[";".join(reversed(stack))] += 1
+            self._samples += 1
+
+            if deadline and time.monotonic() >= deadline:
+                log.info("Sampling profiler reached its time limit")
+                # stop() joins this thread, so hand it off
+                threading.Thread(target=self.stop, name="sampler-stop", daemon=True).start()
+                return
+
+
+# Shared profiler for the whole radio
+sampler = SamplingProfiler()
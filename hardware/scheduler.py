@@ -0,0 +1,118 @@
+"""
+Playback Scheduler for Anamnesis.fm Radio
+Decides when to refill the queue, resolve the next track and preload it
+
+Instead of refilling whenever fewer than three tracks are queued, each
+step is timed against how much audio is left: the rest of the current
+track plus the known (or estimated) length of everything queued. Lead
+times come from measured latencies - search and metadata requests, and
+mpv's stream open time - so work starts just early enough.
+"""
+
+import statistics
+from collections import deque
+from typing import List, NamedTuple, Optional
+
+from config import Scheduler as SchedulerConfig
+from metrics import REGISTRY
+from models import Track
+
+
+class Plan(NamedTuple):
+    refill: bool    # Search for more tracks now
+    resolve: bool   # Fetch the next track's metadata now
+    preload: bool   # Open the next stream behind the current one now
+
+
+class LeadTimes(NamedTuple):
+    refill: float
+    resolve: float
+    preload: float
+
+
+def _latency(histogram, default: float) -> float:
+    """p95 from a latency histogram, or a default until there is data"""
+    p95 = histogram.quantile(0.95)
+    if p95 is None or p95 == float("inf"):
+        return default
+    return p95
+
+
+class PlaybackScheduler:
+    """Plans queue refills and next-track preparation from remaining audio time"""
+
+    def __init__(self):
+        self._search_time = REGISTRY.histogram(
+            "anamnesis_api_request_seconds", "API request latency", {"endpoint": "search"}
+        )
+        self._metadata_time = REGISTRY.histogram(
+            "anamnesis_api_request_seconds", "API request latency", {"endpoint": "metadata"}
+        )
+        self._open_time = REGISTRY.histogram(
+            "anamnesis_audio_open_seconds", "Time from play() until mpv is playing"
+        )
+        # Recent track lengths, for queued tracks whose length isn't known yet
+        self._durations: deque = deque(maxlen=50)
+
+    def observe_duration(self, seconds: Optional[float]):
+        """Record the length of a track that played"""
+        if seconds and seconds > 0:
+            self._durations.append(seconds)
+
+    def typical_duration(self) -> float:
+        if not self._durations:
+            return SchedulerConfig.DEFAULT_TRACK_S
+        return statistics.median(self._durations)
+
+    def lead_times(self) -> LeadTimes:
+        """Seconds before they're needed that each step should start"""
+        safety = SchedulerConfig.SAFETY_FACTOR
+        margin = SchedulerConfig.MARGIN_S
+        open_s = _latency(self._open_time, SchedulerConfig.DEFAULT_OPEN_S) * safety + margin
+        metadata_s = _latency(self._metadata_time, SchedulerConfig.DEFAULT_API_S) * safety
+        search_s = _latency(self._search_time, SchedulerConfig.DEFAULT_API_S) * safety
+
+        # Each step has to finish before the one after it starts
+        resolve = open_s + metadata_s
+        refill = resolve + search_s
+        return LeadTimes(refill=refill, resolve=resolve, preload=open_s)
+
+    def queued_seconds(self, queue: List[Track]) -> float:
+        typical = self.typical_duration()
+        return sum(track.duration or typical for track in queue)
+
+    def plan(self, remaining_s: Optional[float], queue: List[Track], preloaded: bool) -> Plan:
+        """
+        Decide what to start now
+
+        Args:
+            remaining_s: Audio left in the current track (None if unknown)
+            queue: Tracks queued after the current one
+            preloaded: The next track is already opened behind this one
+
+        Returns:
+            Which steps to start
+        """
+        leads = self.lead_times()
+
+        if remaining_s is None:
+            # Nothing playing or length unknown - just keep one track in hand
+            return Plan(refill=len(queue) < SchedulerConfig.MIN_QUEUE, resolve=False, preload=False)
+
+        upcoming = queue[0] if queue else None
+        refill = (
+            len(queue) < SchedulerConfig.MIN_QUEUE
+            or remaining_s + self.queued_seconds(queue) < leads.refill
+        )
+        resolve = (
+            upcoming is not None
+            and upcoming.stream_url is None
+            and remaining_s < leads.resolve
+        )
+        preload = (
+            upcoming is not None
+            and upcoming.stream_url is not None
+            and not preloaded
+            and remaining_s < leads.preload
+        )
+        return Plan(refill=refill, resolve=resolve, preload=preload)
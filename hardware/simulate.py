@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Headless Simulation Harness for Anamnesis.fm Radio
+Replays scripted button timelines against mocks on a simulated clock
+
+Example:
+    python3 simulate.py "power, era x3, next x5, stop" \\
+        --expect powered_on=True --expect is_playing=False --runs 200
+"""
+
+import argparse
+import contextlib
+import functools
+import heapq
+import io
+import itertools
+import os
+import random
+import re
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from clock import Clock
+from audio import MockAudioPlayer
+from controls import MockControls
+from display import Display
+from state import StateSnapshot
+from audio_cache import AudioCache
+from history import PlayHistory
+from models import Track
+
+
+# === Simulated Clock ===
+
+class _Handle:
+    """Cancellable scheduled call"""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeClock(Clock):
+    """
+    Discrete-event clock
+
+    Timers and spawned "threads" are queued and run to completion on
+    the caller's thread when advance() passes their due time. sleep()
+    just moves time forward, so a task that sleeps holds the simulated
+    CPU - good enough to model request latencies deterministically.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self._queue: List[Tuple[float, int, _Handle, Callable, tuple]] = []
+        self._seq = itertools.count()
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            self.now += seconds
+
+    def call_later(self, delay: float, func: Callable, *args):
+        handle = _Handle()
+        heapq.heappush(self._queue, (self.now + delay, next(self._seq), handle, func, args))
+        return handle
+
+    def spawn(self, func: Callable, *args, name: str = None):
+        return self.call_later(0, func, *args)
+
+    def advance(self, seconds: float):
+        """Run everything due within the next `seconds` of simulated time"""
+        target = self.now + seconds
+        while self._queue and self._queue[0][0] <= target:
+            due, _, handle, func, args = heapq.heappop(self._queue)
+            if handle.cancelled:
+                continue
+            self.now = max(self.now, due)
+            func(*args)
+        self.now = max(self.now, target)
+
+
+# === Stub API ===
+
+class LatencyModel:
+    """Base latency plus uniform jitter, in seconds"""
+
+    def __init__(self, base: float, jitter: float, rng: random.Random):
+        self.base = base
+        self.jitter = jitter
+        self.rng = rng
+
+    def sample(self) -> float:
+        return self.base + self.rng.uniform(0, self.jitter)
+
+
+class StubAPI:
+    """In-process stand-in for AnamnesisAPI with simulated latencies"""
+
+    def __init__(
+        self,
+        clock: Clock,
+        rng: random.Random,
+        search_latency: Tuple[float, float] = (0.6, 0.8),
+        metadata_latency: Tuple[float, float] = (0.15, 0.35),
+        results_per_search: int = 40,
+        missing_audio_rate: float = 0.1,
+    ):
+        self.clock = clock
+        self.rng = rng
+        self.search_latency = LatencyModel(*search_latency, rng)
+        self.metadata_latency = LatencyModel(*metadata_latency, rng)
+        self.results_per_search = results_per_search
+        self.missing_audio_rate = missing_audio_rate
+        self.base_url = "http://stub"
+        self.calls: Dict[str, int] = {}
+        self._ids = itertools.count()
+
+    def _count(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def warm_up(self) -> bool:
+        # Called from a real thread - must not touch the simulated clock
+        return True
+
+    def search(self, era=None, location=None, genre=None, page=1) -> List[Track]:
+        self._count("search")
+        self.clock.sleep(self.search_latency.sample())
+        label = "-".join(f for f in (era, location, genre) if f) or "all"
+        return [
+            Track(f"stub-{label}-{next(self._ids)}", f"Stub Broadcast {label}", f"Station {n}")
+            for n in range(self.results_per_search)
+        ]
+
+    def get_metadata(self, identifier: str) -> Optional[dict]:
+        self._count("metadata")
+        self.clock.sleep(self.metadata_latency.sample())
+        if self.rng.random() < self.missing_audio_rate:
+            return {"identifier": identifier, "audioFiles": []}
+        return {
+            "identifier": identifier,
+            "title": identifier,
+            "creator": "Stub",
+            "date": "1945",
+            "audioFiles": [{"name": "track.mp3", "duration": "1800", "size": "28800000"}],
+        }
+
+    def get_stream_url(self, identifier: str, filename: str) -> str:
+        return f"{self.base_url}/api/stream/{identifier}/{filename}"
+
+    def get_penguin_radio(self) -> List[Track]:
+        self._count("penguin")
+        self.clock.sleep(self.search_latency.sample())
+        return [
+            Track(f"soundcloud-{1000 + n}", f"Penguin {n}", soundcloud_id=1000 + n)
+            for n in range(10)
+        ]
+
+    def get_soundcloud_stream_url(self, track_id: int) -> str:
+        return f"{self.base_url}/api/soundcloud-stream/{track_id}"
+
+    def heartbeat(self) -> bool:
+        return True
+
+    def get_listener_count(self) -> Optional[int]:
+        return 1
+
+
+# === Simulated Audio ===
+
+class SimAudioPlayer(MockAudioPlayer):
+    """MockAudioPlayer that models stream-open time and logs play commands"""
+
+    def __init__(self, clock: Clock, open_latency: LatencyModel, **kwargs):
+        super().__init__(**kwargs)
+        self.clock = clock
+        self.open_latency = open_latency
+        self.commands: List[Tuple[float, str]] = []       # (time, command)
+        self.first_audio: List[float] = []                 # Time audio became audible
+        self._preloaded = False
+        self._queued: Optional[tuple] = None
+
+    def play(self, url: str, start: Optional[float] = None, byte_range: Optional[Tuple[int, int]] = None):
+        self.commands.append((self.clock.monotonic(), "play"))
+        if self._queued != (url, byte_range) or start:
+            # Anything not already opened by queue_next() pays the open
+            self.clock.sleep(self.open_latency.sample())
+        self._queued = None
+        super().play(url, start, byte_range)
+        self.first_audio.append(self.clock.monotonic())
+
+    def queue_next(self, url: str, byte_range: Optional[Tuple[int, int]] = None):
+        super().queue_next(url, byte_range)
+        self._queued = (url, byte_range)
+
+    def preload(self, url: str, start: Optional[float] = None, timeout: float = 10):
+        self.clock.sleep(self.open_latency.sample())
+        super().preload(url, start, timeout)
+        self._preloaded = True
+
+    def resume(self):
+        self.commands.append((self.clock.monotonic(), "resume"))
+        super().resume()
+        if self._preloaded:
+            self._preloaded = False
+            self.first_audio.append(self.clock.monotonic())
+
+
+# === Timeline ===
+
+STEP_RE = re.compile(r"^(\w[\w+]*)\s*(?:[x×*]\s*(\d+))?$")
+
+
+def parse_timeline(script: str) -> List[Tuple[str, Optional[float]]]:
+    """
+    Parse a timeline like "power, era x3, wait 2, volume=700, next×5, stop"
+
+    Returns:
+        List of (action, argument) steps with repeats expanded
+    """
+    steps = []
+    for raw in script.split(","):
+        token = raw.strip()
+        if not token:
+            continue
+
+        if token.startswith("wait"):
+            steps.append(("wait", float(token[4:].strip(" :s"))))
+            continue
+
+        if "=" in token:
+            name, value = token.split("=", 1)
+            steps.append((name.strip(), float(value)))
+            continue
+
+        match = STEP_RE.match(token)
+        if not match:
+            raise ValueError(f"Bad timeline step: {token!r}")
+        name, repeat = match.group(1), int(match.group(2) or 1)
+        steps.extend([(name, None)] * repeat)
+
+    return steps
+
+
+# === Simulation ===
+
+class Simulation:
+    """One headless radio wired to mocks, a stub API and a fake clock"""
+
+    def __init__(self, seed: int = 0, quiet: bool = True):
+        # Imported here so the harness module itself stays cheap
+        from radio import Radio
+
+        self.rng = random.Random(seed)
+        self.clock = FakeClock()
+        self.api = StubAPI(self.clock, self.rng)
+        self.quiet = quiet
+        self._state_dir = tempfile.mkdtemp(prefix="anamnesis-sim-")
+
+        audio_class = functools.partial(
+            SimAudioPlayer,
+            clock=self.clock,
+            open_latency=LatencyModel(0.2, 0.6, self.rng),
+        )
+
+        with self._output():
+            self.radio = Radio(
+                display=Display(use_device=False),
+                controls_class=MockControls,
+                audio_class=audio_class,
+                api=self.api,
+                clock=self.clock,
+                snapshot=StateSnapshot(os.path.join(self._state_dir, "snapshot.json")),
+                # Stub stream URLs aren't downloadable
+                audio_cache=AudioCache(os.path.join(self._state_dir, "audio"), max_bytes=0),
+                history=PlayHistory(os.path.join(self._state_dir, "history.jsonl")),
+            )
+
+        self.presses: List[Tuple[float, str]] = []
+        self.retunes: List[float] = []
+
+        # Record when debounced retunes actually fire
+        retune = self.radio._retune
+
+        def traced_retune():
+            self.retunes.append(self.clock.monotonic())
+            retune()
+
+        self.radio._retune = traced_retune
+
+    def _output(self):
+        """Silence the radio's prints unless asked not to"""
+        if self.quiet:
+            return contextlib.redirect_stdout(io.StringIO())
+        return contextlib.nullcontext()
+
+    def run(self, steps: List[Tuple[str, Optional[float]]], gap: float = 0.3, settle: float = 10.0):
+        """Replay timeline steps, `gap` simulated seconds apart"""
+        controls = self.radio.controls
+        audio = self.radio.audio
+
+        with self._output():
+            for action, arg in steps:
+                if action == "wait":
+                    self.clock.advance(arg)
+                    continue
+
+                if action == "volume":
+                    controls.simulate_volume(int(arg))
+                elif action == "tuning":
+                    controls.simulate_tuning(int(arg))
+                elif action == "end":
+                    audio.simulate_end()
+                else:
+                    self.presses.append((self.clock.monotonic(), action))
+                    controls.simulate_button(action)
+
+                self.clock.advance(gap)
+
+            self.clock.advance(settle)
+
+    def check(self, expected: Dict[str, object]) -> List[str]:
+        """Compare end state against expectations, returns failures"""
+        failures = []
+        for name, want in expected.items():
+            if name == "queue":
+                got = len(self.radio.queue)
+            elif name == "current_track":
+                got = self.radio.current_track is not None
+            else:
+                got = getattr(self.radio, name)
+            if got != want:
+                failures.append(f"{name}: expected {want!r}, got {got!r}")
+        return failures
+
+    def press_to_play(self) -> Dict[str, List[float]]:
+        """Latency from each button press to the next play command, by button"""
+        commands = [t for t, _ in self.radio.audio.commands]
+        latencies: Dict[str, List[float]] = {}
+        for pressed_at, button in self.presses:
+            following = [t for t in commands if t >= pressed_at]
+            if following:
+                latencies.setdefault(button, []).append(following[0] - pressed_at)
+        return latencies
+
+    def retune_to_audio(self) -> List[float]:
+        """Latency from each retune to the first audio after it"""
+        audio_times = self.radio.audio.first_audio
+        latencies = []
+        for retuned_at in self.retunes:
+            following = [t for t in audio_times if t > retuned_at]
+            if following:
+                latencies.append(following[0] - retuned_at)
+        return latencies
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def format_distribution(name: str, values: List[float]) -> str:
+    """One report line: count, p50, p95, p99, max in milliseconds"""
+    if not values:
+        return f"  {name:<22} (no samples)"
+    return (
+        f"  {name:<22} n={len(values):<5}"
+        f" p50={percentile(values, 50) * 1000:6.0f}ms"
+        f" p95={percentile(values, 95) * 1000:6.0f}ms"
+        f" p99={percentile(values, 99) * 1000:6.0f}ms"
+        f" max={max(values) * 1000:6.0f}ms"
+    )
+
+
+def parse_expectation(text: str) -> Tuple[str, object]:
+    """Parse name=value, where value is True/False/None or a number"""
+    name, value = text.split("=", 1)
+    literals = {"true": True, "false": False, "none": None}
+    if value.lower() in literals:
+        return name, literals[value.lower()]
+    try:
+        return name, int(value)
+    except ValueError:
+        return name, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless radio simulation")
+    parser.add_argument("timeline", help='e.g. "power, era x3, next x5, stop"')
+    parser.add_argument("--runs", type=int, default=1, help="number of seeded runs")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first run")
+    parser.add_argument("--gap", type=float, default=0.3, help="seconds between steps")
+    parser.add_argument("--expect", action="append", default=[],
+                        help="end state check, e.g. is_playing=False (repeatable)")
+    parser.add_argument("--verbose", action="store_true", help="show radio output")
+    args = parser.parse_args()
+
+    steps = parse_timeline(args.timeline)
+    expected = dict(parse_expectation(e) for e in args.expect)
+
+    press_latency: Dict[str, List[float]] = {}
+    retune_latency: List[float] = []
+    failed_runs = 0
+
+    for run in range(args.runs):
+        sim = Simulation(seed=args.seed + run, quiet=not args.verbose)
+        sim.run(steps, gap=args.gap)
+
+        failures = sim.check(expected)
+        if failures:
+            failed_runs += 1
+            print(f"Run {run} (seed {args.seed + run}) FAILED: {'; '.join(failures)}")
+
+        for button, values in sim.press_to_play().items():
+            press_latency.setdefault(button, []).extend(values)
+        retune_latency.extend(sim.retune_to_audio())
+
+    print(f"Timeline: {len(steps)} steps x {args.runs} runs (simulated time)")
+    print("Button press -> play command:")
+    for button in sorted(press_latency):
+        print(format_distribution(button, press_latency[button]))
+    print("Retune -> first audio:")
+    print(format_distribution("retune", retune_latency))
+
+    if expected:
+        print(f"End state: {args.runs - failed_runs}/{args.runs} runs passed")
+
+    sys.exit(1 if failed_runs else 0)
+
+
+if __name__ == "__main__":
+    main()
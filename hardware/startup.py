@@ -0,0 +1,69 @@
+"""
+Startup Profiler for Anamnesis.fm Radio
+Records per-phase timings during cold start (--profile-startup)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupProfiler:
+    """Collects (phase, start, duration, thread) records relative to import time"""
+
+    def __init__(self):
+        self.enabled = False
+        self._t0 = time.perf_counter()
+        self._phases: List[Tuple[str, float, float, str]] = []
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """Start recording phases"""
+        self.enabled = True
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of startup work (no-op unless enabled)"""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self._phases.append((
+                    name,
+                    start - self._t0,
+                    end - start,
+                    threading.current_thread().name,
+                ))
+
+    def report(self) -> str:
+        """Format a timing breakdown, ordered by start time"""
+        with self._lock:
+            phases = sorted(self._phases, key=lambda p: p[1])
+
+        if not phases:
+            return "No startup phases recorded"
+
+        total = max(start + duration for _, start, duration, _ in phases)
+        lines = [
+            "Startup profile",
+            "-" * 60,
+            f"{'phase':<24}{'start':>9}{'took':>9}  thread",
+        ]
+        for name, start, duration, thread in phases:
+            lines.append(
+                f"{name:<24}{start * 1000:>7.0f}ms{duration * 1000:>7.0f}ms  {thread}"
+            )
+        lines.append("-" * 60)
+        lines.append(f"{'total (wall)':<24}{'':>9}{total * 1000:>7.0f}ms")
+        return "\n".join(lines)
+
+
+# Shared instance - radio.py imports this first so t0 is close to process start
+profiler = StartupProfiler()
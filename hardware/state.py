@@ -0,0 +1,70 @@
+"""
+Warm-boot State Snapshot for Anamnesis.fm Radio
+Persists just enough state to resume playback after a restart
+"""
+
+import json
+import os
+import time
+from typing import Optional
+
+from config import State
+from log import get_logger
+from store import open_store
+
+log = get_logger("state")
+
+
+SNAPSHOT_VERSION = 1
+
+class StateSnapshot:
+    """Write-avoiding JSON snapshot, flushed atomically by the store"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(State.DIR, State.SNAPSHOT_FILE)
+        self._kv = open_store(os.path.dirname(self.path)).kv(os.path.basename(self.path))
+
+    def save(self, state: dict) -> bool:
+        """
+        Stage the snapshot for the next store flush
+
+        Nothing is marked for writing when the state is unchanged since
+        the last save, so an idle radio doesn't touch the SD card.
+
+        Args:
+            state: Snapshot contents (JSON serializable)
+
+        Returns:
+            True if the snapshot changed
+        """
+        # Round-trip so it compares (and is kept) exactly as it will be stored
+        state = json.loads(json.dumps(state))
+        if self._kv.get('state') == state and self._kv.get('version') == SNAPSHOT_VERSION:
+            return False
+        self._kv.set('version', SNAPSHOT_VERSION)
+        self._kv.set('saved_at', int(time.time()))
+        self._kv.set('state', state)
+        return True
+
+    def load(self) -> Optional[dict]:
+        """
+        Load the last snapshot
+
+        Returns:
+            Snapshot state dict, or None if missing, stale or corrupt
+        """
+        if 'version' not in self._kv:
+            return None
+
+        if self._kv.get('version') != SNAPSHOT_VERSION:
+            log.info("Ignoring snapshot from another version")
+            return None
+
+        saved_at = self._kv.get('saved_at', 0)
+        age = time.time() - (saved_at if isinstance(saved_at, (int, float)) else 0)
+        if age > State.SNAPSHOT_MAX_AGE_S:
+            log.info("Ignoring stale snapshot (%.1fh old)", age / 3600)
+            return None
+
+        state = self._kv.get('state')
+        return state if isinstance(state, dict) else None
@@ -0,0 +1,180 @@
+"""
+Tuning Dial Stations for Anamnesis.fm Radio
+Maps the TUNING pot onto sub-era stations with warm queues
+
+The 0-1023 dial is split into bands of a few years each, combined with
+the location/genre buttons. A 1024-entry table maps a raw ADC reading
+straight to its station, and the stations either side of the dial keep
+a short queue with the first stream already resolved, so turning the
+knob plays straight away instead of waiting on a search.
+"""
+
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import ERAS, Tuning
+from log import get_logger
+from models import Track
+
+log = get_logger("stations")
+
+DIAL_STEPS = 1024  # MCP3008 is 10-bit
+
+
+class Station(NamedTuple):
+    label: str      # Display label (e.g., "1950-54")
+    era: str        # Year range query (e.g., "1950-1954")
+    era_index: int  # Decade in ERAS it falls inside
+
+
+def _decade_index(year: int) -> int:
+    for index, era in enumerate(ERAS):
+        if era["query"]:
+            start, _, end = era["query"].partition("-")
+            if int(start) <= year <= int(end):
+                return index
+    return 0
+
+
+def build_stations(
+    first_year: int = Tuning.FIRST_YEAR,
+    last_year: int = Tuning.LAST_YEAR,
+    band_years: int = Tuning.BAND_YEARS,
+) -> List[Station]:
+    """Consecutive year bands from first_year to last_year"""
+    stations = []
+    for start in range(first_year, last_year + 1, band_years):
+        end = min(start + band_years - 1, last_year)
+        stations.append(Station(
+            label=f"{start}-{end % 100:02d}",
+            era=f"{start}-{end}",
+            era_index=_decade_index(start),
+        ))
+    return stations
+
+
+def build_dial_index(station_count: int) -> array:
+    """ADC reading -> station index, equal-width bands across the dial"""
+    return array("B", (value * station_count // DIAL_STEPS for value in range(DIAL_STEPS)))
+
+
+STATIONS = build_stations()
+_DIAL_INDEX = build_dial_index(len(STATIONS))
+
+
+def station_at(value: int) -> int:
+    """Station index for a raw dial reading (0-1023)"""
+    return _DIAL_INDEX[min(max(value, 0), DIAL_STEPS - 1)]
+
+
+def neighbours(index: int, radius: int = Tuning.WARM_RADIUS) -> List[int]:
+    """Station indices within radius of index, nearest first (index excluded)"""
+    result = []
+    for distance in range(1, radius + 1):
+        for candidate in (index - distance, index + distance):
+            if 0 <= candidate < len(STATIONS):
+                result.append(candidate)
+    return result
+
+
+# (era, location, genre) filter queries a warm queue was filled for
+FilterKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def filter_key(filters: dict) -> FilterKey:
+    return (filters.get("era"), filters.get("location"), filters.get("genre"))
+
+
+class WarmQueues:
+    """Short ready-to-play queues for stations the dial may turn to next"""
+
+    def __init__(
+        self,
+        fetch: Callable[[dict], List[Track]],
+        resolve: Callable[[Track], Optional[str]],
+        spawn: Callable[..., object],
+        size: int = Tuning.WARM_QUEUE_SIZE,
+        slots: int = Tuning.WARM_SLOTS,
+        ttl_s: float = Tuning.WARM_TTL_S,
+        monotonic: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            fetch: Search for tracks given era/location/genre filters
+            resolve: Resolve a track's stream URL (None if it has no audio)
+            spawn: Runs a function in the background (Clock.spawn)
+            size: Tracks kept per station
+            slots: Station queues held at once
+            ttl_s: Age after which a queue is refilled
+            monotonic: Time source (Clock.monotonic)
+        """
+        self.fetch = fetch
+        self.resolve = resolve
+        self.spawn = spawn
+        self.size = size
+        self.slots = slots
+        self.ttl_s = ttl_s
+        self.monotonic = monotonic
+
+        self._queues: "OrderedDict[FilterKey, Tuple[List[Track], float]]" = OrderedDict()
+        self._pending: Dict[FilterKey, bool] = {}
+        self._lock = threading.Lock()
+
+    def take(self, filters: dict) -> Optional[List[Track]]:
+        """
+        Hand over a station's warm queue
+
+        Returns:
+            Tracks with the first stream resolved, or None if not warm
+        """
+        with self._lock:
+            entry = self._queues.pop(filter_key(filters), None)
+        if entry is None or self.monotonic() - entry[1] > self.ttl_s:
+            return None
+        return entry[0]
+
+    def warm(self, stations: Iterable[dict]):
+        """Fill (in the background) any of these stations that aren't warm"""
+        now = self.monotonic()
+        with self._lock:
+            for filters in stations:
+                key = filter_key(filters)
+                entry = self._queues.get(key)
+                if key in self._pending or (entry is not None and now - entry[1] <= self.ttl_s):
+                    continue
+                self._pending[key] = True
+                self.spawn(self._fill, filters)
+
+    def _fill(self, filters: dict):
+        key = filter_key(filters)
+        try:
+            tracks = self.fetch(filters)
+            ready = []
+            for track in tracks:
+                if len(ready) >= self.size:
+                    break
+                # Only the first needs its stream up front - the scheduler does the rest
+                if ready or self.resolve(track):
+                    ready.append(track)
+
+            if ready:
+                with self._lock:
+                    self._queues[key] = (ready, self.monotonic())
+                    self._queues.move_to_end(key)
+                    while len(self._queues) > self.slots:
+                        self._queues.popitem(last=False)
+        except Exception as e:
+            log.warning("Error warming station %s: %s", key[0], e)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._queues.clear()
+
+    def __len__(self) -> int:
+        return len(self._queues)
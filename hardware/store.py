@@ -0,0 +1,368 @@
+"""
+Local Persistence for Anamnesis.fm Radio
+Write-coalescing key-value and append-log files on the SD card
+
+Modules keep their durable state in a Store instead of writing files
+themselves. Writes land in memory; a background flush (every
+Persist.FLUSH_INTERVAL_S, and from Radio._shutdown) writes each changed
+file once - key-value files atomically (temp file, fsync, rename),
+append logs as one appended block - so a busy radio costs the card a
+few writes a minute rather than one per event. A value set back to
+what is already stored doesn't count as a change.
+
+Usage:
+    store = open_store()                      # ~/.anamnesis-radio
+    settings = store.kv("settings.json", decode=int)
+    settings.set("volume", 40)
+    plays = store.log("plays.jsonl")
+    plays.append({"id": "..."})
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Generic, Iterable, Iterator, List, Optional, TypeVar
+
+from config import Persist, State
+from log import get_logger
+from metrics import REGISTRY
+
+log = get_logger("store")
+
+T = TypeVar("T")
+
+BYTES_PER_HOUR = REGISTRY.gauge(
+    "anamnesis_store_bytes_per_hour", "Bytes written to local storage over the last hour"
+)
+
+
+def _identity(value):
+    return value
+
+
+def _encode_json(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+class _WriteMeter:
+    """Bytes written per file, and over the last hour"""
+
+    def __init__(self):
+        self._recent: deque = deque()   # (monotonic time, bytes)
+        self.totals: Dict[str, int] = {}  # File name -> bytes since start
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, path: str, size: int):
+        name = os.path.basename(path)
+        REGISTRY.counter(
+            "anamnesis_store_bytes_written_total", "Bytes written to local storage", {"file": name}
+        ).inc(size)
+        with self._lock:
+            self._recent.append((time.monotonic(), size))
+            self.totals[name] = self.totals.get(name, 0) + size
+        BYTES_PER_HOUR.set(self.bytes_per_hour())
+
+    def bytes_per_hour(self) -> float:
+        """Bytes written in the last hour (projected while up for less than that)"""
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0][0] > 3600:
+                self._recent.popleft()
+            total = sum(size for _, size in self._recent)
+        elapsed = min(3600.0, max(now - self._started, 60.0))
+        return total * 3600 / elapsed
+
+
+METER = _WriteMeter()
+
+
+def _write_atomic(path: str, data: bytes):
+    """Replace path with data; a crash leaves either the old or the new file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)  # Make the rename durable
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+class KeyValue(Generic[T]):
+    """JSON object file of typed values, rewritten whole when anything changed"""
+
+    def __init__(
+        self,
+        path: str,
+        decode: Callable[[object], T] = _identity,
+        encode: Callable[[T], object] = _identity,
+    ):
+        """
+        Args:
+            path: JSON file
+            decode: Stored JSON value -> T (raise TypeError/ValueError/KeyError if invalid)
+            encode: T -> JSON-serializable value
+        """
+        self.path = path
+        self.decode = decode
+        self.encode = encode
+        self._data: Dict[str, object] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = json.loads(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.warning("Could not read %s: %s", self.path, e)
+            return
+        if isinstance(data, dict):
+            self._data = data
+        else:
+            log.warning("Ignoring %s: expected a JSON object", self.path)
+
+    def get(self, key: str, default: Optional[T] = None) -> Optional[T]:
+        raw = self._data.get(key)
+        if raw is None:
+            return default
+        try:
+            return self.decode(raw)
+        except (TypeError, ValueError, KeyError) as e:
+            log.warning("Bad value for %s in %s: %s", key, self.path, e)
+            return default
+
+    def set(self, key: str, value: T):
+        raw = self.encode(value)
+        with self._lock:
+            if self._data.get(key) != raw:
+                self._data[key] = raw
+                self._dirty = True
+
+    def delete(self, key: str):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._dirty = True
+
+    def keys(self) -> List[str]:
+        return list(self._data)
+
+    def items(self) -> Iterator:
+        for key in self.keys():
+            value = self.get(key)
+            if value is not None:
+                yield key, value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def flush(self) -> int:
+        """Write the file if anything changed, returns bytes written"""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            data = _encode_json(self._data)
+            self._dirty = False
+        try:
+            _write_atomic(self.path, data)
+        except OSError as e:
+            self._dirty = True
+            log.error("Could not write %s: %s", self.path, e)
+            return 0
+        METER.add(self.path, len(data))
+        return len(data)
+
+
+class AppendLog(Generic[T]):
+    """JSON-lines file; appends are batched, rewrites replace it atomically"""
+
+    def __init__(
+        self,
+        path: str,
+        decode: Callable[[object], T] = _identity,
+        encode: Callable[[T], object] = _identity,
+    ):
+        self.path = path
+        self.decode = decode
+        self.encode = encode
+        self._pending: List[bytes] = []
+        self._replacement: Optional[List[bytes]] = None
+        self._tail_checked = False
+        self._lock = threading.Lock()
+
+    def _line(self, value: T) -> bytes:
+        return json.dumps(self.encode(value), separators=(",", ":")).encode("utf-8") + b"\n"
+
+    def append(self, value: T):
+        line = self._line(value)
+        with self._lock:
+            self._pending.append(line)
+
+    def rewrite(self, values: Iterable[T]):
+        """Replace the whole log (e.g. after trimming) at the next flush"""
+        lines = [self._line(value) for value in values]
+        with self._lock:
+            self._replacement = lines
+            self._pending = []
+
+    def __iter__(self) -> Iterator[T]:
+        """Every entry, stored and not yet flushed, oldest first"""
+        with self._lock:
+            replacement = self._replacement
+            pending = list(self._pending)
+        if replacement is not None:
+            lines = list(replacement)
+        else:
+            lines = []
+            try:
+                with open(self.path, "rb") as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning("Could not read %s: %s", self.path, e)
+
+        for line in lines + pending:
+            try:
+                yield self.decode(json.loads(line))
+            except (TypeError, ValueError, KeyError):
+                pass  # Torn final line from a power cut
+
+    def flush(self) -> int:
+        """Write out pending entries, returns bytes written"""
+        with self._lock:
+            replacement, pending = self._replacement, self._pending
+            self._replacement, self._pending = None, []
+        if replacement is None and not pending:
+            return 0
+
+        try:
+            if replacement is not None:
+                data = b"".join(replacement + pending)
+                _write_atomic(self.path, data)
+            else:
+                data = b"".join(pending)
+                if not self._tail_checked and self._torn_tail():
+                    data = b"\n" + data  # Don't glue the first entry onto a torn line
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "ab") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            log.error("Could not write %s: %s", self.path, e)
+            with self._lock:
+                # Put them back in front of anything added meanwhile
+                if replacement is not None and self._replacement is None:
+                    self._replacement = replacement
+                self._pending = pending + self._pending
+            return 0
+
+        self._tail_checked = True
+        METER.add(self.path, len(data))
+        return len(data)
+
+    def _torn_tail(self) -> bool:
+        """Whether the file ends part way through a line"""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if not f.tell():
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except OSError:
+            return False
+
+
+class Store:
+    """Key-value files and append logs under one directory, flushed together"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._files: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def kv(self, name: str, decode: Callable = _identity, encode: Callable = _identity) -> KeyValue:
+        """Key-value file `name` (opened once, shared by every caller)"""
+        return self._open(name, lambda path: KeyValue(path, decode, encode))
+
+    def log(self, name: str, decode: Callable = _identity, encode: Callable = _identity) -> AppendLog:
+        """Append log `name` (opened once, shared by every caller)"""
+        return self._open(name, lambda path: AppendLog(path, decode, encode))
+
+    def _open(self, name: str, factory):
+        with self._lock:
+            if name not in self._files:
+                self._files[name] = factory(os.path.join(self.directory, name))
+            return self._files[name]
+
+    def flush(self) -> int:
+        with self._lock:
+            files = list(self._files.values())
+        return sum(f.flush() for f in files)
+
+
+_stores: Dict[str, Store] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(directory: str = State.DIR) -> Store:
+    """The Store for a directory (one per directory per process)"""
+    directory = os.path.abspath(directory)
+    with _stores_lock:
+        if directory not in _stores:
+            _stores[directory] = Store(directory)
+        return _stores[directory]
+
+
+def flush_all() -> int:
+    """Flush every open store, returns bytes written"""
+    with _stores_lock:
+        stores = list(_stores.values())
+    return sum(store.flush() for store in stores)
+
+
+# Exits that skip Radio._shutdown still write what's buffered
+atexit.register(flush_all)
+
+
+def start_flusher(interval_s: float = Persist.FLUSH_INTERVAL_S) -> threading.Thread:
+    """Flush every store every interval_s seconds in the background"""
+
+    def loop():
+        while True:
+            time.sleep(interval_s)
+            written = flush_all()
+            if written:
+                log.debug("Flushed %s bytes to storage (%.0f bytes/hour)", written, METER.bytes_per_hour())
+
+    thread = threading.Thread(target=loop, name="store-flush", daemon=True)
+    thread.start()
+    return thread
+
+
+def report() -> str:
+    """Bytes written per hour, and in total per file"""
+    lines = [f"{METER.bytes_per_hour() / 1024:.1f} KB/hour written to local storage"]
+    for name, size in sorted(METER.totals.items()):
+        lines.append(f"  {name}: {size / 1024:.1f} KB since start")
+    return "\n".join(lines)
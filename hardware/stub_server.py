@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Local Stand-in for the Anamnesis.fm Worker API
+Serves fixtures with configurable latency, jitter, bandwidth and errors
+
+Run it, then point the radio (or bench_api.py) at it:
+    python3 stub_server.py --port 8787 --latency-ms 150 --jitter-ms 100
+    python3 -c "from api import AnamnesisAPI; print(AnamnesisAPI('http://127.0.0.1:8787').search())"
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sample.json")
+
+# Generated stream audio: 8kHz 8-bit mono WAV, a quiet 440Hz tone
+SAMPLE_RATE = 8000
+WAV_HEADER_SIZE = 44
+TONE_PERIOD = bytes(
+    128 + int(24 * math.sin(2 * math.pi * i / (SAMPLE_RATE / 440)))
+    for i in range(SAMPLE_RATE // 440 * 20)
+)
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class Faults:
+    """Latency, bandwidth and error injection settings"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        bandwidth_kbps: float = 0,
+        error_rate: float = 0,
+        seed: Optional[int] = None,
+        slow_rate: float = 0,
+        slow_ms: float = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.bandwidth_kbps = bandwidth_kbps  # 0 = unlimited
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate    # Fraction of responses stalled by a further slow_ms
+        self.slow_ms = slow_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Seconds to wait before responding"""
+        with self._lock:
+            jitter = self._rng.uniform(0, self.jitter_ms)
+            stall = self.slow_ms if self._rng.random() < self.slow_rate else 0
+        return (self.latency_ms + jitter + stall) / 1000
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+
+class Fixtures:
+    """Search results, metadata and Penguin Radio tracks keyed like the Worker"""
+
+    def __init__(self, path: str = DEFAULT_FIXTURES):
+        with open(path) as f:
+            data = json.load(f)
+        self.search_items: List[dict] = data.get("search", [])
+        self.metadata: Dict[str, dict] = data.get("metadata", {})
+        self.penguin: List[dict] = data.get("penguin-radio", [])
+
+    @classmethod
+    def from_cassette(cls, path: str) -> "Fixtures":
+        """Build fixtures from a recorded cassette (see cassette.py)"""
+        from cassette import load_cassette
+
+        fixtures = cls.__new__(cls)
+        fixtures.search_items, fixtures.metadata, fixtures.penguin = [], {}, []
+        seen = set()
+
+        for entry in load_cassette(path):
+            if entry["status"] != 200:
+                continue
+            path_part = entry["key"].split(" ", 1)[1].split("?", 1)[0]
+            body = json.loads(entry["body"])
+            if path_part == "/api/search":
+                for item in body.get("items", []):
+                    if item["identifier"] not in seen:
+                        seen.add(item["identifier"])
+                        fixtures.search_items.append(item)
+            elif path_part.startswith("/api/metadata/"):
+                fixtures.metadata[unquote(path_part[len("/api/metadata/"):])] = body
+            elif path_part == "/api/penguin-radio":
+                fixtures.penguin = body.get("items", [])
+
+        return fixtures
+
+    def search(self, params: Dict[str, str], rng: random.Random) -> List[dict]:
+        """Approximate handleSearch: year range, text match, exclude, one per creator"""
+        items = self.search_items
+        exclude = set(filter(None, params.get("exclude", "").split(",")))
+
+        era = params.get("era")
+        if era and "-" in era:
+            start, end = (int(y) for y in era.split("-", 1))
+            items = [i for i in items if start <= int(str(i.get("year") or 0)[:4] or 0) <= end]
+
+        for key in ("location", "genre"):
+            term = (params.get(key) or "").lower()
+            if term:
+                items = [i for i in items if term in json.dumps(i).lower()]
+
+        by_creator: Dict[str, List[dict]] = {}
+        for item in items:
+            if item["identifier"] in exclude:
+                continue
+            creator = (item.get("creator") or item["identifier"].split("-")[0]).lower().strip()
+            by_creator.setdefault(creator, []).append(item)
+
+        diverse = [rng.choice(group) for group in by_creator.values()]
+        rng.shuffle(diverse)
+        return diverse
+
+
+def stream_bytes(offset: int, length: int, total: int) -> bytes:
+    """Bytes [offset, offset+length) of a generated WAV file of `total` bytes"""
+    header = b"RIFF" + struct.pack("<I", total - 8) + b"WAVEfmt " + struct.pack(
+        "<IHHIIHH", 16, 1, 1, SAMPLE_RATE, SAMPLE_RATE, 1, 8
+    ) + b"data" + struct.pack("<I", total - WAV_HEADER_SIZE)
+
+    out = bytearray()
+    if offset < WAV_HEADER_SIZE:
+        out += header[offset:offset + length]
+    pos = max(offset, WAV_HEADER_SIZE) - WAV_HEADER_SIZE
+    remaining = length - len(out)
+    while remaining > 0:
+        start = pos % len(TONE_PERIOD)
+        chunk = TONE_PERIOD[start:start + remaining]
+        out += chunk
+        pos += len(chunk)
+        remaining -= len(chunk)
+    return bytes(out)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Routes the Worker's endpoints; server attributes hold config"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real Worker
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_HEAD(self):
+        self._send(200, b"", "text/plain")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        path = url.path
+        faults: Faults = self.server.faults
+
+        time.sleep(faults.delay())
+        if faults.should_fail():
+            self._send_json({"error": "Injected failure"}, status=503)
+            return
+
+        if path == "/api/search":
+            items = self.server.fixtures.search(params, self.server.rng)
+            self._send_json({"items": items, "page": int(params.get("page", 1)), "count": len(items)})
+        elif path.startswith("/api/metadata/"):
+            identifier = unquote(path[len("/api/metadata/"):])
+            metadata = self.server.fixtures.metadata.get(identifier)
+            if metadata is None:
+                self._send_json({"error": "Failed to fetch metadata", "audioFiles": []}, status=500)
+            else:
+                self._send_json(metadata)
+        elif path.startswith("/api/stream/") or path.startswith("/api/soundcloud-stream/"):
+            self._send_stream()
+        elif path == "/api/penguin-radio":
+            self._send_json({"items": self.server.fixtures.penguin})
+        elif path == "/api/heartbeat":
+            self._send_json({"ok": True})
+        elif path == "/api/listeners":
+            self._send_json({"count": self.server.listeners})
+        else:
+            self._send(404, b"Not found", "text/plain")
+
+    def _send_json(self, data: dict, status: int = 200):
+        self._send(status, json.dumps(data).encode("utf-8"), "application/json")
+
+    def _send_stream(self):
+        """Serve generated audio, honouring single byte ranges like archive.org"""
+        total = self.server.stream_size
+        start, end = 0, total - 1
+        status = 200
+
+        match = RANGE_RE.fullmatch(self.headers.get("Range", ""))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else total - 1
+            else:
+                start = max(0, total - int(match.group(2)))
+            end = min(end, total - 1)
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{total}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+        self.end_headers()
+
+        # Stream in chunks so the bandwidth cap applies
+        chunk_size = 16 * 1024
+        pos = start
+        try:
+            while pos <= end:
+                length = min(chunk_size, end - pos + 1)
+                self._write_throttled(stream_bytes(pos, length, total))
+                pos += length
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client seeked or stopped
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self._write_throttled(body)
+
+    def _write_throttled(self, data: bytes):
+        """Write data, sleeping as needed to respect the bandwidth cap"""
+        kbps = self.server.faults.bandwidth_kbps
+        if not kbps:
+            self.wfile.write(data)
+            return
+
+        bytes_per_s = kbps * 1000 / 8
+        step = max(1024, int(bytes_per_s / 20))  # ~50ms slices
+        for i in range(0, len(data), step):
+            piece = data[i:i + step]
+            self.wfile.write(piece)
+            time.sleep(len(piece) / bytes_per_s)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub Worker; use .url once started"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        fixtures: Optional[Fixtures] = None,
+        faults: Optional[Faults] = None,
+        stream_size: int = 2 * 1024 * 1024,
+        seed: Optional[int] = None,
+        verbose: bool = False,
+    ):
+        super().__init__((host, port), StubHandler)
+        self.fixtures = fixtures or Fixtures()
+        self.faults = faults or Faults(seed=seed)
+        self.stream_size = stream_size
+        self.rng = random.Random(seed)
+        self.listeners = 1
+        self.verbose = verbose
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        """Serve on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    """CLI options shared with bench_api.py"""
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="fixture JSON file")
+    parser.add_argument("--cassette", default=None, help="serve fixtures from a recorded cassette")
+    parser.add_argument("--latency-ms", type=float, default=0, help="base response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="extra uniform random latency")
+    parser.add_argument("--bandwidth-kbps", type=float, default=0, help="response bandwidth cap (0 = none)")
+    parser.add_argument("--slow-rate", type=float, default=0, help="fraction of responses stalled (long tail)")
+    parser.add_argument("--slow-ms", type=float, default=2000, help="extra latency of a stalled response")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered 503")
+    parser.add_argument("--stream-size", type=int, default=2 * 1024 * 1024, help="bytes per stream")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+
+
+def server_from_args(args: argparse.Namespace, port: int = 0) -> StubServer:
+    faults = Faults(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        bandwidth_kbps=args.bandwidth_kbps,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+    )
+    return StubServer(
+        port=port,
+        fixtures=Fixtures.from_cassette(args.cassette) if args.cassette else Fixtures(args.fixtures),
+        faults=faults,
+        stream_size=args.stream_size,
+        seed=args.seed,
+        verbose=getattr(args, "verbose", False),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Worker API")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, port=args.port)
+    print(f"Stub API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
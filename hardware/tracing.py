@@ -0,0 +1,142 @@
+"""
+Latency Tracing for Anamnesis.fm Radio
+Follows one input from GPIO edge to audible change
+
+Every button press starts a trace; spans recorded while it is active
+on a thread (debounce, dispatch, API calls, player open, first audio
+frame, display flush) share its trace ID. Finished spans go into a ring
+buffer that can be dumped as Chrome trace JSON (chrome://tracing or
+https://ui.perfetto.dev).
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from config import Tracing
+from log import get_logger
+
+log = get_logger("tracing")
+
+
+class Tracer:
+    """Ring buffer of finished spans plus a per-thread active trace ID"""
+
+    def __init__(self, capacity: int = Tracing.BUFFER_SIZE, enabled: bool = Tracing.ENABLED):
+        self.enabled = enabled
+        # deque.append is atomic, so recording needs no lock
+        self._spans: deque = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+
+    # === Trace context ===
+
+    def new_trace(self) -> int:
+        """Allocate a trace ID"""
+        return next(self._ids)
+
+    def current(self) -> Optional[int]:
+        """Trace ID active on this thread, if any"""
+        return getattr(self._local, 'trace_id', None)
+
+    @contextmanager
+    def activate(self, trace_id: Optional[int]):
+        """Make trace_id the active trace on this thread for the block"""
+        previous = self.current()
+        self._local.trace_id = trace_id
+        try:
+            yield trace_id
+        finally:
+            self._local.trace_id = previous
+
+    def bind(self, func: Callable) -> Callable:
+        """Wrap func so it runs under the caller's trace on another thread"""
+        trace_id = self.current()
+        if trace_id is None:
+            return func
+
+        def traced(*args, **kwargs):
+            with self.activate(trace_id):
+                return func(*args, **kwargs)
+
+        return traced
+
+    # === Spans ===
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """Time a block as a span of the active trace"""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter_ns(), self.current(), **args)
+
+    def record(self, name: str, start_ns: int, end_ns: int, trace_id: Optional[int] = None, **args):
+        """Add an already-measured span (e.g. one that ends on another thread)"""
+        if self.enabled:
+            self._spans.append((
+                name, start_ns, end_ns - start_ns, trace_id,
+                threading.get_ident(), threading.current_thread().name, args,
+            ))
+
+    # === Export ===
+
+    def chrome_trace(self) -> dict:
+        """Spans in Chrome trace event format"""
+        events = []
+        thread_names = {}
+        pid = os.getpid()
+
+        for name, start, duration, trace_id, tid, thread_name, args in list(self._spans):
+            thread_names[tid] = thread_name
+            event_args = dict(args)
+            if trace_id is not None:
+                event_args['trace'] = trace_id
+            events.append({
+                'name': name,
+                'cat': name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': start / 1000,
+                'dur': duration / 1000,
+                'pid': pid,
+                'tid': tid,
+                'args': event_args,
+            })
+
+        for tid, thread_name in thread_names.items():
+            events.append({
+                'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                'args': {'name': thread_name},
+            })
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path: str) -> int:
+        """
+        Write the ring buffer as Chrome trace JSON
+
+        Returns:
+            Number of spans written
+        """
+        trace = self.chrome_trace()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(trace, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        count = sum(1 for e in trace['traceEvents'] if e['ph'] == 'X')
+        log.info("Wrote %s spans to %s", count, path)
+        return count
+
+
+# Shared tracer for the whole radio
+tracer = Tracer()
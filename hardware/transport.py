@@ -0,0 +1,191 @@
+"""
+HTTP Transport for Anamnesis.fm Radio
+Keep-alive pool, per-endpoint retry budgets and hedged requests
+
+Every API call goes through Transport.get(), which applies the policy
+for its endpoint: how many attempts, how long each may take, and a
+total budget they all share. Retries back off with full jitter so
+several radios recovering together don't retry in lockstep. Endpoints
+marked for hedging send a duplicate request once the first has taken
+longer than the p95 of recent attempts and use whichever answers first.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Transport as TransportConfig
+from metrics import REGISTRY
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class Policy(NamedTuple):
+    attempts: int       # Tries in total, including the first
+    timeout_s: float    # Read timeout per attempt
+    budget_s: float     # All attempts (and backoff) must finish within this
+    hedge: bool = False  # Send a duplicate after the p95 and take the first answer
+
+
+DEFAULT_POLICY = Policy(attempts=2, timeout_s=8, budget_s=12)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+    ceiling = min(TransportConfig.BACKOFF_MAX_S, TransportConfig.BACKOFF_BASE_S * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling)
+
+
+class Transport:
+    """requests.Session wrapper applying retry and hedging policies by endpoint"""
+
+    def __init__(self, session: requests.Session, policies: Optional[Dict[str, Policy]] = None):
+        """
+        Args:
+            session: Session to send through (gets a sized keep-alive pool mounted)
+            policies: Endpoint name -> Policy (default TransportConfig.POLICIES)
+        """
+        self.session = session
+        self.policies = policies if policies is not None else {
+            endpoint: Policy(*values) for endpoint, values in TransportConfig.POLICIES.items()
+        }
+
+        # Retries happen here, not inside urllib3
+        adapter = HTTPAdapter(
+            pool_connections=TransportConfig.POOL_CONNECTIONS,
+            pool_maxsize=TransportConfig.POOL_MAXSIZE,
+            max_retries=0,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+
+        # Exact recent latencies per endpoint - histogram buckets are too coarse to hedge on
+        self._latencies: Dict[str, deque] = {}
+
+    def policy(self, endpoint: str) -> Policy:
+        return self.policies.get(endpoint, DEFAULT_POLICY)
+
+    def get(self, endpoint: str, url: str, **kwargs) -> requests.Response:
+        """
+        GET with the endpoint's retry/hedge policy
+
+        Args:
+            endpoint: Policy and metrics label (e.g. "search")
+            url: Full URL
+            **kwargs: Passed to Session.get (timeout is set by the policy)
+
+        Returns:
+            The last response (possibly a 5xx if every attempt got one)
+
+        Raises:
+            requests.RequestException: Every attempt failed to get a response
+        """
+        policy = self.policy(endpoint)
+        labels = {"endpoint": endpoint}
+        deadline = time.monotonic() + policy.budget_s
+        kwargs.pop("timeout", None)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = deadline - time.monotonic()
+            timeout = (TransportConfig.CONNECT_TIMEOUT_S, max(0.5, min(policy.timeout_s, remaining)))
+            error: Optional[requests.RequestException] = None
+            response = None
+            try:
+                if policy.hedge:
+                    response = self._hedged_get(endpoint, url, timeout, **kwargs)
+                else:
+                    response = self._attempt(endpoint, url, timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            retryable = error is not None or response.status_code in RETRY_STATUSES
+            if not retryable or attempt >= policy.attempts:
+                break
+            delay = backoff_delay(attempt)
+            if time.monotonic() + delay >= deadline:
+                break  # Out of budget
+
+            if response is not None:
+                response.close()
+            REGISTRY.counter("anamnesis_api_retries_total", "API request retries", labels).inc()
+            time.sleep(delay)
+
+        if error is not None:
+            raise error
+        return response
+
+    def _attempt(self, endpoint: str, url: str, timeout, **kwargs) -> requests.Response:
+        """One request, timed per attempt"""
+        start = time.perf_counter()
+        try:
+            return self.session.get(url, timeout=timeout, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            REGISTRY.histogram(
+                "anamnesis_api_attempt_seconds", "Latency of single API attempts", {"endpoint": endpoint}
+            ).observe(elapsed)
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies.setdefault(endpoint, deque(maxlen=TransportConfig.HEDGE_WINDOW))
+            latencies.append(elapsed)
+
+    def hedge_delay(self, endpoint: str) -> float:
+        """How long to wait on the first request before sending a duplicate"""
+        recent = sorted(self._latencies.get(endpoint, ()))
+        if len(recent) < TransportConfig.HEDGE_MIN_SAMPLES:
+            return TransportConfig.HEDGE_DEFAULT_S
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))]
+        return max(TransportConfig.HEDGE_MIN_S, p95)
+
+    def _hedged_get(self, endpoint: str, url: str, timeout, **kwargs) -> requests.Response:
+        """First answer of the request and, if it's slow, one duplicate"""
+        with self._hedge_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(
+                    max_workers=TransportConfig.HEDGE_WORKERS, thread_name_prefix="hedge"
+                )
+        pool = self._hedge_pool
+
+        first = pool.submit(self._attempt, endpoint, url, timeout, **kwargs)
+        done, _ = wait([first], timeout=self.hedge_delay(endpoint))
+        if done:
+            return first.result()
+
+        labels = {"endpoint": endpoint}
+        REGISTRY.counter("anamnesis_api_hedges_total", "Duplicate requests sent after the p95", labels).inc()
+        second = pool.submit(self._attempt, endpoint, url, timeout, **kwargs)
+        pending = {first, second}
+        error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                if future is second:
+                    REGISTRY.counter(
+                        "anamnesis_api_hedge_wins_total", "Hedged duplicates that answered first", labels
+                    ).inc()
+                # Let the loser finish in the background and give its connection back
+                for loser in pending:
+                    loser.add_done_callback(_close_response)
+                return future.result()
+
+        raise error
+
+
+def _close_response(future):
+    if future.exception() is None:
+        future.result().close()
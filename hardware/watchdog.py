@@ -0,0 +1,181 @@
+"""
+Playback Watchdog for Anamnesis.fm Radio
+Notices stalled playback and recovers in-process before systemd has to
+
+A background thread checks, every few seconds, that the main loop is
+still ticking and that audio is making progress while it should be.
+Stuck playback is recovered in steps - reconnect the stream at the
+current position, skip to the next track, re-create mpv - each given
+time to work before the next. Meanwhile it pings systemd's watchdog
+(WatchdogSec), and stops once the main loop is wedged or every step has
+failed, so a full service restart only happens as the last resort.
+"""
+
+import os
+import socket
+from typing import Callable, List, Optional, Tuple
+
+from clock import Clock
+from config import Watchdog as WatchdogConfig
+from log import get_logger
+from metrics import REGISTRY
+
+log = get_logger("watchdog")
+
+
+def sd_notify(message: str) -> bool:
+    """
+    Send a message (e.g. "READY=1", "WATCHDOG=1") to systemd
+
+    Returns:
+        True if sent, False when not running under systemd
+    """
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]  # Abstract socket
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(message.encode())
+        return True
+    except OSError as e:
+        log.warning("sd_notify failed: %s", e)
+        return False
+
+
+def watchdog_interval() -> Optional[float]:
+    """Seconds between systemd pings (half of WatchdogSec), None if not enabled"""
+    usec = os.environ.get("WATCHDOG_USEC")
+    pid = os.environ.get("WATCHDOG_PID")
+    if not usec or (pid and int(pid) != os.getpid()):
+        return None
+    return int(usec) / 1e6 / 2
+
+
+class PlaybackWatchdog:
+    """Escalating recovery for stuck playback, plus the systemd watchdog ping"""
+
+    def __init__(
+        self,
+        clock: Clock,
+        expecting: Callable[[], bool],
+        state: Callable[[], Optional[object]],
+        recoveries: List[Tuple[str, Callable[[], None]]],
+        notify: Callable[[str], bool] = sd_notify,
+        stall_s: float = WatchdogConfig.STALL_S,
+    ):
+        """
+        Args:
+            clock: Time source
+            expecting: True while audio should be playing
+            state: Current PlaybackState, or None if progress can't be observed
+            recoveries: (name, action) pairs, mildest first
+            notify: sd_notify or a stand-in
+            stall_s: Time without progress before each recovery step
+        """
+        self.clock = clock
+        self.expecting = expecting
+        self.state = state
+        self.recoveries = recoveries
+        self.notify = notify
+        self.stall_s = stall_s
+
+        self.level = 0                  # Recovery steps taken in this stall
+        self._last_position: Optional[float] = None
+        self._last_cache: Optional[float] = None
+        self._last_progress = clock.monotonic()
+        self._last_beat = clock.monotonic()
+        self._running = False
+        self._unhealthy = False         # Already said why pings stopped
+
+    def beat(self):
+        """Main loop heartbeat - call every tick"""
+        self._last_beat = self.clock.monotonic()
+
+    def start(self):
+        interval = watchdog_interval()
+        self._interval = min(WatchdogConfig.CHECK_S, interval) if interval else WatchdogConfig.CHECK_S
+        self._running = True
+        self.clock.spawn(self._run, name="watchdog")
+        if interval:
+            log.info("Watchdog pinging systemd every %.0fs (deadline %.0fs)", self._interval, interval * 2)
+        return self
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        while self._running:
+            # A recovery step that hangs stops the pings too - systemd takes over
+            if self.check():
+                self.notify("WATCHDOG=1")
+            self.clock.sleep(self._interval)
+
+    def check(self) -> bool:
+        """
+        Look for a stall and take the next recovery step if one is due
+
+        Returns:
+            True if the process is healthy enough to keep systemd waiting
+        """
+        now = self.clock.monotonic()
+
+        if now - self._last_beat > WatchdogConfig.LOOP_STALL_S:
+            return self._give_up(f"Main loop silent for {now - self._last_beat:.0f}s")
+
+        state = self.state()
+
+        if state is None or not self.expecting():
+            self._progressed(now, state)
+            return True
+
+        position, cache = state.position, state.cache_s
+        moving = position is not None and position != self._last_position
+        # Stalled but the cache is filling - the network is slow, not dead
+        filling = state.buffering and cache is not None and cache > (self._last_cache or 0)
+        self._last_position, self._last_cache = position, cache
+
+        if moving or filling:
+            self._progressed(now, state)
+            return True
+
+        if now - self._last_progress < self.stall_s:
+            return True
+
+        if self.level >= len(self.recoveries):
+            return self._give_up("Playback still stuck after every recovery step")
+
+        name, action = self.recoveries[self.level]
+        self.level += 1
+        log.warning("No playback progress for %.0fs, recovering: %s", now - self._last_progress, name)
+        REGISTRY.counter(
+            "anamnesis_watchdog_recoveries_total", "Watchdog recovery steps taken", {"action": name}
+        ).inc()
+        self.notify(f"STATUS=Recovering playback ({name})")
+        try:
+            action()
+        except Exception as e:
+            log.warning("Recovery %s failed: %s", name, e)
+        # Give this step a full stall period to show progress
+        self._last_progress = self.clock.monotonic()
+        return True
+
+    def _give_up(self, reason: str) -> bool:
+        """Stop pinging so systemd restarts the service"""
+        if not self._unhealthy:
+            log.error("%s, leaving it to systemd", reason)
+            self._unhealthy = True
+        return False
+
+    def _progressed(self, now: float, state):
+        self._unhealthy = False
+        if self.level:
+            log.info("Playback recovered after %s step(s)", self.level)
+            self.notify("STATUS=Playing")
+            self.level = 0
+        self._last_progress = now
+        if state is not None:
+            self._last_position, self._last_cache = state.position, state.cache_s